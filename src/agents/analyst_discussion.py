@@ -1,12 +1,18 @@
 # src/agents/analyst_discussion.py
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 import datetime as dt
+import threading
 
 from src.llm.ollama_client import get_llm
+from src.llm.response_cache import cached_llm
 from src.agents.toolbox import ToolBox
-from src.utils.io import append_jsonl  # 檔頭加
+from src.agents.prompt_builder import (PromptReport, STANCE_FIRST_INSTRUCTIONS,
+                                       build_discussion_prompt)
+from src.agents.round_scheduler import RoundScheduler
+from src.llm.streaming import stream_stance
+from src.utils.io import get_writer
 
 # ---------- helpers ----------
 
@@ -38,29 +44,19 @@ def _compose_prompt(
     risk_view: Optional[Dict[str, Any]],
     prev_summary: str,
     obs: Dict[str, Any],
-) -> str:
+    *,
+    budget: Optional[int] = None,
+    stance_first: bool = False,
+    ask_confidence: bool = False,
+) -> Tuple[str, PromptReport]:
     """
     建立 LLM prompt：包含目標、最新觀測（含工具補齊）、上一輪摘要。
+    市場資料以精簡摘要呈現（top/bottom-k、breadth、VIX/情緒、去重新聞），受 token 預算限制。
+    stance_first：要求模型第一行就給 Final Stance（串流模式用）；ask_confidence：另要求 Confidence 行。
     """
-    lines: List[str] = []
-    lines.append(f"TIME(UTC): {_now_iso()}")
-    lines.append(f"GOAL: {goal}")
-    lines.append("CONTEXT:")
-    lines.append(f"- market_view: {market_view}")
-    lines.append(f"- risk_view: {risk_view}")
-    lines.append(f"- latest_observation: {obs}")
-    if prev_summary:
-        lines.append(f"- previous_round_summary: {prev_summary}")
-
-    lines.append(
-        "\nYou are the Analyst Discussion Agent. "
-        "Given the context, produce a compact markdown block with:\n"
-        "1) Summary of Key Takeaways\n"
-        "2) Opportunities/Risks/Catalysts (bullet points)\n"
-        "3) Final Stance: one of {bullish, bearish, neutral, cautious}\n"
-        "Be decisive but justify briefly."
-    )
-    return "\n".join(lines)
+    kw = {"instructions": STANCE_FIRST_INSTRUCTIONS} if stance_first else {}
+    return build_discussion_prompt(goal, market_view, risk_view, prev_summary, obs,
+                                   now=_now_iso(), budget=budget, ask_confidence=ask_confidence, **kw)
 
 def _parse_stance(text: str) -> str:
     t = (text or "").lower()
@@ -75,6 +71,10 @@ class DiscussionResult:
     final_stance: str
     transcript: List[str] = field(default_factory=list)
     actions: List[Dict[str, Any]] = field(default_factory=list)  # 自動補資料紀錄
+    prompt_reports: List[Dict[str, Any]] = field(default_factory=list)  # 每輪各段 token 用量
+    stream_stats: List[Dict[str, Any]] = field(default_factory=list)    # 串流模式：每輪立場出現時間等
+    stop_reason: str = "rounds"   # rounds / cancelled / adaptive: max_rounds, converged, confident, no_new_info, tools_exhausted
+    schedule: List[Dict[str, Any]] = field(default_factory=list)        # adaptive：每輪立場、信心、新觀測
 
 # ---------- main API ----------
 
@@ -87,14 +87,27 @@ def run_analyst_discussion(
     auto_tools: bool = True,
     tool_budget: int = 2,
     preferred_domains: Optional[List[str]] = None,
-    log_actions_path: Optional[str] = "data/logs/discussion_actions.jsonl"
+    log_actions_path: Optional[str] = "data/logs/discussion_actions.jsonl",
+    prompt_budget: Optional[int] = None,
+    stream: bool = False,
+    rationale_chars: Optional[int] = 400,
+    cancel: Optional[threading.Event] = None,
+    adaptive: bool = False,
+    scheduler: Optional[RoundScheduler] = None,
 ) -> Dict[str, Any]:
     """
     多輪對話，帶「經驗調整機制」：若資訊不足則自動補齊再繼續收斂。
     - preferred_domains：例如 CBOE/WSJ/Reuters/FT/FRED/CME/Treasury 的白名單
+    - prompt_budget：每輪 prompt 的 token 上限（預設 AI_TRADER_PROMPT_TOKENS 或 1200）
+    - stream：逐 token 讀取，看到 "Final Stance:" 並取得 rationale_chars 字理由後即停止生成；
+      cancel（threading.Event）被設定時立即停止本輪並結束討論
+    - adaptive：rounds 變成上限，由 RoundScheduler 依立場穩定度、工具是否帶來新觀測、
+      模型自報 Confidence 決定提早結束；原因記在 stop_reason（也可直接傳入 scheduler）
     """
     rounds = max(1, min(5, int(rounds)))
-    llm = get_llm()
+    if adaptive and scheduler is None:
+        scheduler = RoundScheduler(max_rounds=rounds)
+    llm = cached_llm(get_llm())   # 同一 prompt（忽略 TIME 行）重跑時直接命中快取
     tb = ToolBox()
 
     # 初始觀測（market_analyst 若已提供就直接沿用；否則留空待補）
@@ -107,8 +120,14 @@ def run_analyst_discussion(
 
     transcript: List[str] = []
     actions: List[Dict[str, Any]] = []
+    prompt_reports: List[Dict[str, Any]] = []
+    stream_stats: List[Dict[str, Any]] = []
     prev_summary = ""
     stance = "neutral"
+    stop_reason = "rounds"
+    failed: set = set()          # 已失敗的工具不再算作「可能帶來新資訊」
+    if scheduler is not None:
+        scheduler.start(obs)
 
     # 為新聞搜尋準備關鍵字（若沒 symbols，就用保守預設）
     symbols = market_view.get("symbols")
@@ -128,6 +147,8 @@ def run_analyst_discussion(
             for need in _need_info(obs):
                 if tool_budget <= 0:
                     break
+                if scheduler is not None and need in failed:
+                    continue                     # adaptive：同一場討論不重試已失敗的工具
                 record = {"round": r, "action": f"invoke_{need}"}
                 if need == "vix_term":
                     res = tb.invoke("vix_term")
@@ -150,28 +171,54 @@ def run_analyst_discussion(
                 else:
                     record["ok"] = False
                     record["error"] = f"unknown need {need}"
+                if not record.get("ok"):
+                    failed.add(need)
                 actions.append(record)
                 tool_budget -= 1
 
         # 2) 建立 prompt → 由 LLM 綜整生成該輪摘要 + 立場
-        prompt = _compose_prompt(goal, market_view, risk_view, prev_summary, obs)
-        out = llm.invoke(prompt)
-        text = out if isinstance(out, str) else getattr(out, "content", str(out))
+        prompt, report = _compose_prompt(goal, market_view, risk_view, prev_summary, obs,
+                                         budget=prompt_budget, stance_first=stream,
+                                         ask_confidence=scheduler is not None)
+        prompt_reports.append(report.as_dict())
+        if stream:
+            res = stream_stance(llm, prompt, rationale_chars=rationale_chars, cancel=cancel)
+            text = res.text
+            stance = res.stance or _parse_stance(text)
+            stream_stats.append({"round": r, **res.as_dict()})
+        else:
+            out = llm.invoke(prompt)
+            text = out if isinstance(out, str) else getattr(out, "content", str(out))
+            stance = _parse_stance(text)
         transcript.append(text)
-        stance = _parse_stance(text)
         prev_summary = text
+        if cancel is not None and cancel.is_set():
+            stop_reason = "cancelled"
+            break
+        if scheduler is not None:
+            scheduler.record(r, stance, text, obs)
+            pending = auto_tools and tool_budget > 0 and any(n not in failed for n in _need_info(obs))
+            if not scheduler.should_continue(pending_info=pending):
+                stop_reason = scheduler.stop_reason
+                break
 
     result = DiscussionResult(
-        rounds=rounds,
+        rounds=len(transcript),
         final_stance=stance,
         transcript=transcript,
-        actions=actions
+        actions=actions,
+        prompt_reports=prompt_reports,
+        stream_stats=stream_stats,
+        stop_reason=stop_reason,
+        schedule=scheduler.as_dicts() if scheduler is not None else [],
     ).__dict__
 
     if log_actions_path:
-        append_jsonl(log_actions_path, {
+        get_writer(log_actions_path).write({
             "ts": _now_iso(),
             "final_stance": stance,
+            "rounds": len(transcript),
+            "stop_reason": stop_reason,
             "actions": actions,
             "symbols": symbols,
         })
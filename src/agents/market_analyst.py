@@ -2,20 +2,14 @@
 from __future__ import annotations
 from typing import Dict, Any, List, Tuple
 from src.tools.sentiment_tools import vix_term_structure  # 已存在
+from src.tools.screening import SignalIndex
 # 如果你有實作 fetch_fear_greed() 就改用真的，沒有就先用 stub
 def _fear_greed_stub() -> Dict[str, Any]:
     return {"fgi": None, "note": "FGI stub; wire a real fetcher when ready."}
 
 def _top_by_signal(stocks: Dict[str, Dict[str, float]], k: int = 5) -> List[Tuple[str, float]]:
-    items = []
-    for s, d in stocks.items():
-        try:
-            sc = float(d.get("signal_score"))
-        except Exception:
-            sc = float("nan")
-        items.append((s, sc))
-    items.sort(key=lambda x: (float("-inf") if x[1] != x[1] else x[1]), reverse=True)  # NaN last
-    return [(s, sc) for s, sc in items[:k] if sc == sc]
+    # partition-based top-k（同分依 RSI、成交量），不再整個 universe 排序
+    return SignalIndex.from_stocks(stocks or {}).top_k(k)
 
 def run_market_analyst(market_view: Dict[str, Any]) -> Dict[str, Any]:
     """
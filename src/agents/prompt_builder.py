@@ -0,0 +1,282 @@
+# src/agents/prompt_builder.py
+from __future__ import annotations
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.tools.analysis_tools import universe_trends
+from src.tools.screening import SignalIndex
+
+ENV_PROMPT_TOKENS = "AI_TRADER_PROMPT_TOKENS"
+DEFAULT_TOKEN_BUDGET = 1200
+CHARS_PER_TOKEN = 4.0     # Llama / GPT 類 BPE 對英數混合文字的粗估
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokenizer estimate: ~4 characters per token (no model-specific vocab needed)."""
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+
+@dataclass
+class PromptReport:
+    budget: int
+    used: int = 0
+    sections: Dict[str, int] = field(default_factory=dict)   # section → tokens rendered
+    truncated: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"budget": self.budget, "used": self.used, "sections": dict(self.sections),
+                "truncated": list(self.truncated), "dropped": list(self.dropped)}
+
+
+@dataclass
+class _Section:
+    name: str
+    lines: List[str]
+    keep: int = 1          # 截斷時至少保留的行數（標題 + 1 列）；0 = 可整段捨棄
+
+
+# ---------------- formatting helpers ----------------
+
+def _f(x: Any, nd: int = 2) -> str:
+    try:
+        v = float(x)
+    except (TypeError, ValueError):
+        return "-"
+    return "-" if not math.isfinite(v) else f"{v:.{nd}f}"
+
+def _col(stocks: Mapping[str, Any], key: str) -> np.ndarray:
+    col = getattr(stocks, "column", None)      # CompactIndicatorTable
+    if col is not None:
+        return np.asarray(col(key), dtype=float)
+    vals = ((sd or {}).get(key) for sd in stocks.values())
+    out = np.fromiter((np.nan if v is None else v for v in vals), dtype=float, count=len(stocks))
+    return out
+
+def _clip_list(items: Sequence[Any], n: int) -> str:
+    head = ", ".join(str(x) for x in items[:n])
+    return head + (f" (+{len(items) - n} more)" if len(items) > n else "")
+
+_TITLE_TAIL = re.compile(r"\s+[-|–—]\s+[^-|–—]{2,40}$")   # "Headline - Reuters"
+
+def _title_key(title: str) -> str:
+    t = _TITLE_TAIL.sub("", title.strip().lower())
+    return re.sub(r"[^a-z0-9]+", " ", t).strip()
+
+
+# ---------------- sections ----------------
+
+def _symbol_table(name: str, title: str, rows: List[Tuple[str, float]], stocks: Mapping[str, Any],
+                  trends: Dict[str, str]) -> _Section:
+    lines = [f"{title} (sym | score | chg% | rsi14 | trend):"]
+    for sym, score in rows:
+        sd = stocks.get(sym) or {}
+        lines.append(f"  {sym} | {_f(score, 1)} | {_f(sd.get('change_pct'))} | "
+                     f"{_f(sd.get('rsi14'), 0)} | {trends.get(sym, '-')}")
+    return _Section(name, lines, keep=2)
+
+def _market_sections(market_view: Mapping[str, Any], k: int) -> List[_Section]:
+    stocks = market_view.get("stocks") or {}
+    if not len(stocks):
+        syms = market_view.get("symbols") or []
+        return [_Section("breadth", [f"UNIVERSE: {_clip_list(list(syms), 20)} (no indicators)"])] if syms else []
+    labels = universe_trends(stocks)
+    trends = dict(zip(stocks.keys(), labels.tolist()))
+    chg, price, ma50, rsi = (_col(stocks, c) for c in ("change_pct", "price", "ma50", "rsi14"))
+    score = _col(stocks, "signal_score")
+    n = len(stocks)
+    with np.errstate(invalid="ignore"):
+        above = int((price > ma50).sum())
+        n_ma = int(np.isfinite(price + ma50).sum())
+        breadth = [
+            f"BREADTH: n={n} adv={int((chg > 0).sum())} dec={int((chg < 0).sum())} "
+            f"median_chg%={_f(np.nanmedian(chg) if np.isfinite(chg).any() else np.nan)} "
+            f"above_ma50={above}/{n_ma}",
+            f"  trends: up={int((labels == 'uptrend').sum())} down={int((labels == 'downtrend').sum())} "
+            f"side={int((labels == 'sideways').sum())} n/a={int((labels == 'insufficient_data').sum())} | "
+            f"rsi>70={int((rsi > 70).sum())} rsi<30={int((rsi < 30).sum())} | "
+            f"mean_score={_f(np.nanmean(score) if np.isfinite(score).any() else np.nan)}",
+        ]
+    idx = SignalIndex.from_stocks(stocks)
+    top = idx.top_k(k)
+    top_syms = {s for s, _ in top}
+    bottom = [r for r in idx.bottom_k(k) if r[0] not in top_syms]   # 小 universe 時避免重複
+    out = [_Section("breadth", breadth), _symbol_table("top", f"TOP {len(top)}", top, stocks, trends)]
+    if bottom:
+        out.append(_symbol_table("bottom", f"BOTTOM {len(bottom)}", bottom, stocks, trends))
+    return out
+
+def _vix_sentiment_section(market_view: Mapping[str, Any], obs: Mapping[str, Any]) -> _Section:
+    vix = market_view.get("VIX") or market_view.get("vix") or {}     # fetch_market_batch 用 "VIX"
+    term = obs.get("vix_term") or market_view.get("vix_term") or {}
+    lines = []
+    if isinstance(vix, Mapping) and vix:
+        lines.append(f"VIX: level={_f(vix.get('level'))} chg_1d={_f(vix.get('chg_1d'), 3)} "
+                     f"z={_f(vix.get('zscore'))} regime={vix.get('regime', '-')} "
+                     f"risk={_f(vix.get('risk_score'), 1)}")
+    if isinstance(term, Mapping) and term:
+        lines.append(f"VIX_TERM: vix={_f(term.get('vix'))} vix3m={_f(term.get('vix3m'))} "
+                     f"ratio={_f(term.get('ratio'), 3)}")
+    fg = obs.get("fear_greed") or market_view.get("fear_greed") or {}
+    if isinstance(fg, Mapping):
+        val = fg.get("value", fg.get("fgi"))
+        if val is not None or fg.get("label"):
+            lines.append(f"FEAR_GREED: {val if val is not None else '-'} ({fg.get('label') or '-'})")
+    if market_view.get("market_sentiment"):
+        recs = list(market_view.get("recommended_stocks") or [])
+        lines.append(f"ANALYST: sentiment={market_view['market_sentiment']} "
+                     f"recommended={_clip_list(recs, 8) or '-'}")
+    for c in list(market_view.get("concerns") or [])[:3]:
+        lines.append(f"  concern: {c}")
+    return _Section("vix_sentiment", lines or ["VIX: n/a"], keep=1)
+
+def _risk_section(risk_view: Optional[Mapping[str, Any]]) -> Optional[_Section]:
+    if not risk_view:
+        return None
+    high = list(risk_view.get("high_risk_stocks") or [])
+    safe = list(risk_view.get("safe_stocks") or [])
+    lines = [f"RISK: level={risk_view.get('overall_risk_level', '-')} "
+             f"avg_score={_f(risk_view.get('risk_score'), 1)} high={len(high)} safe={len(safe)}"]
+    if high:
+        lines.append(f"  high_risk: {_clip_list(high, 10)}")
+    mps = risk_view.get("max_position_size")
+    if isinstance(mps, Mapping):
+        lines.append(f"  limits: per_stock={mps.get('per_stock')} total={mps.get('total_equity')}")
+    return _Section("risk", lines, keep=1)
+
+def _headline_section(market_view: Mapping[str, Any], obs: Mapping[str, Any], max_headlines: int
+                      ) -> Optional[_Section]:
+    hits: List[Mapping[str, Any]] = []
+    for src in (obs.get("news"), market_view.get("news")):
+        if isinstance(src, Mapping):
+            hits += [h for h in src.get("hits") or [] if isinstance(h, Mapping)]
+        elif isinstance(src, list):
+            hits += [h for h in src if isinstance(h, Mapping)]
+    seen, lines = set(), ["HEADLINES:"]
+    for h in hits:
+        title = str(h.get("title") or "").strip()
+        key = _title_key(title)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        src = h.get("source") or ""
+        lines.append(f"- {title}" + (f" ({src})" if src else ""))
+        if len(lines) > max_headlines:
+            break
+    return _Section("headlines", lines, keep=2) if len(lines) > 1 else None
+
+
+# ---------------- builder ----------------
+
+_INSTRUCTIONS = (
+    "\nYou are the Analyst Discussion Agent. "
+    "Given the context, produce a compact markdown block with:\n"
+    "1) Summary of Key Takeaways\n"
+    "2) Opportunities/Risks/Catalysts (bullet points)\n"
+    "3) Final Stance: one of {bullish, bearish, neutral, cautious}\n"
+    "Be decisive but justify briefly."
+)
+
+# 串流模式：先給立場，再給有限長度的理由 → 偵測到立場即可提早結束生成
+STANCE_FIRST_INSTRUCTIONS = (
+    "\nYou are the Analyst Discussion Agent. "
+    "Reply in this exact order:\n"
+    "Final Stance: one of {bullish, bearish, neutral, cautious}  (first line, nothing before it)\n"
+    "Then 2-4 short bullet points justifying it (key takeaways, risks, catalysts)."
+)
+
+# adaptive rounds：請模型自報信心，供 RoundScheduler 判斷是否收斂
+CONFIDENCE_INSTRUCTION = "\nRight after the Final Stance line add 'Confidence: <0.0-1.0>'."
+
+def _budget(budget: Optional[int]) -> int:
+    if budget is not None:
+        return int(budget)
+    try:
+        return int(os.getenv(ENV_PROMPT_TOKENS, DEFAULT_TOKEN_BUDGET))
+    except ValueError:
+        return DEFAULT_TOKEN_BUDGET
+
+def build_discussion_prompt(
+    goal: str,
+    market_view: Mapping[str, Any],
+    risk_view: Optional[Mapping[str, Any]],
+    prev_summary: str,
+    obs: Mapping[str, Any],
+    *,
+    now: str,
+    budget: Optional[int] = None,
+    k: int = 5,
+    max_headlines: int = 8,
+    instructions: str = _INSTRUCTIONS,
+    ask_confidence: bool = False,
+) -> Tuple[str, PromptReport]:
+    """
+    Render the discussion prompt as a compact digest within `budget` tokens
+    (default AI_TRADER_PROMPT_TOKENS or 1200; estimate_tokens()).
+
+    Sections are admitted by priority — header and instructions always, then VIX /
+    sentiment, risk, breadth, top-k, bottom-k, headlines, previous summary. A section
+    that does not fit is cut line by line (tables keep their header + one row) or, for
+    the previous summary, character-truncated; otherwise it is dropped. The report has
+    the tokens each section used. ask_confidence appends CONFIDENCE_INSTRUCTION.
+    """
+    if ask_confidence:
+        instructions = instructions + CONFIDENCE_INSTRUCTION
+    rep = PromptReport(budget=_budget(budget))
+    header = [f"TIME(UTC): {now}", f"GOAL: {goal}", "CONTEXT:"]
+    fixed = {"header": "\n".join(header), "instructions": instructions}
+    for name, text in fixed.items():
+        rep.sections[name] = estimate_tokens(text) + (1 if name == "header" else 0)
+    remaining = rep.budget - sum(rep.sections.values())
+
+    market = {s.name: s for s in _market_sections(market_view, k)}
+    candidates: List[Optional[_Section]] = [
+        _vix_sentiment_section(market_view, obs), _risk_section(risk_view),
+        market.get("breadth"), market.get("top"), market.get("bottom"),
+        _headline_section(market_view, obs, max_headlines),
+    ]
+    chosen: Dict[str, str] = {}
+    for sec in (c for c in candidates if c is not None):
+        lines = list(sec.lines)
+        cost = estimate_tokens("\n".join(lines)) + 1
+        while cost > remaining and len(lines) > max(sec.keep, 1):
+            lines.pop()
+            cost = estimate_tokens("\n".join(lines)) + 1
+        if cost > remaining:
+            rep.dropped.append(sec.name)
+            continue
+        if len(lines) < len(sec.lines):
+            rep.truncated.append(sec.name)
+        chosen[sec.name] = "\n".join(lines)
+        rep.sections[sec.name] = cost
+        remaining -= cost
+
+    if prev_summary:
+        prefix = "PREVIOUS_ROUND_SUMMARY: "
+        text = prefix + " ".join(prev_summary.split())
+        cost = estimate_tokens(text) + 1
+        if cost > remaining:
+            room = int((remaining - 1) * CHARS_PER_TOKEN) - len(prefix) - 1
+            if room >= 40:
+                text = text[: len(prefix) + room] + "…"
+                cost = estimate_tokens(text) + 1
+                rep.truncated.append("previous")
+            else:
+                text, cost = "", 0
+                rep.dropped.append("previous")
+        if text:
+            chosen["previous"] = text
+            rep.sections["previous"] = cost
+            remaining -= cost
+
+    # 固定的呈現順序（與入選優先序無關）
+    order = ("vix_sentiment", "breadth", "top", "bottom", "risk", "headlines", "previous")
+    body = [chosen[n] for n in order if n in chosen]
+    prompt = "\n".join(header + body) + "\n" + instructions
+    rep.used = estimate_tokens(prompt)
+    return prompt, rep
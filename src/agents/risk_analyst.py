@@ -1,9 +1,10 @@
 from __future__ import annotations
 from typing import Dict, Any
-from ..tools.analysis_tools import risk_score
+from ..tools.analysis_tools import universe_risk_scores
 
 def run_risk_analyst(market_json: Dict[str, Any]) -> Dict[str, Any]:
-    scores = {sym: float(risk_score.invoke({"symbol_data": sd})) for sym, sd in market_json["stocks"].items()}
+    # 一次向量化計算整個 universe；risk_score @tool 留給 LLM 使用
+    scores = universe_risk_scores(market_json["stocks"])
     high = [s for s, v in scores.items() if v > 7]
     safe = [s for s, v in scores.items() if v <= 5]
     out = {
@@ -0,0 +1,119 @@
+# src/agents/round_scheduler.py
+from __future__ import annotations
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional
+
+# "Confidence: 0.8" / "confidence - 80%" / "**Confidence:** high"
+_CONFIDENCE = re.compile(
+    r"confidence\W{0,4}?[:：\-]\W{0,3}?(\d{1,3}(?:\.\d+)?\s*%?|high|medium|moderate|low)",
+    re.IGNORECASE,
+)
+_CONFIDENCE_WORDS = {"high": 0.85, "medium": 0.6, "moderate": 0.6, "low": 0.3}
+
+
+def parse_confidence(text: str) -> Optional[float]:
+    """Model-reported confidence in [0, 1] (percentages and high/medium/low accepted); None if absent."""
+    m = _CONFIDENCE.search(text or "")
+    if m is None:
+        return None
+    raw = m.group(1).strip().lower()
+    if raw in _CONFIDENCE_WORDS:
+        return _CONFIDENCE_WORDS[raw]
+    pct = raw.endswith("%")
+    v = float(raw.rstrip("%").strip())
+    if pct or v > 1.0:
+        v /= 100.0
+    return min(max(v, 0.0), 1.0)
+
+
+def obs_fingerprint(obs: Mapping[str, Any]) -> Dict[str, str]:
+    """Per-key digest of the observations (order-insensitive JSON), for cheap change detection."""
+    out = {}
+    for k, v in obs.items():
+        blob = json.dumps(v, sort_keys=True, default=str).encode("utf-8")
+        out[k] = hashlib.sha1(blob).hexdigest()[:16]
+    return out
+
+
+@dataclass
+class RoundRecord:
+    round: int
+    stance: str
+    confidence: Optional[float]
+    new_info: List[str] = field(default_factory=list)   # 本輪工具帶來變化的觀測鍵
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"round": self.round, "stance": self.stance, "confidence": self.confidence,
+                "new_info": list(self.new_info)}
+
+
+class RoundScheduler:
+    """
+    Decides after each discussion round whether another one is worth an LLM call.
+
+    Stops (stop_reason) when:
+    - "max_rounds": the ceiling was reached;
+    - "converged": the last `stable_rounds` stances agree and the reported confidence
+      (if any) is at least `confident`;
+    - "no_new_info": the stance did not just flip and this round changed no observation
+      (new_info empty). From round 2 on this applies even with tools still pending: they
+      just ran and delivered nothing, and re-asking on identical inputs only echoes the
+      previous summary;
+    - "tools_exhausted": this round changed observations but no tool is left to bring more;
+    - "confident": instead of either of the last two when confidence ≥ `confident`.
+    It asks for another round when the stance just flipped, or when tools are pending
+    and the last round (or the first one) brought new observations.
+    """
+
+    def __init__(self, max_rounds: int = 5, *, min_rounds: int = 1, stable_rounds: int = 2,
+                 confident: float = 0.75):
+        self.max_rounds = max(1, int(max_rounds))
+        self.min_rounds = max(1, min(int(min_rounds), self.max_rounds))
+        self.stable_rounds = max(2, int(stable_rounds))
+        self.confident = float(confident)
+        self.history: List[RoundRecord] = []
+        self.stop_reason: Optional[str] = None
+        self._fp: Dict[str, str] = {}
+
+    def start(self, obs: Mapping[str, Any]) -> None:
+        """Baseline observations before the first round's tool calls."""
+        self._fp = obs_fingerprint(obs)
+
+    def record(self, round_no: int, stance: str, text: str, obs: Mapping[str, Any]) -> RoundRecord:
+        fp = obs_fingerprint(obs)
+        new = sorted(k for k, h in fp.items() if self._fp.get(k) != h)
+        self._fp = fp
+        rec = RoundRecord(round_no, stance, parse_confidence(text), new)
+        self.history.append(rec)
+        return rec
+
+    def should_continue(self, *, pending_info: bool) -> bool:
+        """pending_info: tools could still fill a missing observation next round."""
+        h = self.history
+        n = len(h)
+        if n >= self.max_rounds:
+            return self._stop("max_rounds")
+        if n < self.min_rounds:
+            return True
+        conf = h[-1].confidence
+        tail = [r.stance for r in h[-self.stable_rounds:]]
+        if n >= self.stable_rounds and len(set(tail)) == 1 and (conf is None or conf >= self.confident):
+            return self._stop("converged")
+        if n >= 2 and h[-1].stance != h[-2].stance:
+            return True                         # 立場剛翻轉 → 再確認一輪
+        fresh = bool(h[-1].new_info)
+        if pending_info and (n == 1 or fresh):
+            return True                         # 工具仍在帶來新觀測
+        if conf is not None and conf >= self.confident:
+            return self._stop("confident")
+        return self._stop("tools_exhausted" if fresh else "no_new_info")
+
+    def _stop(self, reason: str) -> bool:
+        self.stop_reason = reason
+        return False
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        return [r.as_dict() for r in self.history]
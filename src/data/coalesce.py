@@ -0,0 +1,91 @@
+# src/data/coalesce.py
+from __future__ import annotations
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Tuple
+import pandas as pd
+from .ohlcv_cache import _slice
+
+FetchFn = Callable[[str, str, str, str, bool], pd.DataFrame]
+Key = Tuple[str, str, bool]  # (symbol, interval, auto_adjust)
+
+
+@dataclass
+class _Entry:
+    start: str
+    end: str
+    df: pd.DataFrame
+    ts: float
+
+
+class RequestCoalescer:
+    """
+    In-process single-flight + short-TTL layer for symbol/window downloads.
+
+    - Concurrent callers for the same (symbol, interval, auto_adjust) wait on one download
+      instead of issuing their own (per-key lock).
+    - Within `ttl_s`, any request whose window lies inside the last download is served by
+      slicing it; an overlapping request downloads only the missing head / tail and merges
+      it in, so both windows are covered afterwards (e.g., ^VIX for the 180d batch + the
+      3mo term check that runs through tomorrow).
+    - An entry's age counts from when its download finished, not when it was requested.
+    """
+
+    def __init__(self, ttl_s: float = 120.0):
+        self.ttl_s = float(ttl_s)
+        self._entries: Dict[Key, _Entry] = {}
+        self._locks: Dict[Key, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lock_for(self, key: Key) -> threading.Lock:
+        with self._guard:
+            lk = self._locks.get(key)
+            if lk is None:
+                lk = self._locks[key] = threading.Lock()
+            return lk
+
+    def get(self, symbol: str, start: str, end: str, interval: str, auto_adjust: bool,
+            fetch: FetchFn) -> pd.DataFrame:
+        key = (symbol, interval, auto_adjust)
+        with self._lock_for(key):
+            now = time.monotonic()
+            e = self._entries.get(key)
+            fresh = e is not None and (now - e.ts) <= self.ttl_s
+            if fresh and e.start <= start and end <= e.end:
+                with self._guard:          # 計數跨 key 共用：per-key lock 保護不了
+                    self.hits += 1
+                return _slice(e.df, start, end).copy()
+
+            with self._guard:
+                self.misses += 1
+            if fresh and not (end < e.start or start > e.end):
+                # 部分重疊：只補缺的頭 / 尾，已快取的部分直接沿用
+                parts = []
+                if start < e.start:
+                    parts.append(fetch(symbol, start, e.start, interval, auto_adjust))
+                parts.append(e.df)
+                if end > e.end:
+                    parts.append(fetch(symbol, e.end, end, interval, auto_adjust))
+                parts = [p for p in parts if p is not None and not p.empty]
+                df = pd.concat(parts) if len(parts) > 1 else parts[0]
+                df = df[~df.index.duplicated(keep="last")].sort_index()
+                # 新舊資料混合：年齡仍以較舊的那次下載計
+                self._entries[key] = _Entry(min(start, e.start), max(end, e.end), df, e.ts)
+                return _slice(df, start, end).copy()
+
+            df = fetch(symbol, start, end, interval, auto_adjust)
+            if df is not None and not df.empty:
+                # 空結果不記：可能只是暫時失敗，下一個呼叫者應重試
+                self._entries[key] = _Entry(start, end, df, time.monotonic())
+            return _slice(df, start, end).copy() if df is not None and not df.empty else df
+
+    def clear(self) -> None:
+        with self._guard:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._guard:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
@@ -0,0 +1,204 @@
+# src/data/ledger.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Union
+import numpy as np
+
+Prices = Union[Mapping[str, float], np.ndarray]
+
+
+class SymbolRegistry:
+    """Stable symbol → column index mapping shared by ledgers and price vectors."""
+
+    def __init__(self, symbols: Iterable[str] = ()):
+        self.symbols: List[str] = []
+        self._idx: Dict[str, int] = {}
+        for s in symbols:
+            self.index(s)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._idx
+
+    def index(self, symbol: str, add: bool = True) -> int:
+        j = self._idx.get(symbol)
+        if j is None:
+            if not add:
+                raise KeyError(symbol)
+            j = self._idx[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return j
+
+    def indices(self, symbols: Iterable[str], add: bool = True) -> np.ndarray:
+        return np.fromiter((self.index(s, add) for s in symbols), dtype=np.int64)
+
+    def vector(self, prices: Mapping[str, float], fill: float = np.nan) -> np.ndarray:
+        """Price dict → array aligned to the registry (symbols without a price get `fill`)."""
+        out = np.full(len(self.symbols), fill, dtype=float)
+        for s, p in prices.items():
+            j = self._idx.get(s)
+            if j is not None and p is not None:
+                out[j] = p
+        return out
+
+
+@dataclass
+class LedgerSnapshot:
+    cash: float
+    realized: float
+    qty: np.ndarray
+    cost: np.ndarray
+
+
+class Ledger:
+    """
+    Array-backed drop-in for data.portfolio.Portfolio.
+
+    Share counts (int64) and cost basis (float64, average-cost) live in arrays indexed by
+    a SymbolRegistry; value()/mark_to_market() are a dot product against a price vector.
+    buy()/sell()/value()/positions keep Portfolio's semantics and errors, buy_many()/
+    sell_many() apply a whole batch of orders at once (all-or-nothing), and
+    snapshot()/restore() copy just the arrays for what-if evaluation.
+    """
+
+    def __init__(self, cash: float = 10000.0, registry: Optional[SymbolRegistry] = None):
+        self.cash = float(cash)
+        self.realized = 0.0
+        self.registry = registry or SymbolRegistry()
+        n = max(len(self.registry), 16)
+        self.qty = np.zeros(n, dtype=np.int64)
+        self.cost = np.zeros(n, dtype=float)
+
+    # ---------- internals ----------
+
+    def _fit(self) -> None:
+        """Grow the arrays after new symbols were registered."""
+        n = len(self.registry)
+        if n <= len(self.qty):
+            return
+        cap = max(n, 2 * len(self.qty))
+        self.qty = np.concatenate([self.qty, np.zeros(cap - len(self.qty), dtype=np.int64)])
+        self.cost = np.concatenate([self.cost, np.zeros(cap - len(self.cost))])
+
+    def _prices(self, prices: Prices) -> np.ndarray:
+        n = len(self.registry)
+        if isinstance(prices, np.ndarray):
+            px = np.asarray(prices, dtype=float)[:n]
+            if len(px) < n:
+                px = np.concatenate([px, np.full(n - len(px), np.nan)])
+        else:
+            px = self.registry.vector(prices)
+        return np.nan_to_num(px, nan=0.0)   # 與 Portfolio 相同：沒有價格的部位以 0 計
+
+    def _orders(self, symbols: Sequence[str], amounts, prices):
+        """Validated (symbols, share counts, prices); registers nothing."""
+        syms = list(symbols)
+        raw = np.asarray(amounts, dtype=float).reshape(-1)
+        px = np.asarray(prices, dtype=float).reshape(-1)
+        if not (len(syms) == len(raw) == len(px)):
+            raise ValueError("symbols, amounts and prices must have the same length")
+        if not np.isfinite(raw).all() or (raw != np.floor(raw)).any():
+            raise ValueError("amounts must be whole shares")      # 不靜默截斷 1.7 → 1
+        if (raw < 0).any():
+            raise ValueError("amounts must be non-negative")
+        return syms, raw.astype(np.int64), px
+
+    def _register(self, symbols: List[str]) -> np.ndarray:
+        """Indices for `symbols`, registering new ones (only after an order passed its checks)."""
+        idx = self.registry.indices(symbols)
+        self._fit()
+        return idx
+
+    # ---------- Portfolio API ----------
+
+    @property
+    def positions(self) -> Dict[str, int]:
+        n = len(self.registry)
+        nz = np.flatnonzero(self.qty[:n])
+        return {self.registry.symbols[j]: int(self.qty[j]) for j in nz}
+
+    def value(self, last_prices: Prices) -> float:
+        return self.cash + self.equity(last_prices)
+
+    def buy(self, symbol: str, amount: int, price: float) -> None:
+        self.buy_many([symbol], [amount], [price])
+
+    def sell(self, symbol: str, amount: int, price: float) -> None:
+        self.sell_many([symbol], [amount], [price])
+
+    # ---------- batched ----------
+
+    def buy_many(self, symbols: Sequence[str], amounts, prices) -> None:
+        """Apply all buys at once; raises (and changes nothing) if cash is insufficient."""
+        syms, amt, px = self._orders(symbols, amounts, prices)
+        notional = amt * px
+        total = float(notional.sum())
+        if total > self.cash:
+            raise ValueError("Insufficient cash")
+        idx = self._register(syms)
+        np.add.at(self.qty, idx, amt)
+        np.add.at(self.cost, idx, notional)
+        self.cash -= total
+
+    def sell_many(self, symbols: Sequence[str], amounts, prices) -> None:
+        """Apply all sells at once; raises (and changes nothing) if any position is too small."""
+        syms, amt, px = self._orders(symbols, amounts, prices)
+        reg = self.registry
+        idx = np.fromiter((reg.index(s, add=False) if s in reg else -1 for s in syms),
+                          dtype=np.int64, count=len(syms))
+        known = idx >= 0
+        if not known.all():
+            if (amt[~known] > 0).any():
+                raise ValueError("Insufficient shares")   # 從未持有：不登記進 registry
+            idx, amt, px = idx[known], amt[known], px[known]
+        want = np.zeros_like(self.qty)
+        np.add.at(want, idx, amt)
+        if (want > self.qty).any():
+            raise ValueError("Insufficient shares")
+        held = self.qty.astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg = np.where(held > 0, self.cost / np.where(held > 0, held, 1.0), 0.0)
+        released = want * avg
+        proceeds = float((amt * px).sum())
+        self.realized += proceeds - float(released.sum())
+        self.cost = np.where(self.qty == want, 0.0, self.cost - released)
+        self.qty -= want
+        self.cash += proceeds
+
+    # ---------- valuation ----------
+
+    def mark_to_market(self, prices: Prices) -> np.ndarray:
+        """Per-symbol market value, aligned to the registry."""
+        n = len(self.registry)
+        return self.qty[:n] * self._prices(prices)
+
+    def equity(self, prices: Prices) -> float:
+        n = len(self.registry)
+        return float(self.qty[:n] @ self._prices(prices))
+
+    def unrealized_pnl(self, prices: Prices) -> np.ndarray:
+        n = len(self.registry)
+        return self.mark_to_market(prices) - self.cost[:n]
+
+    def weights(self, prices: Prices) -> np.ndarray:
+        """Position value / total account value, aligned to the registry."""
+        mv = self.mark_to_market(prices)
+        total = self.cash + float(mv.sum())
+        return mv / total if total else np.zeros_like(mv)
+
+    # ---------- what-if ----------
+
+    def snapshot(self) -> LedgerSnapshot:
+        n = len(self.registry)
+        return LedgerSnapshot(self.cash, self.realized, self.qty[:n].copy(), self.cost[:n].copy())
+
+    def restore(self, snap: LedgerSnapshot) -> None:
+        """Roll back to `snap` (symbols registered since then are reset to flat)."""
+        self._fit()
+        self.qty[:] = 0
+        self.cost[:] = 0.0
+        self.qty[: len(snap.qty)] = snap.qty
+        self.cost[: len(snap.cost)] = snap.cost
+        self.cash, self.realized = snap.cash, snap.realized
@@ -1,48 +1,198 @@
 # src/data/market_data.py
 from __future__ import annotations
-from typing import List, Dict
-import yfinance as yf
+from typing import List, Dict, Optional, Tuple
+from datetime import date, timedelta
+import os
 import pandas as pd
+from .ohlcv_cache import OHLCVCache, DEFAULT_CACHE_ROOT, group_by_missing
+from .providers import (  # noqa: F401  (_normalize_ohlcv/_split_grouped kept importable from here)
+    MarketDataProvider, provider_from_env, _normalize_ohlcv, _split_grouped,
+)
+from .panel import PricePanel
+from .coalesce import RequestCoalescer
 
-def _flatten_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """If yfinance returns MultiIndex columns (e.g., ('Close','^VIX')), flatten to single level."""
-    if isinstance(df.columns, pd.MultiIndex):
-        # Keep first level names: ('Close','^VIX') -> 'Close'
-        df.columns = [str(c[0]) for c in df.columns]
-    return df
+DEFAULT_BATCH_SIZE = 50  # tickers per yf.download request in batched mode
+
+# 本地 OHLCV 快取（AI_TRADER_OHLCV_CACHE=0 可關閉；路徑可用 AI_TRADER_CACHE_DIR 覆蓋）
+_OHLCV_CACHE: Optional[OHLCVCache] = (
+    None if os.getenv("AI_TRADER_OHLCV_CACHE", "1") == "0"
+    else OHLCVCache(os.getenv("AI_TRADER_CACHE_DIR", DEFAULT_CACHE_ROOT))
+)
+
+def set_ohlcv_cache(cache: Optional[OHLCVCache]) -> None:
+    """Swap the process-wide OHLCV cache (None disables caching)."""
+    global _OHLCV_CACHE
+    _OHLCV_CACHE = cache
+
+def get_ohlcv_cache() -> Optional[OHLCVCache]:
+    return _OHLCV_CACHE
+
+# 資料來源（live yfinance / 錄製回放 / 合成 random walk），見 providers.provider_from_env
+_PROVIDER: MarketDataProvider = provider_from_env()
+
+def set_provider(provider: MarketDataProvider) -> None:
+    """Swap the process-wide data provider (clears in-process coalesced results)."""
+    global _PROVIDER
+    _PROVIDER = provider
+    _COALESCER.clear()
+
+def get_provider() -> MarketDataProvider:
+    return _PROVIDER
+
+# 同一輪 cycle 內重複的 symbol/window 請求（典型是 ^VIX）共用一次下載
+_COALESCER = RequestCoalescer(ttl_s=float(os.getenv("AI_TRADER_COALESCE_TTL", "120")))
+
+def get_coalescer() -> RequestCoalescer:
+    return _COALESCER
 
-def _normalize_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+def recent_window(days: int) -> Tuple[str, str]:
+    """[today - days, tomorrow) — a dated stand-in for yfinance period= requests (e.g., '3mo' ≈ 92d)."""
+    today = date.today()
+    return ((today - timedelta(days=days)).isoformat(), (today + timedelta(days=1)).isoformat())
+
+def _active_cache(interval: str) -> Optional[OHLCVCache]:
+    """Disk cache only for live providers (replay/synthetic data must not leak into it)."""
+    cache = _OHLCV_CACHE
+    if cache is None or not _PROVIDER.cacheable or not cache.supports(interval):
+        return None
+    return cache
+
+def _download(symbol: str, start: str, end: str, interval: str = "1d",
+              auto_adjust: bool = False) -> pd.DataFrame:
+    """Raw single-symbol download from the active provider; empty DataFrame when nothing came back."""
+    df = _PROVIDER.history(symbol, start, end, interval=interval, auto_adjust=auto_adjust)
+    return df if df is not None else pd.DataFrame()
+
+def _load_disk(symbol: str, start: str, end: str, interval: str = "1d",
+               auto_adjust: bool = False) -> pd.DataFrame:
+    cache = _active_cache(interval)
+    if cache is None:
+        return _download(symbol, start, end, interval, auto_adjust)
+    return cache.get(symbol, start, end, interval, auto_adjust, fetch=_download)
+
+def load_bars(symbol: str, start: str, end: str, interval: str = "1d",
+              auto_adjust: bool = False, use_cache: bool = True) -> pd.DataFrame:
     """
-    Normalize yfinance columns capitalization:
-    (open, high, low, close, adj close, volume) -> (Open, High, Low, Close, Adj Close, Volume)
+    Single-symbol bars: in-process coalescing (single-flight + TTL) → on-disk cache → network.
+    use_cache=False goes straight to the network.
     """
-    if df is None or df.empty:
-        return df
-    df = _flatten_columns(df)
-    return df.rename(columns=str.title)
+    if not use_cache:
+        return _download(symbol, start, end, interval, auto_adjust)
+    return _COALESCER.get(symbol, start, end, interval, auto_adjust, fetch=_load_disk)
 
 def get_stock_price(symbol: str, start: str, end: str, interval: str = "1d",
-                    auto_adjust: bool = False) -> pd.DataFrame:
+                    auto_adjust: bool = False, use_cache: bool = True) -> pd.DataFrame:
     """
-    Download OHLCV for a single symbol from yfinance.
+    Download OHLCV for a single symbol from the active provider (yfinance by default),
+    served from the local cache when possible.
     Returns columns: Open, High, Low, Close, Adj Close, Volume
     """
-    df = yf.download(
-        symbol, start=start, end=end, interval=interval,
-        progress=False, auto_adjust=auto_adjust, group_by="column"
-    )
+    df = load_bars(symbol, start, end, interval=interval, auto_adjust=auto_adjust, use_cache=use_cache)
     if df is None or df.empty:
         raise ValueError(f"No data for {symbol} in {start}~{end} (interval={interval})")
-    return _normalize_ohlcv(df)
+    return df
+
+_BATCH_FAILED = "batch download failed"
+
+def _download_batched(symbols: List[str], start: str, end: str, interval: str,
+                      auto_adjust: bool, batch_size: int,
+                      failures: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+    """Chunked multi-ticker download; symbols without data are recorded in `failures`."""
+    out: Dict[str, pd.DataFrame] = {}
+    for i in range(0, len(symbols), batch_size):
+        chunk = symbols[i:i + batch_size]
+        try:
+            got = _PROVIDER.download(chunk, start, end, interval=interval, auto_adjust=auto_adjust)
+        except Exception as e:
+            for s in chunk:
+                failures[s] = f"{_BATCH_FAILED}: {e!r}"
+            continue
+        out.update(got)
+        for s in chunk:
+            if s not in got:
+                failures[s] = f"No data for {s} in {start}~{end} (interval={interval})"
+    return out
 
 def get_multi_prices(symbols: List[str], start: str, end: str, interval: str = "1d",
-                     auto_adjust: bool = False) -> Dict[str, pd.DataFrame]:
-    """Download multiple symbols; returns {symbol: DataFrame}."""
+                     auto_adjust: bool = False, batch_size: int = DEFAULT_BATCH_SIZE,
+                     failures: Optional[Dict[str, str]] = None,
+                     use_cache: bool = True,
+                     panel_dir: Optional[str] = None,
+                     compact: bool = False) -> Dict[str, pd.DataFrame]:
+    """
+    Download multiple symbols; returns {symbol: DataFrame}.
+
+    batch_size > 1 pulls up to `batch_size` tickers per yf.download request and splits
+    the grouped result back per symbol. Symbols without data are skipped (not raised)
+    and, if `failures` is given, recorded there as {symbol: reason}.
+    batch_size <= 1 keeps the one-request-per-symbol path (raises on the first failure).
+
+    With the OHLCV cache enabled, symbols are grouped by their missing windows and only
+    those windows are batch-downloaded (a daily re-run moves one new bar per symbol).
+
+    panel_dir: read from / build a memory-mapped PricePanel there (see get_price_panel).
+    compact: with panel_dir, build the panel as float32 prices / int64 volume.
+    """
+    if panel_dir is not None:
+        panel = get_price_panel(symbols, start, end, panel_dir, interval=interval,
+                                auto_adjust=auto_adjust, batch_size=batch_size,
+                                failures=failures, use_cache=use_cache, compact=compact)
+        return panel.to_frames(list(dict.fromkeys(symbols)), start, end)
+
     out: Dict[str, pd.DataFrame] = {}
-    for s in symbols:
-        out[s] = get_stock_price(s, start, end, interval=interval, auto_adjust=auto_adjust)
+    if batch_size <= 1:
+        for s in symbols:
+            out[s] = get_stock_price(s, start, end, interval=interval,
+                                     auto_adjust=auto_adjust, use_cache=use_cache)
+        return out
+
+    errs: Dict[str, str] = {}
+    uniq = list(dict.fromkeys(symbols))
+    cache = _active_cache(interval) if use_cache else None
+    if cache is None:
+        out = _download_batched(uniq, start, end, interval, auto_adjust, batch_size, errs)
+    else:
+        for windows, group in group_by_missing(cache, uniq, start, end, interval, auto_adjust).items():
+            for ws, we in windows:
+                fails: Dict[str, str] = {}
+                got = _download_batched(group, ws, we, interval, auto_adjust, batch_size, fails)
+                for s in group:
+                    if s in got:
+                        cache.merge(s, got[s], ws, we, interval=interval, auto_adjust=auto_adjust)
+                    elif not fails.get(s, "").startswith(_BATCH_FAILED):
+                        # 請求成功但沒有 bar（上市前 / 假日）：記為已覆蓋，不再重抓
+                        cache.merge(s, pd.DataFrame(), ws, we, interval=interval, auto_adjust=auto_adjust)
+            for s in group:
+                df = cache.load(s, start, end, interval, auto_adjust)
+                if df.empty:
+                    errs[s] = f"No data for {s} in {start}~{end} (interval={interval})"
+                else:
+                    out[s] = df
+    if failures is not None:
+        failures.update(errs)
     return out
 
+def get_price_panel(symbols: List[str], start: str, end: str, panel_dir: str,
+                    interval: str = "1d", auto_adjust: bool = False,
+                    batch_size: int = DEFAULT_BATCH_SIZE,
+                    failures: Optional[Dict[str, str]] = None,
+                    use_cache: bool = True, compact: bool = False) -> PricePanel:
+    """
+    Return an aligned dates × symbols PricePanel for the window.
+    Reuses (memory-maps) the panel saved in `panel_dir` when it already covers the
+    symbols and window; otherwise downloads, builds and saves it there first
+    (compact=True → float32 prices / int64 volume, see PricePanel.from_frames).
+    """
+    uniq = list(dict.fromkeys(symbols))
+    if PricePanel.exists(panel_dir):
+        panel = PricePanel.load(panel_dir)
+        if panel.covers(uniq, start, end):
+            return panel
+    frames = get_multi_prices(uniq, start, end, interval=interval, auto_adjust=auto_adjust,
+                              batch_size=batch_size, failures=failures, use_cache=use_cache)
+    PricePanel.from_frames(frames, uniq, compact=compact, start=start, end=end).save(panel_dir)
+    return PricePanel.load(panel_dir)
+
 # ---------------- VIX helpers ----------------
 
 def get_vix(start: str, end: str, interval: str = "1d",
@@ -50,11 +200,10 @@ def get_vix(start: str, end: str, interval: str = "1d",
     """
     Fetch CBOE VIX (^VIX) OHLCV from yfinance and return DataFrame with standard columns.
     """
-    df = yf.download("^VIX", start=start, end=end, interval=interval,
-                     progress=False, auto_adjust=auto_adjust, group_by="column")
+    df = load_bars("^VIX", start, end, interval=interval, auto_adjust=auto_adjust)
     if df is None or df.empty:
         raise ValueError(f"No VIX data in {start}~{end} (interval={interval})")
-    return _normalize_ohlcv(df)
+    return df
 
 def get_vix_close(start: str, end: str, interval: str = "1d",
                   auto_adjust: bool = False) -> pd.Series:
@@ -64,6 +213,14 @@ def get_vix_close(start: str, end: str, interval: str = "1d",
     df = get_vix(start, end, interval=interval, auto_adjust=auto_adjust)
     return df["Close"].copy()
 
+def get_vix3m_close(start: str, end: str, interval: str = "1d",
+                    auto_adjust: bool = False) -> pd.Series:
+    """Close series of ^VIX3M (3-month VIX) for the window; used for the term ratio."""
+    df = load_bars("^VIX3M", start, end, interval=interval, auto_adjust=auto_adjust)
+    if df is None or df.empty:
+        raise ValueError(f"No VIX3M data in {start}~{end} (interval={interval})")
+    return df["Close"].copy()
+
 # ---------------- Optional convenience ----------------
 
 def get_latest_close(symbol: str, start: str, end: str, interval: str = "1d",
@@ -78,16 +235,15 @@ def get_vix_smart(start: str, end: str, interval: str = "1d", auto_adjust: bool
     """
     Try normal ^VIX fetch; if empty, fallback to recent period=3mo.
     """
-    df = yf.download("^VIX", start=start, end=end, interval=interval,
-                     progress=False, auto_adjust=auto_adjust, group_by="column")
+    df = load_bars("^VIX", start, end, interval=interval, auto_adjust=auto_adjust)
     if df is not None and not df.empty:
-        return df.rename(columns=str.title)
+        return df
     # fallback: last 3 months
-    df2 = yf.download("^VIX", period="3mo", interval=interval,
-                      progress=False, auto_adjust=auto_adjust, group_by="column")
+    s3, e3 = recent_window(92)
+    df2 = load_bars("^VIX", s3, e3, interval=interval, auto_adjust=auto_adjust)
     if df2 is None or df2.empty:
         raise ValueError("VIX data unavailable (both window and 3mo fallback failed).")
-    return df2.rename(columns=str.title)
+    return df2
 
 def get_vix_close_smart(start: str, end: str, interval: str = "1d", auto_adjust: bool = False) -> pd.Series:
     """
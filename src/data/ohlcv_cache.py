@@ -0,0 +1,207 @@
+# src/data/ohlcv_cache.py
+from __future__ import annotations
+import json
+import re
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+
+# Parquet 需要 pyarrow；沒裝就退回 pickle（同樣保留 dtype / index）
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PARQUET = True
+except Exception:
+    _HAS_PARQUET = False
+
+DEFAULT_CACHE_ROOT = "data/cache/ohlcv"
+
+# 只快取日線以上：舊 bar 不會再變，intraday 的 tz-aware index 也不適合這種覆蓋區間邏輯
+CACHEABLE_INTERVALS = {"1d", "5d", "1wk", "1mo", "3mo"}
+
+Window = Tuple[str, str]
+FetchFn = Callable[[str, str, str, str, bool], pd.DataFrame]
+
+
+def _safe_name(symbol: str) -> str:
+    """'^VIX' -> '_VIX', 'BRK.B' -> 'BRK.B' (filesystem-safe)."""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", symbol)
+
+
+def _naive_index(df: pd.DataFrame) -> pd.DatetimeIndex:
+    idx = pd.DatetimeIndex(df.index)
+    return idx.tz_localize(None) if idx.tz is not None else idx
+
+
+def _slice(df: pd.DataFrame, start: str, end: str) -> pd.DataFrame:
+    """Rows with start <= date < end (yfinance 'end' is exclusive)."""
+    if df is None or df.empty:
+        return df
+    idx = _naive_index(df)
+    mask = (idx >= pd.Timestamp(start)) & (idx < pd.Timestamp(end))
+    return df.loc[mask]
+
+
+class OHLCVCache:
+    """
+    Local columnar OHLCV cache: one file per (symbol, interval, adjusted) under `root`.
+
+    A JSON sidecar records the requested window [start, end) the file covers, so a later
+    request only downloads the missing head/tail and merges it in. The covered end is
+    clamped to today: today's (possibly partial) bar is always re-fetched next time.
+    Adjusted prices change retroactively on splits/dividends -> call `invalidate()`.
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_CACHE_ROOT):
+        self.root = Path(root)
+
+    # ---------- paths / io ----------
+
+    def _stem(self, symbol: str, interval: str, auto_adjust: bool) -> Path:
+        adj = "adj" if auto_adjust else "raw"
+        return self.root / f"{_safe_name(symbol)}_{interval}_{adj}"
+
+    def _data_path(self, stem: Path) -> Path:
+        return stem.with_suffix(".parquet" if _HAS_PARQUET else ".pkl")
+
+    def _meta_path(self, stem: Path) -> Path:
+        return stem.with_suffix(".json")
+
+    def supports(self, interval: str) -> bool:
+        return interval in CACHEABLE_INTERVALS
+
+    def _read(self, symbol: str, interval: str, auto_adjust: bool) -> Tuple[Optional[pd.DataFrame], Optional[dict]]:
+        stem = self._stem(symbol, interval, auto_adjust)
+        fp, mp = self._data_path(stem), self._meta_path(stem)
+        if not fp.exists() or not mp.exists():
+            return None, None
+        try:
+            df = pd.read_parquet(fp) if fp.suffix == ".parquet" else pd.read_pickle(fp)
+            meta = json.loads(mp.read_text(encoding="utf-8"))
+        except Exception:
+            # 壞檔直接當 miss，下次寫入會覆蓋
+            return None, None
+        return df, meta
+
+    def _write(self, symbol: str, interval: str, auto_adjust: bool, df: pd.DataFrame, meta: dict) -> None:
+        stem = self._stem(symbol, interval, auto_adjust)
+        self.root.mkdir(parents=True, exist_ok=True)
+        fp, mp = self._data_path(stem), self._meta_path(stem)
+        tmp = fp.with_name(fp.name + ".tmp")
+        if fp.suffix == ".parquet":
+            df.to_parquet(tmp)
+        else:
+            df.to_pickle(tmp)
+        tmp.replace(fp)
+        # meta 同樣先寫暫存再 replace：讀者看不到寫一半的覆蓋區間
+        mtmp = mp.with_name(mp.name + ".tmp")
+        mtmp.write_text(json.dumps(meta), encoding="utf-8")
+        mtmp.replace(mp)
+
+    # ---------- public API ----------
+
+    def missing(self, symbol: str, start: str, end: str, interval: str = "1d",
+                auto_adjust: bool = False) -> List[Window]:
+        """Return the windows that must be downloaded to serve [start, end)."""
+        if start >= end:
+            return []
+        _, meta = self._read(symbol, interval, auto_adjust)
+        if meta is None:
+            return [(start, end)]
+        cs, ce = meta["start"], meta["end"]
+        out: List[Window] = []
+        # 保持覆蓋區間連續：head/tail 缺口直接補到既有區間邊界
+        if start < cs:
+            out.append((start, cs))
+        if end > ce:
+            out.append((ce, end))
+        return out
+
+    def merge(self, symbol: str, df: pd.DataFrame, start: str, end: str,
+              interval: str = "1d", auto_adjust: bool = False) -> None:
+        """
+        Merge freshly downloaded bars for window [start, end) into the cache file.
+        df=None means the download failed (coverage unchanged); an empty frame means the
+        window has no bars (pre-listing head, holiday tail) and is recorded as covered.
+        """
+        if df is None:
+            return
+        old, meta = self._read(symbol, interval, auto_adjust)
+        today = date.today().isoformat()
+        end = min(end, today)
+        if old is not None and meta is not None:
+            if df.empty:
+                merged = old
+            elif old.empty:
+                merged = df.sort_index()
+            else:
+                merged = pd.concat([old, df])
+                merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            start, end = min(start, meta["start"]), max(end, meta["end"])
+        elif start >= end:
+            return                              # 只有今天以後的區間：沒有可記錄的覆蓋
+        else:
+            merged = df.sort_index()
+        self._write(symbol, interval, auto_adjust, merged, {
+            "symbol": symbol, "interval": interval, "auto_adjust": auto_adjust,
+            "start": start, "end": end,
+        })
+
+    def load(self, symbol: str, start: str, end: str, interval: str = "1d",
+             auto_adjust: bool = False) -> pd.DataFrame:
+        """Return cached bars in [start, end) (empty DataFrame on miss)."""
+        df, _ = self._read(symbol, interval, auto_adjust)
+        if df is None:
+            return pd.DataFrame()
+        return _slice(df, start, end)
+
+    def get(self, symbol: str, start: str, end: str, interval: str, auto_adjust: bool,
+            fetch: FetchFn) -> pd.DataFrame:
+        """
+        Serve [start, end) from cache, downloading only the missing windows via
+        fetch(symbol, start, end, interval, auto_adjust).
+        """
+        got = []
+        for ws, we in self.missing(symbol, start, end, interval, auto_adjust):
+            df = fetch(symbol, ws, we, interval, auto_adjust)
+            self.merge(symbol, df, ws, we, interval=interval, auto_adjust=auto_adjust)
+            if df is not None and not df.empty:
+                got.append(df)
+        cached = self.load(symbol, start, end, interval, auto_adjust)
+        if cached.empty and got:
+            # 快取讀不回來（例如壞檔）時，用剛下載的資料，不再重抓一次
+            df = pd.concat(got) if len(got) > 1 else got[0]
+            return _slice(df[~df.index.duplicated(keep="last")].sort_index(), start, end)
+        return cached
+
+    def invalidate(self, symbol: Optional[str] = None, interval: Optional[str] = None,
+                   auto_adjust: Optional[bool] = None) -> int:
+        """
+        Drop cached files (e.g., after a split/dividend changed adjusted history).
+        None acts as a wildcard. Returns the number of (symbol, interval) entries removed.
+        """
+        if not self.root.exists():
+            return 0
+        sym = _safe_name(symbol) if symbol is not None else "*"
+        itv = interval or "*"
+        adj = "*" if auto_adjust is None else ("adj" if auto_adjust else "raw")
+        removed = 0
+        for mp in self.root.glob(f"{sym}_{itv}_{adj}.json"):
+            for p in (mp, mp.with_suffix(".parquet"), mp.with_suffix(".pkl")):
+                if p.exists():
+                    p.unlink()
+            removed += 1
+        return removed
+
+
+def group_by_missing(cache: OHLCVCache, symbols: List[str], start: str, end: str,
+                     interval: str = "1d", auto_adjust: bool = False) -> Dict[Tuple[Window, ...], List[str]]:
+    """
+    Group symbols by their missing windows so one batched request can serve them all
+    (a daily run typically puts the whole universe under the same one-bar tail).
+    """
+    groups: Dict[Tuple[Window, ...], List[str]] = {}
+    for s in symbols:
+        key = tuple(cache.missing(s, start, end, interval, auto_adjust))
+        groups.setdefault(key, []).append(s)
+    return groups
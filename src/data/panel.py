@@ -0,0 +1,197 @@
+# src/data/panel.py
+from __future__ import annotations
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+@dataclass
+class PricePanel:
+    """
+    Aligned universe store: one dates × symbols array per field on a shared trading-date index.
+
+    Saved as plain .npy files (one per field) + meta.json; `load(mmap=True)` maps them
+    read-only, so several processes can share the same pages without copying.
+    Missing bars (not listed yet / halted / failed download) are NaN.
+
+    Each save writes a new generation ({field}.{gen}.npy) and then commits it by replacing
+    meta.json, so load() always sees arrays and metadata from the same save.
+    """
+    dates: np.ndarray                 # datetime64[ns], shape (T,)
+    symbols: List[str]
+    fields: Dict[str, np.ndarray]     # field -> (T, N)
+    start: Optional[str] = None       # requested window [start, end) the panel was built for
+    end: Optional[str] = None
+    _cols: Dict[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._cols = {s: j for j, s in enumerate(self.symbols)}
+
+    # ---------- build ----------
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], symbols: Optional[Sequence[str]] = None,
+                    *, fields: Sequence[str] = FIELDS, dtype=np.float64, compact: bool = False,
+                    start: Optional[str] = None, end: Optional[str] = None) -> "PricePanel":
+        """
+        Align {symbol: OHLCV DataFrame} onto the union of their dates.
+        compact=True stores prices as float32 and Volume as int64 (missing → 0), about half
+        the footprint; see tools/compact.py for the tolerances this implies.
+        """
+        syms = list(symbols) if symbols is not None else list(frames.keys())
+        idx = pd.DatetimeIndex([])
+        for s in syms:
+            df = frames.get(s)
+            if df is not None and not df.empty:
+                idx = idx.union(_naive(df.index))
+        if compact:
+            dtype = np.float32
+        out = {f: np.full((len(idx), len(syms)), np.nan, dtype=dtype) for f in fields}
+        for j, s in enumerate(syms):
+            df = frames.get(s)
+            if df is None or df.empty:
+                continue
+            pos = idx.get_indexer(_naive(df.index))
+            for f in fields:
+                if f in df.columns:
+                    out[f][pos, j] = df[f].to_numpy(dtype=dtype, na_value=np.nan)
+        if compact and "Volume" in out:
+            out["Volume"] = np.nan_to_num(out["Volume"], nan=0.0).astype(np.int64)
+        return cls(dates=idx.to_numpy(dtype="datetime64[ns]"), symbols=syms, fields=out,
+                   start=start, end=end)
+
+    # ---------- persistence ----------
+
+    def save(self, root: str | Path) -> Path:
+        """
+        Write dates / {field} arrays as a new generation under `root`, then commit it by
+        atomically replacing meta.json (the only file readers start from). The previous
+        generation is kept for readers that already read the old meta.json; older ones
+        are removed (processes that mapped them keep their pages).
+        """
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        prev = _read_meta(root)
+        keep = {_generation(prev)} if prev is not None else set()
+        gen = f"{time.time_ns():x}{os.getpid():x}"
+
+        def _put(name: str, arr: np.ndarray) -> None:
+            tmp = root / f".{name}.{gen}.tmp.npy"
+            np.save(tmp, np.ascontiguousarray(arr))
+            os.replace(tmp, root / f"{name}.{gen}.npy")
+
+        _put("dates", self.dates.astype("datetime64[ns]"))
+        for f, arr in self.fields.items():
+            _put(f, arr)
+        meta = {"generation": gen, "symbols": self.symbols, "fields": list(self.fields.keys()),
+                "shape": [len(self.dates), len(self.symbols)], "start": self.start, "end": self.end}
+        tmp = root / f".meta.{gen}.tmp.json"
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, root / "meta.json")
+
+        keep.add(gen)
+        for p in root.glob("*.npy"):
+            if not p.name.startswith(".") and _file_generation(p) not in keep:   # .tmp：他人寫入中
+                p.unlink(missing_ok=True)
+        return root
+
+    @classmethod
+    def load(cls, root: str | Path, mmap: bool = True, *, retries: int = 3) -> "PricePanel":
+        """
+        Load a saved panel; with mmap=True arrays are read-only np.memmap views.
+        Arrays are those of the generation named in meta.json and are checked against
+        its shape; if a concurrent save pruned that generation meanwhile, meta.json is re-read.
+        """
+        root = Path(root)
+        for attempt in range(max(1, retries)):
+            meta = _read_meta(root)
+            if meta is None:
+                raise FileNotFoundError(root / "meta.json")
+            gen = _generation(meta)
+            sfx = f".{gen}" if gen else ""
+            mode = "r" if mmap else None
+            try:
+                dates = np.load(root / f"dates{sfx}.npy", mmap_mode=mode)
+                fields = {f: np.load(root / f"{f}{sfx}.npy", mmap_mode=mode) for f in meta["fields"]}
+            except FileNotFoundError:
+                if attempt + 1 >= retries:
+                    raise
+                continue
+            shape = (len(dates), len(meta["symbols"]))
+            if tuple(meta.get("shape") or shape) != shape or any(a.shape != shape for a in fields.values()):
+                raise ValueError(f"inconsistent price panel in {root} (generation {gen or 'legacy'})")
+            return cls(dates=dates, symbols=list(meta["symbols"]), fields=fields,
+                       start=meta.get("start"), end=meta.get("end"))
+        raise FileNotFoundError(root / "meta.json")
+
+    @staticmethod
+    def exists(root: str | Path) -> bool:
+        return (Path(root) / "meta.json").exists()
+
+    # ---------- read ----------
+
+    def col(self, symbol: str) -> int:
+        try:
+            return self._cols[symbol]
+        except KeyError:
+            raise ValueError(f"{symbol!r} is not in the panel") from None
+
+    def covers(self, symbols: Sequence[str], start: str, end: str) -> bool:
+        """True if the panel was built for a window containing [start, end) and has all symbols."""
+        if self.start is None or self.end is None:
+            return False
+        have = set(self.symbols)
+        return self.start <= start and end <= self.end and all(s in have for s in symbols)
+
+    def window(self, start: Optional[str] = None, end: Optional[str] = None) -> "PricePanel":
+        """Date slice [start, end) as views (no copy for mmap-backed panels)."""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start)))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end)))
+        return PricePanel(dates=self.dates[lo:hi], symbols=self.symbols,
+                          fields={f: a[lo:hi] for f, a in self.fields.items()},
+                          start=start or self.start, end=end or self.end)
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """Per-symbol OHLCV DataFrame (rows without a Close are dropped)."""
+        j = self.col(symbol)
+        data = {f: np.asarray(a[:, j]) for f, a in self.fields.items()}
+        df = pd.DataFrame(data, index=pd.DatetimeIndex(self.dates, name="Date"))
+        if "Close" in df.columns:
+            df = df[df["Close"].notna()]
+        return df
+
+    def to_frames(self, symbols: Optional[Sequence[str]] = None, start: Optional[str] = None,
+                  end: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """Back to the {symbol: DataFrame} shape used by get_multi_prices."""
+        p = self.window(start, end) if (start or end) else self
+        out: Dict[str, pd.DataFrame] = {}
+        for s in (symbols if symbols is not None else p.symbols):
+            df = p.frame(s)
+            if not df.empty:
+                out[s] = df
+        return out
+
+
+def _read_meta(root: Path) -> Optional[dict]:
+    try:
+        return json.loads((root / "meta.json").read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+def _generation(meta: dict) -> str:
+    return str(meta.get("generation") or "")      # "" = 舊格式（{field}.npy，無世代後綴）
+
+def _file_generation(p: Path) -> str:
+    parts = p.name.split(".")                     # {name}.{gen}.npy / {name}.npy
+    return parts[1] if len(parts) == 3 else ""
+
+def _naive(idx) -> pd.DatetimeIndex:
+    idx = pd.DatetimeIndex(idx)
+    return idx.tz_localize(None) if idx.tz is not None else idx
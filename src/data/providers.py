@@ -0,0 +1,266 @@
+# src/data/providers.py
+from __future__ import annotations
+import os
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+from .ohlcv_cache import _safe_name, _slice
+from .panel import PricePanel
+
+# ---------------- yfinance frame helpers ----------------
+
+def _flatten_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """If yfinance returns MultiIndex columns (e.g., ('Close','^VIX')), flatten to single level."""
+    if isinstance(df.columns, pd.MultiIndex):
+        # Keep first level names: ('Close','^VIX') -> 'Close'
+        df.columns = [str(c[0]) for c in df.columns]
+    return df
+
+def _normalize_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize yfinance columns capitalization:
+    (open, high, low, close, adj close, volume) -> (Open, High, Low, Close, Adj Close, Volume)
+    """
+    if df is None or df.empty:
+        return df
+    df = _flatten_columns(df)
+    return df.rename(columns=str.title)
+
+def _split_grouped(df: pd.DataFrame, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Split a multi-ticker yfinance frame (group_by="ticker") back into {symbol: DataFrame}.
+    Symbols that came back empty / all-NaN are left out.
+    """
+    out: Dict[str, pd.DataFrame] = {}
+    if df is None or df.empty:
+        return out
+    if not isinstance(df.columns, pd.MultiIndex):
+        # single ticker without ticker level
+        if len(symbols) == 1:
+            sub = df.dropna(how="all")
+            if not sub.empty:
+                out[symbols[0]] = _normalize_ohlcv(sub)
+        return out
+    tickers = set(df.columns.get_level_values(0))
+    for s in symbols:
+        if s not in tickers:
+            continue
+        sub = df[s].dropna(how="all")
+        if not sub.empty:
+            out[s] = _normalize_ohlcv(sub.copy())
+    return out
+
+# ---------------- provider interface ----------------
+
+class MarketDataProvider(ABC):
+    """
+    Source of OHLCV bars for the data layer (market_data builds on whichever is active).
+    Windows are [start, end) like yfinance; missing symbols are simply absent / empty.
+    """
+    name = "base"
+    cacheable = False  # True → market_data may persist results in the on-disk OHLCV cache
+
+    def download(self, symbols: List[str], start: str, end: str, interval: str = "1d",
+                 auto_adjust: bool = False) -> Dict[str, pd.DataFrame]:
+        """Many symbols in one call → {symbol: DataFrame}."""
+        out: Dict[str, pd.DataFrame] = {}
+        for s in symbols:
+            df = self.history(s, start, end, interval, auto_adjust)
+            if df is not None and not df.empty:
+                out[s] = df
+        return out
+
+    @abstractmethod
+    def history(self, symbol: str, start: str, end: str, interval: str = "1d",
+                auto_adjust: bool = False) -> pd.DataFrame:
+        """One symbol → DataFrame (Open, High, Low, Close, Adj Close, Volume); empty if none."""
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live Yahoo Finance backend."""
+    name = "yfinance"
+    cacheable = True
+
+    def download(self, symbols: List[str], start: str, end: str, interval: str = "1d",
+                 auto_adjust: bool = False) -> Dict[str, pd.DataFrame]:
+        import yfinance as yf
+        df = yf.download(
+            symbols, start=start, end=end, interval=interval,
+            progress=False, auto_adjust=auto_adjust, group_by="ticker", threads=True
+        )
+        return _split_grouped(df, symbols)
+
+    def history(self, symbol: str, start: str, end: str, interval: str = "1d",
+                auto_adjust: bool = False) -> pd.DataFrame:
+        import yfinance as yf
+        df = yf.download(
+            symbol, start=start, end=end, interval=interval,
+            progress=False, auto_adjust=auto_adjust, group_by="column"
+        )
+        if df is None or df.empty:
+            return pd.DataFrame()
+        return _normalize_ohlcv(df)
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Offline backend over recorded fixtures: one CSV per (symbol, interval, adjusted) in `root`,
+    e.g. fixtures/AAPL_1d_raw.csv. Use RecordingProvider to capture them from a live run.
+    """
+    name = "replay"
+
+    def __init__(self, root: str | Path = "data/fixtures/market"):
+        self.root = Path(root)
+
+    def path_for(self, symbol: str, interval: str = "1d", auto_adjust: bool = False) -> Path:
+        adj = "adj" if auto_adjust else "raw"
+        return self.root / f"{_safe_name(symbol)}_{interval}_{adj}.csv"
+
+    def history(self, symbol: str, start: str, end: str, interval: str = "1d",
+                auto_adjust: bool = False) -> pd.DataFrame:
+        fp = self.path_for(symbol, interval, auto_adjust)
+        if not fp.exists():
+            return pd.DataFrame()
+        df = pd.read_csv(fp, index_col=0, parse_dates=True)
+        df.index.name = "Date"
+        return _slice(df, start, end)
+
+    def write(self, symbol: str, df: pd.DataFrame, interval: str = "1d",
+              auto_adjust: bool = False) -> None:
+        """Merge bars into the fixture file for `symbol`."""
+        if df is None or df.empty:
+            return
+        fp = self.path_for(symbol, interval, auto_adjust)
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        if fp.exists():
+            old = pd.read_csv(fp, index_col=0, parse_dates=True)
+            df = pd.concat([old, df])
+            df = df[~df.index.duplicated(keep="last")]
+        df.sort_index().to_csv(fp, index_label="Date")
+
+
+class RecordingProvider(MarketDataProvider):
+    """Pass-through to `inner` that also records every result as a ReplayProvider fixture."""
+    name = "recording"
+
+    def __init__(self, inner: MarketDataProvider, root: str | Path = "data/fixtures/market"):
+        self.inner = inner
+        self.sink = ReplayProvider(root)
+        self.cacheable = inner.cacheable
+
+    def download(self, symbols: List[str], start: str, end: str, interval: str = "1d",
+                 auto_adjust: bool = False) -> Dict[str, pd.DataFrame]:
+        out = self.inner.download(symbols, start, end, interval, auto_adjust)
+        for s, df in out.items():
+            self.sink.write(s, df, interval, auto_adjust)
+        return out
+
+    def history(self, symbol: str, start: str, end: str, interval: str = "1d",
+                auto_adjust: bool = False) -> pd.DataFrame:
+        df = self.inner.history(symbol, start, end, interval, auto_adjust)
+        self.sink.write(symbol, df, interval, auto_adjust)
+        return df
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Seeded random-walk bars for any symbol (business days only), for benchmarks / CI.
+
+    Each symbol's path is generated from a fixed epoch with an RNG seeded by (seed, symbol),
+    so overlapping windows always agree and results are identical across runs/processes.
+    Symbols starting with '^VIX' follow a mean-reverting level (~18) instead of a walk.
+    """
+    name = "synthetic"
+    EPOCH = "2000-01-03"
+
+    def __init__(self, seed: int = 0, daily_vol: float = 0.02, drift: float = 0.0003):
+        self.seed = int(seed)
+        self.daily_vol = float(daily_vol)
+        self.drift = float(drift)
+
+    def _rng(self, symbol: str) -> np.random.Generator:
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.encode("utf-8"))])
+
+    def history(self, symbol: str, start: str, end: str, interval: str = "1d",
+                auto_adjust: bool = False) -> pd.DataFrame:
+        if interval != "1d":
+            return pd.DataFrame()
+        last = pd.Timestamp(end) - pd.Timedelta(days=1)
+        if last < pd.Timestamp(start) or last < pd.Timestamp(self.EPOCH):
+            return pd.DataFrame()
+        # 等同 bdate_range（週一至週五），但整段向量化，長區間快很多
+        days = pd.date_range(self.EPOCH, last, freq="D", name="Date")
+        idx = days[days.dayofweek < 5]
+        n = len(idx)
+        rng = self._rng(symbol)
+        # 先抽 p0，再逐列抽 shocks：前綴列與視窗長度無關 → 重疊視窗的數值一致
+        p0 = 20.0 + 480.0 * rng.random()
+        shocks = rng.standard_normal((n, 5))
+
+        if symbol.upper().startswith("^VIX"):
+            close = np.empty(n)
+            lvl = 18.0
+            for i in range(n):
+                lvl = max(9.0, lvl + 0.05 * (18.0 - lvl) + 1.2 * shocks[i, 0])
+                close[i] = lvl
+            volume = np.zeros(n)
+        else:
+            rets = self.drift + self.daily_vol * shocks[:, 0]
+            close = p0 * np.exp(np.cumsum(rets))
+            volume = np.round(np.exp(15.0 + 0.5 * shocks[:, 4]))
+
+        prev = np.concatenate([[close[0]], close[:-1]])
+        open_ = prev * (1.0 + 0.25 * self.daily_vol * shocks[:, 1])
+        high = np.maximum(open_, close) * (1.0 + 0.5 * self.daily_vol * np.abs(shocks[:, 2]))
+        low = np.minimum(open_, close) * (1.0 - 0.5 * self.daily_vol * np.abs(shocks[:, 3]))
+        df = pd.DataFrame({
+            "Open": open_, "High": high, "Low": low, "Close": close,
+            "Adj Close": close, "Volume": volume,
+        }, index=idx)
+        return _slice(df, start, end)
+
+
+class PanelProvider(MarketDataProvider):
+    """
+    Serves daily bars from a PricePanel (typically memory-mapped from disk), so several
+    worker processes share one read-only copy of the prices instead of downloading.
+    Symbols not in the panel come back empty.
+    """
+    name = "panel"
+
+    def __init__(self, panel: PricePanel):
+        self.panel = panel
+        self._have = set(panel.symbols)
+
+    @classmethod
+    def from_dir(cls, root: str | Path, mmap: bool = True) -> "PanelProvider":
+        return cls(PricePanel.load(root, mmap=mmap))
+
+    def history(self, symbol: str, start: str, end: str, interval: str = "1d",
+                auto_adjust: bool = False) -> pd.DataFrame:
+        if interval != "1d" or symbol not in self._have:
+            return pd.DataFrame()
+        return _slice(self.panel.frame(symbol), start, end)
+
+
+def provider_from_env(name: Optional[str] = None, *, root: Optional[str] = None,
+                      seed: Optional[int] = None) -> MarketDataProvider:
+    """
+    Build a provider by name: 'yfinance' (default) | 'replay' | 'synthetic' | 'panel'.
+    Env: AI_TRADER_DATA_PROVIDER, AI_TRADER_FIXTURES_DIR, AI_TRADER_SYNTHETIC_SEED,
+    AI_TRADER_PANEL_DIR.
+    """
+    name = (name or os.getenv("AI_TRADER_DATA_PROVIDER", "yfinance")).strip().lower()
+    if name == "replay":
+        return ReplayProvider(root or os.getenv("AI_TRADER_FIXTURES_DIR", "data/fixtures/market"))
+    if name == "synthetic":
+        return SyntheticProvider(seed if seed is not None else int(os.getenv("AI_TRADER_SYNTHETIC_SEED", "0")))
+    if name == "panel":
+        return PanelProvider.from_dir(root or os.getenv("AI_TRADER_PANEL_DIR", "data/cache/panel"))
+    if name in ("yfinance", "yahoo", "live"):
+        return YFinanceProvider()
+    raise ValueError(f"unknown market data provider: {name}")
@@ -1,15 +1,20 @@
 from __future__ import annotations
-import json, time
+import time
 from pathlib import Path
 from typing import Any, Dict
+from ..utils.io import get_writer
 
 class TradeLogger:
-    def __init__(self, root: str | Path = "data/logs"):
+    def __init__(self, root: str | Path = "data/logs", **writer_kwargs: Any):
+        """writer_kwargs → utils.io.BufferedJSONLWriter (buffer size, flush interval, rotation)."""
         self.root = Path(root)
         self.root.mkdir(parents=True, exist_ok=True)
         self.fp = self.root / "trades.jsonl"
+        self._writer = get_writer(self.fp, **writer_kwargs)
 
     def log(self, record: Dict[str, Any]) -> None:
         record["ts"] = time.strftime("%Y-%m-%d %H:%M:%S")
-        with self.fp.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._writer.write(record)
+
+    def flush(self) -> None:
+        self._writer.flush()
@@ -0,0 +1,200 @@
+# src/data/trade_store.py
+from __future__ import annotations
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_STORE_PATH = "data/logs/trades.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id      INTEGER PRIMARY KEY,
+    run_id  TEXT,
+    date    TEXT NOT NULL,          -- YYYY-MM-DD
+    ts      TEXT,
+    symbol  TEXT NOT NULL,
+    side    TEXT,                   -- BUY / SELL
+    qty     REAL,
+    price   REAL,
+    extra   TEXT                    -- original record (JSON)
+);
+CREATE INDEX IF NOT EXISTS idx_trades_symbol_date ON trades(symbol, date);
+CREATE INDEX IF NOT EXISTS idx_trades_date ON trades(date);
+
+CREATE TABLE IF NOT EXISTS decisions (
+    id        INTEGER PRIMARY KEY,
+    run_id    TEXT,
+    date      TEXT NOT NULL,
+    ts        TEXT,
+    action    TEXT,
+    stance    TEXT,
+    vix_risk  REAL,
+    targets   TEXT,                 -- JSON list of symbols
+    rationale TEXT,
+    extra     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_date ON decisions(date);
+CREATE INDEX IF NOT EXISTS idx_decisions_stance_date ON decisions(stance, date);
+
+CREATE TABLE IF NOT EXISTS discussions (
+    id           INTEGER PRIMARY KEY,
+    run_id       TEXT,
+    date         TEXT NOT NULL,
+    ts           TEXT,
+    final_stance TEXT,
+    rounds       INTEGER,
+    symbols      TEXT,              -- JSON list
+    actions      TEXT,              -- JSON list
+    extra        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_discussions_date ON discussions(date);
+CREATE INDEX IF NOT EXISTS idx_discussions_stance_date ON discussions(final_stance, date);
+"""
+
+_JSON_COLS = {"extra", "targets", "symbols", "actions"}
+
+
+def _day(rec: Dict[str, Any]) -> str:
+    d = rec.get("date") or rec.get("ts") or ""
+    return str(d)[:10]
+
+
+def _dumps(x: Any) -> Optional[str]:
+    return None if x is None else json.dumps(x, ensure_ascii=False, default=str)
+
+
+class TradeStore:
+    """
+    Embedded SQLite store for trades, trader decisions and discussion outcomes.
+
+    Indexed on (symbol, date), date and (stance, date); inserts are batched into one
+    transaction; queries take inclusive [start, end] ISO dates. import_jsonl() loads the
+    existing trades.jsonl / discussion_actions.jsonl logs.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            if str(path) != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL")   # 讀寫可並行，多 process 也安全
+            self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "TradeStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------- bulk insert ----------
+
+    def _insert(self, table: str, cols: Tuple[str, ...], rows: List[tuple]) -> int:
+        if not rows:
+            return 0
+        sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+        with self._lock, self.conn:
+            self.conn.executemany(sql, rows)
+        return len(rows)
+
+    def add_trades(self, records: Iterable[Dict[str, Any]], run_id: Optional[str] = None) -> int:
+        """Trades as logged / filled: symbol, side (or action), qty (or amount), price, date or ts."""
+        rows = [(run_id, _day(r), r.get("ts"), r["symbol"], r.get("side") or r.get("action"),
+                 r.get("qty", r.get("amount")), r.get("price"), _dumps(r))
+                for r in records]
+        return self._insert("trades", ("run_id", "date", "ts", "symbol", "side", "qty", "price", "extra"), rows)
+
+    def add_decisions(self, records: Iterable[Dict[str, Any]], run_id: Optional[str] = None) -> int:
+        """run_trader outputs (plus a date): action, stance, vix_risk, targets, rationale."""
+        rows = []
+        for r in records:
+            targets = [t.get("symbol") if isinstance(t, dict) else t for t in (r.get("targets") or [])]
+            rows.append((run_id, _day(r), r.get("ts"), r.get("action"), r.get("stance"),
+                         r.get("vix_risk"), _dumps(targets), r.get("rationale"), _dumps(r)))
+        return self._insert("decisions", ("run_id", "date", "ts", "action", "stance", "vix_risk",
+                                          "targets", "rationale", "extra"), rows)
+
+    def add_discussions(self, records: Iterable[Dict[str, Any]], run_id: Optional[str] = None) -> int:
+        """Discussion outcomes (run_analyst_discussion result or its action-log line)."""
+        rows = [(run_id, _day(r), r.get("ts"), r.get("final_stance"), r.get("rounds"),
+                 _dumps(r.get("symbols")), _dumps(r.get("actions")),
+                 _dumps({k: v for k, v in r.items() if k not in ("symbols", "actions", "transcript")}))
+                for r in records]
+        return self._insert("discussions", ("run_id", "date", "ts", "final_stance", "rounds",
+                                            "symbols", "actions", "extra"), rows)
+
+    def add_backtest(self, result, run_id: Optional[str] = None) -> None:
+        """Store an orchestrator.backtest.BacktestResult's fills and daily decisions."""
+        self.add_trades(result.trades, run_id)
+        self.add_decisions(result.decisions, run_id)
+
+    def import_jsonl(self, path: str | Path, kind: str, run_id: Optional[str] = None,
+                     batch: int = 5000) -> int:
+        """Bulk-load a JSONL log; kind = 'trades' | 'decisions' | 'discussions'."""
+        add = {"trades": self.add_trades, "decisions": self.add_decisions,
+               "discussions": self.add_discussions}[kind]
+        n, buf = 0, []
+        with Path(path).open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    buf.append(json.loads(line))
+                if len(buf) >= batch:
+                    n += add(buf, run_id)
+                    buf = []
+        return n + add(buf, run_id)
+
+    # ---------- queries ----------
+
+    def _select(self, table: str, filters: Dict[str, Any], start: Optional[str],
+                end: Optional[str], order: str = "date, id") -> List[Dict[str, Any]]:
+        where, args = [], []
+        for col, val in filters.items():
+            if val is not None:
+                where.append(f"{col} = ?")
+                args.append(val)
+        if start is not None:
+            where.append("date >= ?")
+            args.append(str(start)[:10])
+        if end is not None:
+            where.append("date <= ?")
+            args.append(str(end)[:10])
+        sql = f"SELECT * FROM {table}" + (f" WHERE {' AND '.join(where)}" if where else "") + f" ORDER BY {order}"
+        with self._lock:
+            rows = self.conn.execute(sql, args).fetchall()
+        out = []
+        for row in rows:
+            d = dict(row)
+            for c in _JSON_COLS & d.keys():
+                if d[c] is not None:
+                    d[c] = json.loads(d[c])
+            out.append(d)
+        return out
+
+    def trades(self, symbol: Optional[str] = None, side: Optional[str] = None,
+               start: Optional[str] = None, end: Optional[str] = None,
+               run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self._select("trades", {"symbol": symbol, "side": side, "run_id": run_id}, start, end)
+
+    def decisions(self, stance: Optional[str] = None, action: Optional[str] = None,
+                  start: Optional[str] = None, end: Optional[str] = None,
+                  run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self._select("decisions", {"stance": stance, "action": action, "run_id": run_id}, start, end)
+
+    def discussions(self, stance: Optional[str] = None, start: Optional[str] = None,
+                    end: Optional[str] = None, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self._select("discussions", {"final_stance": stance, "run_id": run_id}, start, end)
+
+    def stance_counts(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, int]:
+        """{final_stance: n} over discussions in [start, end]."""
+        sql = "SELECT final_stance, COUNT(*) FROM discussions WHERE date >= ? AND date <= ? GROUP BY final_stance"
+        with self._lock:
+            rows = self.conn.execute(sql, (start or "0000-00-00", end or "9999-99-99")).fetchall()
+        return {r[0]: r[1] for r in rows}
@@ -3,16 +3,25 @@ from __future__ import annotations
 import os
 import time
 import subprocess
-from dataclasses import dataclass
-from typing import Any, Optional
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Optional, Tuple
 
 import requests
 from langchain_ollama import ChatOllama
 
+from ..utils.http import get_client
+
 
 DEFAULT_HOST = "http://localhost:11434"
 ENV_HOST = "OLLAMA_HOST"
 ENV_MODEL = "OLLAMA_MODEL"
+ENV_LLM_REPLAY = "AI_TRADER_LLM_REPLAY"   # path to a RecordedLLM JSONL → no Ollama needed
+ENV_READY_TTL = "AI_TRADER_LLM_READY_TTL" # seconds a successful readiness check stays valid
+DEFAULT_READY_TTL_S = 300.0
+
+# get_llm() 的替身（回放 / 測試用）；None 表示正常建立 ChatOllama
+_LLM_OVERRIDE: Optional[Any] = None
 
 
 class OllamaInitError(RuntimeError):
@@ -32,7 +41,8 @@ class OllamaSettings:
 
 
 def _http_get(url: str, timeout: float) -> requests.Response:
-    return requests.get(url, timeout=timeout)
+    # keep-alive 連線池；重試交給 _server_version / _list_models 自己的迴圈
+    return get_client("ollama", retries=0).get(url, timeout=timeout)
 
 
 def _server_version(base_url: str, timeout: float, retries: int) -> str:
@@ -131,6 +141,130 @@ def ensure_ollama_ready(settings: OllamaSettings) -> None:
             )
 
 
+# ---------------- client pool ----------------
+
+@dataclass
+class _Readiness:
+    checked_at: float                       # time.monotonic() of the last successful check
+    refreshing: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+PoolKey = Tuple[str, str, float, Optional[int], Optional[str]]
+_CLIENTS: Dict[PoolKey, ChatOllama] = {}
+_READY: Dict[Tuple[str, str], _Readiness] = {}
+_READY_GATES: Dict[Tuple[str, str], threading.Lock] = {}
+_POOL_LOCK = threading.Lock()
+_POOL_STATS = {"clients_created": 0, "client_hits": 0, "ready_checks": 0, "background_checks": 0}
+
+
+def _ready_ttl() -> float:
+    try:
+        return float(os.getenv(ENV_READY_TTL, DEFAULT_READY_TTL_S))
+    except ValueError:
+        return DEFAULT_READY_TTL_S
+
+
+def _recheck(key: Tuple[str, str], settings: OllamaSettings, state: _Readiness) -> None:
+    """Background re-validation; on failure drop the entry so the next get_llm() checks (and raises) inline."""
+    try:
+        ensure_ollama_ready(replace(settings, auto_pull=False))
+        state.checked_at = time.monotonic()
+    except Exception:
+        with _POOL_LOCK:
+            if _READY.get(key) is state:
+                del _READY[key]
+    finally:
+        state.refreshing = False
+
+
+def _ensure_ready_cached(settings: OllamaSettings) -> None:
+    """
+    ensure_ollama_ready at most once per (base_url, model) per TTL. Past the TTL the warm
+    result is still used and a daemon thread re-checks; failures are never cached.
+    """
+    key = (settings.base_url.rstrip("/"), settings.model)
+    state = _READY.get(key)
+    if state is None:
+        with _POOL_LOCK:
+            gate = _READY_GATES.setdefault(key, threading.Lock())
+        with gate:                  # 同一 (url, model) 首次檢查只跑一次，其他 thread 等結果
+            if key not in _READY:
+                _POOL_STATS["ready_checks"] += 1
+                ensure_ollama_ready(settings)
+                _READY[key] = _Readiness(checked_at=time.monotonic())
+        return
+    if time.monotonic() - state.checked_at < _ready_ttl():
+        return
+    with state.lock:
+        if state.refreshing:
+            return
+        state.refreshing = True
+    _POOL_STATS["background_checks"] += 1
+    threading.Thread(target=_recheck, args=(key, settings, state),
+                     name=f"ollama-ready:{settings.model}", daemon=True).start()
+
+
+def _pooled_client(settings: OllamaSettings) -> ChatOllama:
+    key: PoolKey = (settings.base_url.rstrip("/"), settings.model, float(settings.temperature),
+                    settings.num_ctx, settings.keep_alive)
+    with _POOL_LOCK:
+        llm = _CLIENTS.get(key)
+        if llm is not None:
+            _POOL_STATS["client_hits"] += 1
+            return llm
+    # Build kwargs for ChatOllama carefully; only pass supported extras when set.
+    kwargs: dict[str, Any] = {
+        "model": settings.model,
+        "temperature": settings.temperature,
+        "base_url": settings.base_url,
+    }
+    if settings.num_ctx is not None:
+        kwargs["num_ctx"] = settings.num_ctx
+    if settings.keep_alive is not None:
+        kwargs["keep_alive"] = settings.keep_alive
+    llm = ChatOllama(**kwargs)
+    with _POOL_LOCK:
+        got = _CLIENTS.setdefault(key, llm)
+        if got is llm:
+            _POOL_STATS["clients_created"] += 1
+    return got
+
+
+def reset_llm_pool() -> None:
+    """Drop pooled clients and cached readiness (e.g. after restarting Ollama, in tests, after fork)."""
+    global _POOL_LOCK
+    _POOL_LOCK = threading.Lock()
+    _CLIENTS.clear()
+    _READY.clear()
+    _READY_GATES.clear()
+    for k in _POOL_STATS:
+        _POOL_STATS[k] = 0
+
+
+def llm_pool_stats() -> Dict[str, int]:
+    with _POOL_LOCK:
+        return {**_POOL_STATS, "clients": len(_CLIENTS), "ready": len(_READY)}
+
+
+if hasattr(os, "register_at_fork"):
+    # 子 process 不沿用父 process 的 HTTP 連線與鎖
+    os.register_at_fork(after_in_child=reset_llm_pool)
+
+
+def set_llm_override(llm: Optional[Any]) -> None:
+    """
+    Make get_llm() return `llm` (anything with .invoke(prompt)), e.g. a replay.RecordedLLM
+    for reproducible backtests. Pass None to restore the real ChatOllama.
+    """
+    global _LLM_OVERRIDE
+    _LLM_OVERRIDE = llm
+
+
+def get_llm_override() -> Optional[Any]:
+    return _LLM_OVERRIDE
+
+
 def get_llm(
     model: Optional[str] = None,
     *,
@@ -141,7 +275,10 @@ def get_llm(
     auto_pull: bool = True,
 ) -> ChatOllama:
     """
-    Create a robust ChatOllama instance with health checks and optional auto-pull.
+    Return a pooled ChatOllama (one per model / base_url / options) after a health check
+    with optional auto-pull. The check result is cached per (base_url, model) for
+    AI_TRADER_LLM_READY_TTL seconds (default 300) and then refreshed in the background,
+    so repeated calls in one process cost a dict lookup. reset_llm_pool() clears both.
 
     Parameters
     ----------
@@ -162,7 +299,18 @@ def get_llm(
     ------
     OllamaInitError
         If the server is unreachable or the model is unavailable (and cannot be pulled).
+
+    If an override is set (set_llm_override) or AI_TRADER_LLM_REPLAY points to a
+    recording, that stand-in is returned instead and Ollama is not contacted.
     """
+    if _LLM_OVERRIDE is not None:
+        return _LLM_OVERRIDE
+    replay_path = os.getenv(ENV_LLM_REPLAY)
+    if replay_path:
+        from .replay import RecordedLLM
+        set_llm_override(RecordedLLM(replay_path))
+        return _LLM_OVERRIDE
+
     settings = OllamaSettings(
         model=model or os.getenv(ENV_MODEL, "llama3.1"),
         base_url=base_url or os.getenv(ENV_HOST, DEFAULT_HOST),
@@ -172,17 +320,6 @@ def get_llm(
         auto_pull=auto_pull,
     )
 
-    ensure_ollama_ready(settings)
-
-    # Build kwargs for ChatOllama carefully; only pass supported extras when set.
-    kwargs: dict[str, Any] = {
-        "model": settings.model,
-        "temperature": settings.temperature,
-        "base_url": settings.base_url,
-    }
-    if settings.num_ctx is not None:
-        kwargs["num_ctx"] = settings.num_ctx
-    if settings.keep_alive is not None:
-        kwargs["keep_alive"] = settings.keep_alive
-
-    return ChatOllama(**kwargs)
\ No newline at end of file
+    # 同一 process 內重用 warm client；readiness 依 TTL 快取，過期改由背景重新檢查
+    _ensure_ready_cached(settings)
+    return _pooled_client(settings)
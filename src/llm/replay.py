@@ -0,0 +1,93 @@
+# src/llm/replay.py
+from __future__ import annotations
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from langchain_core.messages import AIMessage
+
+# 同一份 prompt 只差在 TIME(UTC) 行 → 視為同一個 key
+_TIME_LINE = re.compile(r"^TIME\(UTC\):.*$", re.MULTILINE)
+_STANCES = ("bullish", "bearish", "neutral", "cautious")
+
+
+def normalize_prompt(prompt: Any) -> str:
+    """Prompt text with volatile parts (the TIME(UTC) line) removed and whitespace trimmed."""
+    text = prompt if isinstance(prompt, str) else str(getattr(prompt, "content", prompt))
+    return _TIME_LINE.sub("", text).strip()
+
+
+def prompt_key(prompt: Any, model: str = "") -> str:
+    h = hashlib.sha256()
+    h.update(model.encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalize_prompt(prompt).encode("utf-8"))
+    return h.hexdigest()
+
+
+def synthetic_response(prompt: Any) -> str:
+    """Deterministic stand-in answer: the stance is picked from the prompt hash."""
+    k = prompt_key(prompt)
+    stance = _STANCES[int(k[:8], 16) % len(_STANCES)]
+    return f"Summary: replayed response {k[:12]}.\nFinal Stance: {stance}"
+
+
+class RecordedLLM:
+    """
+    Drop-in for the ChatOllama returned by get_llm(): invoke(prompt) → AIMessage.
+
+    Answers come from a JSONL recording ({"key", "response"} per line, written by
+    RecordingLLM). Unrecorded prompts get synthetic_response() unless strict=True, in
+    which case KeyError is raised. Either way the output depends only on the prompt, so
+    runs are reproducible across processes.
+    """
+
+    def __init__(self, path: Optional[str | Path] = None, *, model: str = "",
+                 strict: bool = False, responses: Optional[Dict[str, str]] = None):
+        self.path = Path(path) if path else None
+        self.model = model
+        self.strict = strict
+        self.responses: Dict[str, str] = dict(responses or {})
+        self.hits = 0
+        self.misses = 0
+        if self.path is not None and self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        rec = json.loads(line)
+                        self.responses[rec["key"]] = rec["response"]
+
+    def invoke(self, prompt: Any, *args: Any, **kwargs: Any) -> AIMessage:
+        key = prompt_key(prompt, self.model)
+        text = self.responses.get(key)
+        if text is None:
+            if self.strict:
+                raise KeyError(f"no recorded LLM response for prompt key {key[:12]}")
+            self.misses += 1
+            text = synthetic_response(prompt)
+        else:
+            self.hits += 1
+        return AIMessage(content=text)
+
+
+class RecordingLLM:
+    """Pass-through to a real LLM that appends every (prompt key, response) to `path`."""
+
+    def __init__(self, inner: Any, path: str | Path, *, model: str = ""):
+        self.inner = inner
+        self.path = Path(path)
+        self.model = model
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt: Any, *args: Any, **kwargs: Any) -> Any:
+        out = self.inner.invoke(prompt, *args, **kwargs)
+        text = out if isinstance(out, str) else getattr(out, "content", str(out))
+        rec = {"key": prompt_key(prompt, self.model), "response": text}
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        return out
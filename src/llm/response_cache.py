@@ -0,0 +1,305 @@
+# src/llm/response_cache.py
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from .replay import normalize_prompt
+
+DEFAULT_CACHE_ROOT = "data/cache/llm"
+ENV_LLM_CACHE = "AI_TRADER_LLM_CACHE"                 # directory / "on" / "memory"; unset = off
+ENV_LLM_CACHE_TTL = "AI_TRADER_LLM_CACHE_TTL"         # seconds (0 / empty = no expiry)
+ENV_LLM_CACHE_STRICT = "AI_TRADER_LLM_CACHE_STRICT"   # "1" → a miss raises CacheMissError
+DEFAULT_TTL_S = 7 * 24 * 3600.0
+
+# 影響輸出的 ChatOllama 參數（base_url / keep_alive 等不影響內容，不進 key）
+_OPTION_ATTRS = ("temperature", "num_ctx", "num_predict", "top_k", "top_p", "seed", "format")
+
+
+class CacheMissError(KeyError):
+    """Strict replay: the prompt has no cached response."""
+
+
+def cache_key(prompt: Any, model: str = "", options: Optional[Mapping[str, Any]] = None) -> str:
+    """sha256 over model, options (sorted JSON) and the normalized prompt (TIME(UTC) line dropped)."""
+    h = hashlib.sha256()
+    h.update(model.encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(dict(options or {}), sort_keys=True, default=str).encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalize_prompt(prompt).encode("utf-8"))
+    return h.hexdigest()
+
+
+def llm_identity(llm: Any) -> Tuple[str, Dict[str, Any]]:
+    """(model, options) of a ChatOllama-like object, for cache_key."""
+    opts = {a: getattr(llm, a) for a in _OPTION_ATTRS if getattr(llm, a, None) is not None}
+    return str(getattr(llm, "model", "") or ""), opts
+
+
+class ResponseCache:
+    """
+    Two-tier prompt → response text cache.
+
+    - memory: LRU of `max_memory` entries.
+    - disk (root given): one JSON file per key under root/<k[:2]>/, written atomically;
+      when the directory grows past `max_disk_bytes` the least recently used files
+      (mtime, refreshed on hit) are removed down to 90% of the bound.
+    Entries older than `ttl_s` (None = never) are treated as misses and dropped.
+    """
+
+    def __init__(self, root: Optional[str | Path] = None, *, max_memory: int = 512,
+                 max_disk_bytes: int = 256 * 2**20, ttl_s: Optional[float] = DEFAULT_TTL_S):
+        self.root = Path(root) if root is not None else None
+        self.max_memory = int(max_memory)
+        self.max_disk_bytes = int(max_disk_bytes)
+        self.ttl_s = ttl_s if ttl_s else None
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None       # 第一次寫入時才掃描目錄
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "puts": 0,
+                      "expired": 0, "evicted": 0}
+
+    # ---------- tiers ----------
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _fresh(self, created: float) -> bool:
+        return self.ttl_s is None or time.time() - created <= self.ttl_s
+
+    def _remember(self, key: str, created: float, text: str) -> None:
+        self._mem[key] = (created, text)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_memory:
+            self._mem.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, str]]:
+        if self.root is None:
+            return None
+        p = self._path(key)
+        try:
+            rec = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not self._fresh(rec.get("created", 0.0)):
+            self._unlink(p)
+            self.stats["expired"] += 1
+            return None
+        try:
+            os.utime(p)                         # LRU：命中即更新 mtime
+        except OSError:
+            pass
+        return rec["created"], rec["response"]
+
+    def _unlink(self, p: Path) -> None:
+        try:
+            size = p.stat().st_size
+            p.unlink()
+        except OSError:
+            return
+        if self._disk_bytes is not None:
+            self._disk_bytes -= size
+
+    def _scan(self) -> int:
+        return sum(p.stat().st_size for p in self.root.glob("*/*.json"))
+
+    def _evict_disk(self) -> None:
+        files = []
+        for p in self.root.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+        total = sum(f[1] for f in files)
+        target = int(self.max_disk_bytes * 0.9)
+        for _, size, p in files:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.stats["evicted"] += 1
+        self._disk_bytes = total
+
+    # ---------- public ----------
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                if self._fresh(hit[0]):
+                    self._mem.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return hit[1]
+                del self._mem[key]
+                self.stats["expired"] += 1
+            rec = self._read_disk(key)
+            if rec is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._remember(key, *rec)
+            return rec[1]
+
+    def put(self, key: str, text: str, **meta: Any) -> None:
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, text)
+            self.stats["puts"] += 1
+            if self.root is None:
+                return
+            p = self._path(key)
+            p.parent.mkdir(parents=True, exist_ok=True)
+            data = json.dumps({"key": key, "created": created, "response": text, **meta},
+                              ensure_ascii=False, default=str)
+            raw = data.encode("utf-8")
+            try:
+                replaced = p.stat().st_size           # 覆寫同一 key：扣掉舊檔大小
+            except OSError:
+                replaced = 0
+            tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(raw)
+            os.replace(tmp, p)
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan()
+            else:
+                self._disk_bytes += len(raw) - replaced
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self.root is not None:
+                for p in self.root.glob("*/*.json"):
+                    p.unlink(missing_ok=True)
+            self._disk_bytes = 0 if self.root is not None else None
+
+
+class CachedLLM:
+    """
+    Wraps an LLM's invoke(prompt) with a ResponseCache (hits come back as AIMessage).
+    strict=True never calls the inner model: a miss raises CacheMissError.
+    """
+
+    def __init__(self, inner: Any, cache: ResponseCache, *, model: Optional[str] = None,
+                 options: Optional[Mapping[str, Any]] = None, strict: bool = False):
+        m, o = llm_identity(inner)
+        self.inner = inner
+        self.cache = cache
+        self.model = m if model is None else model
+        self.options = dict(o if options is None else options)
+        self.strict = strict
+
+    def invoke(self, prompt: Any, *args: Any, **kwargs: Any) -> Any:
+        key = cache_key(prompt, self.model, self.options)
+        text = self.cache.get(key)
+        if text is not None:
+            return AIMessage(content=text)
+        if self.strict:
+            raise CacheMissError(f"no cached LLM response for prompt key {key[:12]}")
+        out = self.inner.invoke(prompt, *args, **kwargs)
+        text = out if isinstance(out, str) else getattr(out, "content", str(out))
+        self.cache.put(key, text, model=self.model)
+        return out
+
+    def stream(self, prompt: Any, *args: Any, **kwargs: Any) -> Iterator[Any]:
+        """
+        Hit: one chunk with the cached text. Miss: the inner stream's chunks, cached only
+        if the stream ran to completion (a consumer that stops early stores nothing).
+        """
+        key = cache_key(prompt, self.model, self.options)
+        text = self.cache.get(key)
+        if text is not None:
+            yield AIMessageChunk(content=text)
+            return
+        if self.strict:
+            raise CacheMissError(f"no cached LLM response for prompt key {key[:12]}")
+        if not hasattr(self.inner, "stream"):
+            out = self.inner.invoke(prompt, *args, **kwargs)
+            self.cache.put(key, out if isinstance(out, str) else getattr(out, "content", str(out)),
+                           model=self.model)
+            yield out
+            return
+        parts = []
+        for chunk in self.inner.stream(prompt, *args, **kwargs):
+            parts.append(chunk if isinstance(chunk, str) else str(getattr(chunk, "content", "") or ""))
+            yield chunk
+        self.cache.put(key, "".join(parts), model=self.model)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+
+# ---------------- process-wide cache ----------------
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_SET = False
+_CACHE_LOCK = threading.Lock()
+
+def _ttl_from_env() -> Optional[float]:
+    """Unset → DEFAULT_TTL_S; "" / "0" → None (no expiry)."""
+    ttl = os.getenv(ENV_LLM_CACHE_TTL)
+    if ttl is None:
+        return DEFAULT_TTL_S
+    ttl = ttl.strip()
+    return (float(ttl) or None) if ttl else None
+
+def _cache_from_env() -> Optional[ResponseCache]:
+    # 預設關閉：live run 不能重播幾天前的立場；回測 / 回放入口用 enable_response_cache() 開啟
+    where = os.getenv(ENV_LLM_CACHE, "off").strip()
+    if where.lower() in ("", "off", "0", "none", "false"):
+        return None
+    if where.lower() in ("on", "1", "true", "disk"):
+        where = DEFAULT_CACHE_ROOT
+    return ResponseCache(None if where.lower() == "memory" else where, ttl_s=_ttl_from_env())
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The shared cache (from AI_TRADER_LLM_CACHE* on first use unless set_response_cache was called; off when unset)."""
+    global _CACHE, _CACHE_SET
+    with _CACHE_LOCK:
+        if not _CACHE_SET:
+            _CACHE, _CACHE_SET = _cache_from_env(), True
+        return _CACHE
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    """Install `cache` process-wide (None disables caching)."""
+    global _CACHE, _CACHE_SET
+    with _CACHE_LOCK:
+        _CACHE, _CACHE_SET = cache, True
+
+def enable_response_cache(root: str | Path = DEFAULT_CACHE_ROOT) -> Optional[ResponseCache]:
+    """
+    Backtest / replay entry points: install the disk cache under `root` unless
+    AI_TRADER_LLM_CACHE is set explicitly (which then wins, including "off").
+    """
+    if os.getenv(ENV_LLM_CACHE) is None:
+        set_response_cache(ResponseCache(root, ttl_s=_ttl_from_env()))
+    return get_response_cache()
+
+def cached_llm(llm: Any, *, strict: Optional[bool] = None) -> Any:
+    """
+    `llm` wrapped with the shared cache; returned unchanged when caching is off or `llm` is
+    the get_llm() override (replay / test doubles are already deterministic).
+    strict defaults to AI_TRADER_LLM_CACHE_STRICT.
+    """
+    from .ollama_client import get_llm_override
+
+    cache = get_response_cache()
+    if cache is None or isinstance(llm, CachedLLM) or (llm is not None and llm is get_llm_override()):
+        return llm
+    if strict is None:
+        strict = os.getenv(ENV_LLM_CACHE_STRICT, "").strip().lower() in ("1", "true", "yes")
+    return CachedLLM(llm, cache, strict=strict)
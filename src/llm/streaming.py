@@ -0,0 +1,113 @@
+# src/llm/streaming.py
+from __future__ import annotations
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+
+STANCES = ("bullish", "bearish", "neutral", "cautious")
+
+# "Final Stance: bullish" / "**Final Stance:** Cautious" / "3) Final Stance - {neutral}"
+_FINAL_STANCE = re.compile(
+    r"final\s+stance\W{0,6}?[:：\-]\W{0,4}?(bullish|bearish|neutral|cautious)(?=[^a-z])",
+    re.IGNORECASE,
+)
+_FINAL_STANCE_EOS = re.compile(_FINAL_STANCE.pattern.replace("(?=[^a-z])", r"\b"), re.IGNORECASE)
+_LOOKBACK = 64   # 新 chunk 只需與前面一小段一起重掃
+
+
+def find_final_stance(text: str, *, final: bool = True) -> Optional[re.Match]:
+    """Structured 'Final Stance: <x>' match; final=False requires a character after the word (still streaming)."""
+    return (_FINAL_STANCE_EOS if final else _FINAL_STANCE).search(text)
+
+
+@dataclass
+class StreamOutcome:
+    text: str                         # what was generated before stopping
+    stance: Optional[str]             # from the 'Final Stance:' line (None if it never appeared)
+    cancelled: bool                   # generation stopped before the model finished
+    time_to_stance_s: Optional[float]
+    elapsed_s: float
+    chunks: int
+
+    def as_dict(self) -> dict:
+        return {"stance": self.stance, "cancelled": self.cancelled, "chars": len(self.text),
+                "chunks": self.chunks, "time_to_stance_s": self.time_to_stance_s,
+                "elapsed_s": self.elapsed_s}
+
+
+def _pieces(llm: Any, prompt: Any) -> Iterator[str]:
+    if not hasattr(llm, "stream"):           # 回放 / 測試替身：一次吐完
+        out = llm.invoke(prompt)
+        yield out if isinstance(out, str) else getattr(out, "content", str(out))
+        return
+    stream = llm.stream(prompt)
+    try:
+        for chunk in stream:
+            yield chunk if isinstance(chunk, str) else str(getattr(chunk, "content", chunk) or "")
+    finally:
+        close = getattr(stream, "close", None)    # 提早停止時確實關閉底層串流
+        if close is not None:
+            close()
+
+
+def stream_stance(
+    llm: Any,
+    prompt: Any,
+    *,
+    rationale_chars: Optional[int] = 400,
+    cancel: Optional[threading.Event] = None,
+    on_stance: Optional[Callable[[str], None]] = None,
+) -> StreamOutcome:
+    """
+    Consume llm.stream(prompt) incrementally and stop as soon as a 'Final Stance:' line
+    plus `rationale_chars` characters after it have arrived (None = read to the end).
+    Setting `cancel` stops at the next chunk; on_stance(stance) fires once when the line is
+    seen (it may set `cancel`). Closing the stream drops the HTTP response, which makes
+    Ollama stop generating. LLMs without .stream() fall back to one invoke().
+    """
+    t0 = time.perf_counter()
+    buf: list[str] = []
+    size = 0
+    tail = ""             # 尚未確定立場時只重掃最後 _LOOKBACK 字 + 新 chunk
+    tail_at = 0           # tail[0] 在整段輸出中的位置
+    stance: Optional[str] = None
+    stance_end = 0
+    t_stance: Optional[float] = None
+    cancelled = False
+    chunks = 0
+    it = _pieces(llm, prompt)
+    try:
+        for piece in it:
+            chunks += 1
+            if piece:
+                buf.append(piece)
+                size += len(piece)
+            if stance is None and piece:
+                tail = (tail + piece)[-(_LOOKBACK + len(piece)):]
+                tail_at = size - len(tail)
+                m = find_final_stance(tail, final=False)
+                if m is not None:
+                    stance, stance_end = m.group(1).lower(), tail_at + m.end()
+                    t_stance = time.perf_counter() - t0
+                    if on_stance is not None:
+                        on_stance(stance)
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                break
+            if stance is not None and rationale_chars is not None and size - stance_end >= rationale_chars:
+                cancelled = True
+                break
+    finally:
+        close = getattr(it, "close", None)
+        if close is not None:
+            close()
+    text = "".join(buf)
+    if stance is None:
+        m = find_final_stance(text)
+        if m is not None:
+            stance = m.group(1).lower()
+            t_stance = time.perf_counter() - t0
+    return StreamOutcome(text=text, stance=stance, cancelled=cancelled, time_to_stance_s=t_stance,
+                         elapsed_s=time.perf_counter() - t0, chunks=chunks)
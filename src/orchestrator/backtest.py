@@ -0,0 +1,223 @@
+# src/orchestrator/backtest.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import math
+import numpy as np
+import pandas as pd
+
+from src.tools.market_tools import load_market_history
+from src.tools.market_analyst import run_market_analyst
+from src.agents.risk_analyst import run_risk_analyst
+from src.agents.trader_agent import run_trader
+from src.data.ledger import Ledger, SymbolRegistry
+
+# discussion stage: (mview, rview) -> {"final_stance": ..., ...}
+DiscussFn = Callable[[Dict[str, Any], Optional[Dict[str, Any]]], Dict[str, Any]]
+
+# 與 trading_cycle._default_window 相同：每個交易日看到的指標都建立在約 180 天歷史上
+WARMUP_DAYS = 180
+
+
+def static_discussion(stance: str = "neutral") -> DiscussFn:
+    """LLM-free discussion stage that always returns `stance` (fast backtests / tests)."""
+    def _discuss(mview: Dict[str, Any], rview: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {"rounds": 0, "final_stance": stance, "transcript": [], "actions": []}
+    return _discuss
+
+
+def llm_discussion(rounds: int = 3) -> DiscussFn:
+    """run_analyst_discussion without tool calls / action logging (those look at 'now')."""
+    from src.agents.analyst_discussion import run_analyst_discussion
+
+    def _discuss(mview: Dict[str, Any], rview: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return run_analyst_discussion(mview, rview, rounds=rounds, auto_tools=False,
+                                      log_actions_path=None)
+    return _discuss
+
+
+@dataclass
+class BacktestResult:
+    equity: pd.Series                                  # total account value per trading day
+    trades: List[Dict[str, Any]] = field(default_factory=list)
+    decisions: List[Dict[str, Any]] = field(default_factory=list)
+    portfolio: Optional[Ledger] = None
+
+    @property
+    def total_return(self) -> float:
+        if self.equity.empty:
+            return float("nan")
+        return float(self.equity.iloc[-1] / self.equity.iloc[0] - 1.0)
+
+    @property
+    def max_drawdown(self) -> float:
+        if self.equity.empty:
+            return float("nan")
+        peak = self.equity.cummax()
+        return float((self.equity / peak - 1.0).min())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "days": len(self.equity),
+            "start_value": float(self.equity.iloc[0]) if len(self.equity) else None,
+            "end_value": float(self.equity.iloc[-1]) if len(self.equity) else None,
+            "total_return": self.total_return,
+            "max_drawdown": self.max_drawdown,
+            "trades": len(self.trades),
+        }
+
+
+def _apply_decision(pf: Ledger, decision: Dict[str, Any], px: np.ndarray,
+                    per_stock: float, total: float, day: str) -> List[Dict[str, Any]]:
+    """
+    Fill the trader's decision at today's close (`px`: price vector on pf.registry).
+    BUY: top each target up to `per_stock` of account value, keeping total exposure <= `total`.
+    SELL: close the listed targets (all positions if none listed). HOLD: nothing.
+    Orders are sized first, then applied to the ledger in one batch.
+    """
+    action = (decision or {}).get("action", "HOLD")
+    targets = [t.get("symbol") for t in (decision.get("targets") or []) if t.get("symbol")]
+    reg = pf.registry
+    orders: List[Tuple[str, int, float]] = []
+
+    if action == "SELL":
+        held = pf.positions
+        for s in (targets or list(held.keys())):
+            qty = held.get(s, 0)
+            p = px[reg.index(s)] if s in reg else np.nan
+            if qty > 0 and math.isfinite(p):
+                orders.append((s, qty, float(p)))
+        if orders:
+            pf.sell_many(*zip(*orders))
+    elif action == "BUY":
+        mv = pf.mark_to_market(px)
+        value = pf.cash + float(mv.sum())
+        exposure = float(mv.sum())
+        cash = pf.cash
+        for s in targets:
+            if s not in reg:
+                continue
+            j = reg.index(s)
+            p = float(px[j])
+            if not math.isfinite(p) or p <= 0:
+                continue
+            room = min(per_stock * value - float(mv[j]), total * value - exposure, cash)
+            qty = int(room // p)
+            if qty <= 0:
+                continue
+            orders.append((s, qty, p))
+            exposure += qty * p
+            cash -= qty * p
+        if orders:
+            pf.buy_many(*zip(*orders))
+    side = "SELL" if action == "SELL" else "BUY"
+    return [{"date": day, "symbol": s, "side": side, "qty": q, "price": p}
+            for s, q, p in orders]
+
+
+def run_backtest(
+    universe: List[str],
+    start: str,
+    end: str,
+    *,
+    initial_cash: float = 10000.0,
+    position_limit_per_stock: float = 0.2,
+    position_limit_total: float = 0.8,
+    discuss: Optional[DiscussFn] = None,
+    warmup_days: int = WARMUP_DAYS,
+    panel_dir: Optional[str] = None,
+) -> BacktestResult:
+    """
+    Event-driven daily backtest over [start, end] (inclusive).
+
+    Market data + indicators for the whole range are loaded once (load_market_history); each trading day then sees only its point-in-time slice
+    (IndicatorHistory.at / vix_at, no look-ahead) and runs
+    market analyst → risk analyst → discussion → trader. Decisions are filled at that
+    day's close into a data.ledger.Ledger and the account is marked to market (one dot
+    product against the price vector) to build the equity curve.
+
+    discuss: discussion stage; defaults to llm_discussion(). Use static_discussion() to
+    skip the LLM entirely.
+    """
+    discuss = discuss or llm_discussion()
+    data_start = (pd.Timestamp(start) - timedelta(days=warmup_days)).date().isoformat()
+    data_end = (pd.Timestamp(end) + timedelta(days=1)).date().isoformat()
+    view = load_market_history(universe, data_start, data_end, panel_dir=panel_dir)
+    hist = view["history"]
+
+    days = pd.DatetimeIndex(hist.dates)
+    days = days[(days >= pd.Timestamp(start)) & (days <= pd.Timestamp(end))]
+
+    reg = SymbolRegistry(hist.symbols)
+    pf = Ledger(cash=float(initial_cash), registry=reg)
+    px = np.full(len(reg), np.nan)        # 最後已知收盤價（停牌 / 缺值沿用）
+    curve: List[float] = []
+    trades: List[Dict[str, Any]] = []
+    decisions: List[Dict[str, Any]] = []
+
+    for d in days:
+        day = d.date().isoformat()
+        stocks = hist.at(d)
+        market_json = {"stocks": stocks, "VIX": hist.vix_at(d)}
+        if stocks:
+            today = np.array([ind.get("price", np.nan) for ind in stocks.values()], dtype=float)
+            cols = reg.indices(stocks.keys())
+            ok = np.isfinite(today)
+            px[cols[ok]] = today[ok]
+        last_prices = {s: float(px[j]) for j, s in enumerate(reg.symbols) if math.isfinite(px[j])}
+
+        mview = run_market_analyst(market_json)
+        rview = run_risk_analyst(market_json) if stocks else None
+        mview = {**mview, "symbols": list(stocks.keys()), "stocks": stocks}
+        convo = discuss(mview, rview)
+        decision = run_trader(market=market_json, mview=mview, rview=rview, convo=convo,
+                              last_prices=last_prices)
+
+        fills = _apply_decision(pf, decision, px, position_limit_per_stock,
+                                position_limit_total, day)
+        trades.extend(fills)
+        decisions.append({"date": day, "action": decision.get("action"),
+                          "stance": convo.get("final_stance"), "fills": len(fills)})
+        curve.append(pf.value(px))
+
+    equity = pd.Series(np.asarray(curve, dtype=float), index=pd.DatetimeIndex(days, name="Date"),
+                       name="equity")
+    return BacktestResult(equity=equity, trades=trades, decisions=decisions, portfolio=pf)
+
+
+def backtest_from_config(cfg: Dict[str, Any], **kwargs: Any) -> BacktestResult:
+    """run_backtest driven by config.json (universe, date_range, initial_cash, position limits)."""
+    rng = cfg.get("date_range") or {}
+    params: Dict[str, Any] = {
+        "initial_cash": float(cfg.get("initial_cash", 10000)),
+        "position_limit_per_stock": float(cfg.get("position_limit_per_stock", 0.2)),
+        "position_limit_total": float(cfg.get("position_limit_total", 0.8)),
+    }
+    if "discuss" not in kwargs:
+        params["discuss"] = llm_discussion(int(cfg.get("discussion_rounds", 3)))
+    params.update(kwargs)
+    return run_backtest(cfg.get("universe", []), rng.get("start", "2024-01-02"),
+                        rng.get("end", "2024-12-31"), **params)
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    import time
+    from pathlib import Path
+
+    from ..llm.response_cache import enable_response_cache
+
+    cfg = json.loads(Path("config/config.json").read_text(encoding="utf-8"))
+    kw = {"discuss": static_discussion("neutral")} if "--no-llm" in sys.argv[1:] else {}
+    if not kw:
+        enable_response_cache()      # 回測重跑同一段歷史時重用 LLM 回答
+    res = backtest_from_config(cfg, **kw)
+    print(res.equity.to_string())
+    print(json.dumps(res.summary(), indent=2))
+    if "--store" in sys.argv[1:]:
+        from ..data.trade_store import TradeStore
+
+        with TradeStore() as store:
+            store.add_backtest(res, run_id=time.strftime("backtest-%Y%m%dT%H%M%S"))
@@ -0,0 +1,154 @@
+# src/orchestrator/parallel.py
+from __future__ import annotations
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.data import market_data
+from src.data.panel import PricePanel
+from src.data.providers import PanelProvider
+from src.llm.ollama_client import get_llm_override, set_llm_override
+from src.llm.replay import RecordedLLM
+from src.utils.io import flush_writers
+from src.orchestrator.backtest import WARMUP_DAYS, llm_discussion, run_backtest, static_discussion
+
+VIX_SYMBOLS = ["^VIX", "^VIX3M"]
+
+
+@dataclass
+class BacktestJob:
+    """
+    One independent backtest: universe × [start, end] × params.
+    params: initial_cash / position_limit_per_stock / position_limit_total /
+    discussion_rounds, and optionally stance (fixed stance → no LLM at all).
+    """
+    universe: List[str]
+    start: str
+    end: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    name: str = ""
+
+
+@dataclass
+class JobResult:
+    job: BacktestJob
+    summary: Dict[str, Any] = field(default_factory=dict)
+    equity: Optional[pd.Series] = None
+    trades: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def shard_dates(start: str, end: str, n: int) -> List[Tuple[str, str]]:
+    """Split [start, end] (inclusive, calendar days) into <= n contiguous, non-overlapping shards."""
+    s, e = pd.Timestamp(start), pd.Timestamp(end)
+    days = (e - s).days + 1
+    n = max(1, min(int(n), days))
+    edges = [s + timedelta(days=(days * i) // n) for i in range(n + 1)]
+    return [(edges[i].date().isoformat(), (edges[i + 1] - timedelta(days=1)).date().isoformat())
+            for i in range(n)]
+
+
+def make_jobs(universes: Sequence[Sequence[str]], date_ranges: Sequence[Tuple[str, str]],
+              param_sets: Sequence[Dict[str, Any]] = ({},), shards: int = 1) -> List[BacktestJob]:
+    """Cartesian product universes × date_ranges × param_sets, each range cut into `shards`."""
+    jobs: List[BacktestJob] = []
+    for (ui, uni), (start, end), (pi, params) in itertools.product(
+            enumerate(universes), date_ranges, enumerate(param_sets)):
+        for s, e in shard_dates(start, end, shards):
+            jobs.append(BacktestJob(list(uni), s, e, dict(params), name=f"u{ui}-p{pi}-{s}"))
+    return jobs
+
+
+def jobs_from_config(cfg: Dict[str, Any], shards: Optional[int] = None,
+                     param_sets: Optional[Sequence[Dict[str, Any]]] = None) -> List[BacktestJob]:
+    """config.json universe/date_range/limits; one shard per core by default."""
+    rng = cfg.get("date_range") or {}
+    base = {
+        "initial_cash": float(cfg.get("initial_cash", 10000)),
+        "position_limit_per_stock": float(cfg.get("position_limit_per_stock", 0.2)),
+        "position_limit_total": float(cfg.get("position_limit_total", 0.8)),
+        "discussion_rounds": int(cfg.get("discussion_rounds", 3)),
+    }
+    sets = [{**base, **p} for p in (param_sets or [{}])]
+    return make_jobs([cfg.get("universe", [])],
+                     [(rng.get("start", "2024-01-02"), rng.get("end", "2024-12-31"))],
+                     sets, shards=shards or os.cpu_count() or 1)
+
+
+def prepare_shared_panel(jobs: Sequence[BacktestJob], panel_dir: str,
+                         warmup_days: int = WARMUP_DAYS) -> PricePanel:
+    """
+    Download once (through the active provider / cache) everything the jobs need —
+    union of universes + ^VIX / ^VIX3M over the widest window incl. warm-up — and save
+    it as a PricePanel that workers memory-map read-only.
+    """
+    syms = list(dict.fromkeys([s for j in jobs for s in j.universe] + VIX_SYMBOLS))
+    start = min(pd.Timestamp(j.start) for j in jobs) - timedelta(days=warmup_days)
+    end = max(pd.Timestamp(j.end) for j in jobs) + timedelta(days=1)
+    s, e = start.date().isoformat(), end.date().isoformat()
+    frames = market_data.get_multi_prices(syms, s, e, failures={})
+    PricePanel.from_frames(frames, syms, start=s, end=e).save(panel_dir)
+    return PricePanel.load(panel_dir)
+
+
+def _init_worker(panel_dir: str, llm_path: Optional[str], strict_llm: bool) -> None:
+    market_data.set_provider(PanelProvider.from_dir(panel_dir))
+    set_llm_override(RecordedLLM(llm_path, strict=strict_llm))
+
+
+def _run_job(job: BacktestJob) -> JobResult:
+    p = dict(job.params)
+    stance = p.pop("stance", None)
+    rounds = int(p.pop("discussion_rounds", 3))
+    discuss = static_discussion(stance) if stance else llm_discussion(rounds)
+    try:
+        res = run_backtest(job.universe, job.start, job.end, discuss=discuss, **p)
+    except Exception as e:
+        return JobResult(job, error=repr(e))
+    finally:
+        flush_writers()   # worker 結束時不跑 atexit
+    return JobResult(job, summary=res.summary(), equity=res.equity, trades=res.trades)
+
+
+def run_parallel(jobs: Sequence[BacktestJob], *, workers: Optional[int] = None,
+                 panel_dir: Optional[str] = None, llm_recordings: Optional[str] = None,
+                 strict_llm: bool = False) -> List[JobResult]:
+    """
+    Run backtest jobs over a process pool (default: one worker per core); results come
+    back in job order.
+
+    Prices are fetched once in the parent into a PricePanel under `panel_dir` (a temp dir
+    if omitted); every worker serves market data from that memory-mapped panel, so no
+    worker downloads anything. get_llm() in workers returns a replay.RecordedLLM over
+    `llm_recordings` (synthetic deterministic answers for unrecorded prompts, KeyError with
+    strict_llm=True), so results do not depend on scheduling or a live model.
+    workers=1 runs the jobs in this process (same substitution, restored afterwards).
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    workers = workers or os.cpu_count() or 1
+    tmp = tempfile.TemporaryDirectory(prefix="ai_trader_panel_") if panel_dir is None else None
+    root = panel_dir or tmp.name
+    try:
+        prepare_shared_panel(jobs, root)
+        if workers <= 1:
+            prev_provider, prev_llm = market_data.get_provider(), get_llm_override()
+            try:
+                _init_worker(root, llm_recordings, strict_llm)
+                return [_run_job(j) for j in jobs]
+            finally:
+                market_data.set_provider(prev_provider)
+                set_llm_override(prev_llm)
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker,
+                                 initargs=(root, llm_recordings, strict_llm)) as ex:
+            return list(ex.map(_run_job, jobs))
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
@@ -11,6 +11,7 @@ from src.agents.analyst_discussion import run_analyst_discussion
 
 
 from src.agents.trader_agent import run_trader
+from src.tools.screening import SignalIndex
 
 
 def _default_universe() -> List[str]:
@@ -26,16 +27,8 @@ def _default_window() -> Tuple[str, str]:
 
 
 def _top_by_signal(stocks: Dict[str, Dict[str, float]], k: int = 5) -> List[Tuple[str, float]]:
-    items: List[Tuple[str, float]] = []
-    for s, d in (stocks or {}).items():
-        try:
-            sc = float(d.get("signal_score"))
-        except Exception:
-            sc = float("nan")
-        items.append((s, sc))
-    # NaN 排後
-    items.sort(key=lambda x: (float("-inf") if x[1] != x[1] else x[1]), reverse=True)
-    return [(s, sc) for s, sc in items[:k] if sc == sc]
+    # partition-based top-k（同分依 RSI、成交量），不再整個 universe 排序
+    return SignalIndex.from_stocks(stocks or {}).top_k(k)
 
 
 def execute_daily_trade(
@@ -77,7 +70,7 @@ def execute_daily_trade(
     # market_view 典型：
     # {
     #   "stocks": {SYM: {price, change_pct, rsi14, macd, bb_pos, signal_score, ...}, ...},
-    #   "vix": {"level": ..., "chg_1d": ..., "zscore": ...}
+    #   "VIX": {"level": ..., "chg_1d": ..., "zscore": ...}
     # }
 
     # ---- (1b) 輕量 enriched 給討論層 ----
@@ -93,7 +86,7 @@ def execute_daily_trade(
         "news": None,
         "signal_score_top": signal_top,
         "stocks": stocks,
-        "vix": market_view.get("vix"),
+        "vix": market_view.get("VIX") or market_view.get("vix"),   # 討論 / trader 層統一讀小寫
     }
 
     # ---- (2) 討論層（自動補工具）----
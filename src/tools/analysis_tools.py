@@ -1,4 +1,5 @@
 from __future__ import annotations
+import numpy as np
 from langchain.tools import tool
 
 @tool("assess_trend")
@@ -58,3 +59,89 @@ def vix_risk_score(vix: dict) -> float:
     regime = vix_regime.invoke({"vix": vix})
     mapping = {"low": 2.0, "normal": 4.0, "elevated": 7.0, "spike": 9.5}
     return mapping.get(regime, 4.0)
+
+# ---------------- batched (whole history / universe) ----------------
+
+VIX_REGIMES = ("low", "normal", "elevated", "spike")
+
+def _vix_regime_masks(level, zscore):
+    lvl = np.asarray(level, dtype=float)
+    z = np.asarray(zscore, dtype=float)
+    with np.errstate(invalid="ignore"):
+        spike = (lvl >= 35) | (z >= 2.5)
+        elevated = (lvl >= 25) | (z >= 1.5)
+        low = (lvl <= 14) & (z <= -0.5)
+    return [spike, elevated, low]
+
+def classify_vix_regimes(level, zscore) -> np.ndarray:
+    """
+    Vectorized vix_regime over arrays of level / zscore (same thresholds; NaN compares
+    false exactly like the scalar tool). Returns an object array of regime strings.
+    """
+    return np.select(_vix_regime_masks(level, zscore), ["spike", "elevated", "low"],
+                     default="normal").astype(object)
+
+def vix_risk_scores(level, zscore) -> np.ndarray:
+    """Vectorized vix_risk_score: regime → 1–10 risk."""
+    return np.select(_vix_regime_masks(level, zscore), [9.5, 7.0, 2.0], default=4.0)
+
+def _field(stocks, key: str) -> np.ndarray:
+    """One indicator across the universe as float (None / missing → 0, like `x or 0` in the tools)."""
+    col = getattr(stocks, "column", None)     # tools.compact.CompactIndicatorTable
+    if col is not None:
+        return np.asarray(col(key), dtype=float)
+    return np.fromiter(((sd.get(key) or 0.0) for sd in stocks.values()), dtype=float, count=len(stocks))
+
+def _ma_field(stocks, key: str) -> np.ndarray:
+    """ma20 / ma50 like assess_trend (`ma20 or ma_20`); None / 0 → NaN."""
+    col = getattr(stocks, "column", None)
+    if col is not None:
+        a = np.asarray(col(key), dtype=float)
+        return np.where(a == 0, np.nan, a)
+    alt = key[:2] + "_" + key[2:]
+    vals = ((sd.get(key) or sd.get(alt)) for sd in stocks.values())
+    return np.fromiter((np.nan if v is None else v for v in vals), dtype=float, count=len(stocks))
+
+TRENDS = ("uptrend", "downtrend", "sideways", "insufficient_data")
+_TREND_LABELS = np.array(TRENDS, dtype=object)
+
+def classify_trends(ma20, ma50, change_pct) -> np.ndarray:
+    """
+    Vectorized assess_trend over arrays of ma20 / ma50 / change_pct (None → NaN).
+    NaN MA → 'insufficient_data'; NaN change never qualifies as up/down → 'sideways'.
+    Returns an object array of labels.
+    """
+    m20 = np.asarray(ma20, dtype=float)
+    m50 = np.asarray(ma50, dtype=float)
+    chg = np.asarray(change_pct, dtype=float)
+    with np.errstate(invalid="ignore"):
+        masks = [np.isnan(m20) | np.isnan(m50), (m20 > m50) & (chg > 0), (m20 < m50) & (chg < 0)]
+    codes = np.select(masks, [3, 0, 1], default=2)
+    return _TREND_LABELS[codes]
+
+def universe_trends(stocks) -> np.ndarray:
+    """Trend label per symbol of a `stocks` mapping (dicts or CompactIndicatorTable), in key order."""
+    col = getattr(stocks, "column", None)
+    if col is not None:
+        chg = col("change_pct")
+    else:
+        chg = np.fromiter((np.nan if sd.get("change_pct") is None else sd["change_pct"]
+                           for sd in stocks.values()), dtype=float, count=len(stocks))
+    return classify_trends(_ma_field(stocks, "ma20"), _ma_field(stocks, "ma50"), chg)
+
+def risk_scores(volume, change_pct) -> np.ndarray:
+    """
+    Vectorized risk_score over arrays of volume / change_pct (None already mapped to 0).
+    Matches the scalar tool exactly, including NaN: NaN change → 10.0, NaN volume → no adjustment.
+    """
+    vol = np.asarray(volume, dtype=float)
+    chg = np.abs(np.asarray(change_pct, dtype=float))
+    with np.errstate(invalid="ignore"):
+        base = 3.0 + np.minimum(chg / 2.0, 5.0)
+        adj = np.where(vol > 50_000_000, -1.0, 0.0)
+    return np.where(np.isnan(chg), 10.0, np.clip(base + adj, 1.0, 10.0))
+
+def universe_risk_scores(stocks) -> dict:
+    """{symbol: risk_score} for a whole `stocks` mapping in one call (no tool dispatch)."""
+    sc = risk_scores(_field(stocks, "volume"), _field(stocks, "change_pct"))
+    return dict(zip(stocks.keys(), sc.tolist()))
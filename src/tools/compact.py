@@ -0,0 +1,141 @@
+# src/tools/compact.py
+"""
+Opt-in compact representation of the market view.
+
+- Prices / indicators are stored as float32, volumes as int64, signal_score as int8.
+- Per-symbol indicator dicts are replaced by one (symbols × fields) array; each symbol is
+  exposed as an IndicatorRecord (__slots__ view, read-only Mapping) so downstream code that
+  does `d.get("rsi14")` / `stocks.items()` keeps working.
+
+Tolerances vs. the float64 path (indicators are always computed in float64 and only
+rounded on storage):
+- every float field: relative error <= 2**-24 (~6e-8), e.g. < $0.00003 on a $500 price;
+- bb_pos / change_pct: absolute error < 1e-7;
+- signal_score and volume: exact (volume exact up to 2**63; a missing volume is stored as 0).
+Feeding float32 prices back into the engine adds the price rounding on top (MA rel ~1e-7,
+RSI abs ~1e-4 on very quiet series) — upcast only happens at compute time.
+"""
+from __future__ import annotations
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from .ta_engine import INDICATOR_KEYS, IndicatorHistory
+
+PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Adj Close")
+_FLOAT_KEYS = [k for k in INDICATOR_KEYS if k not in ("volume", "signal_score")]
+
+
+def compact_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    """float32 prices + int64 Volume (NaN volume → 0)."""
+    if df is None or df.empty:
+        return df
+    out = df.copy()
+    for c in PRICE_COLUMNS:
+        if c in out.columns:
+            out[c] = out[c].astype(np.float32)
+    if "Volume" in out.columns:
+        out["Volume"] = out["Volume"].fillna(0).astype(np.int64)
+    return out
+
+
+class IndicatorRecord(Mapping):
+    """Read-only view of one symbol's row in a CompactIndicatorTable."""
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "CompactIndicatorTable", row: int):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        t = self._table
+        if key == "volume":
+            return float(t.volume[self._row])
+        if key == "signal_score":
+            return int(t.signal_score[self._row])
+        j = t.float_col.get(key)
+        if j is None:
+            raise KeyError(key)
+        return float(t.values[self._row, j])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(INDICATOR_KEYS)
+
+    def __len__(self) -> int:
+        return len(INDICATOR_KEYS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class CompactIndicatorTable(Mapping):
+    """
+    {symbol: IndicatorRecord} backed by arrays: values float32 (N × float fields),
+    volume int64 (N,), signal_score int8 (N,).
+    """
+
+    def __init__(self, symbols: Sequence[str], values: np.ndarray, volume: np.ndarray,
+                 signal_score: np.ndarray):
+        self.symbols: List[str] = list(symbols)
+        self.row = {s: i for i, s in enumerate(self.symbols)}
+        self.float_col = {k: j for j, k in enumerate(_FLOAT_KEYS)}
+        self.values = values
+        self.volume = volume
+        self.signal_score = signal_score
+
+    @classmethod
+    def from_dicts(cls, stocks: Dict[str, Optional[Dict[str, Any]]]) -> "CompactIndicatorTable":
+        syms = list(stocks.keys())
+        n = len(syms)
+        values = np.full((n, len(_FLOAT_KEYS)), np.nan, dtype=np.float32)
+        volume = np.zeros(n, dtype=np.int64)
+        score = np.zeros(n, dtype=np.int8)
+        for i, s in enumerate(syms):
+            d = stocks[s] or {}
+            values[i] = [d.get(k, np.nan) for k in _FLOAT_KEYS]
+            v = d.get("volume")
+            volume[i] = int(v) if v is not None and v == v else 0
+            score[i] = int(d.get("signal_score") or 0)
+        return cls(syms, values, volume, score)
+
+    def __getitem__(self, symbol: str) -> IndicatorRecord:
+        return IndicatorRecord(self, self.row[symbol])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __repr__(self) -> str:
+        return f"CompactIndicatorTable({len(self.symbols)} symbols)"
+
+    def column(self, key: str) -> np.ndarray:
+        """Whole-universe array for one field (no per-symbol objects)."""
+        if key == "volume":
+            return self.volume
+        if key == "signal_score":
+            return self.signal_score
+        return self.values[:, self.float_col[key]]
+
+    def to_dicts(self) -> Dict[str, Dict[str, Any]]:
+        return {s: dict(self[s]) for s in self.symbols}
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.volume.nbytes + self.signal_score.nbytes
+
+
+def compact_history(hist: IndicatorHistory) -> IndicatorHistory:
+    """float32 indicator columns, int64 volume (missing → 0); signal_score stays int8."""
+    cols: Dict[str, np.ndarray] = {}
+    for k, v in hist.columns.items():
+        if k == "signal_score":
+            cols[k] = v
+        elif k == "volume":
+            cols[k] = np.nan_to_num(v, nan=0.0).astype(np.int64)
+        else:
+            cols[k] = v.astype(np.float32)
+    vix = {k: (v if v.dtype.kind in "OU" else v.astype(np.float32)) for k, v in hist.vix.items()}
+    return IndicatorHistory(hist.dates, hist.symbols, cols, hist.has_bar, vix)
@@ -1,12 +1,14 @@
 from __future__ import annotations
 from typing import Dict, Any
-from ..tools.analysis_tools import assess_trend, vix_regime, vix_risk_score
+from ..tools.analysis_tools import classify_vix_regimes, universe_trends, vix_risk_scores
 
 def run_market_analyst(market_json: Dict[str, Any]) -> Dict[str, Any]:
     # --- VIX sentiment ---
     vix_info = market_json.get("VIX", {}) or {}
-    regime = vix_regime.invoke({"vix": vix_info})
-    vix_risk = vix_risk_score.invoke({"vix": vix_info})
+    # 直接呼叫向量化版本（與 vix_regime / vix_risk_score 工具同門檻），省掉 tool dispatch
+    lvl0, z0 = vix_info.get("level", 0.0) or 0.0, vix_info.get("zscore", 0.0) or 0.0
+    regime = str(classify_vix_regimes([lvl0], [z0])[0])
+    vix_risk = float(vix_risk_scores([lvl0], [z0])[0])
 
     concerns = []
     if regime in ("elevated", "spike"):
@@ -17,15 +19,11 @@ def run_market_analyst(market_json: Dict[str, Any]) -> Dict[str, Any]:
         except Exception:
             concerns.append(f"VIX {regime}")
 
-    # --- Per-symbol trend assessment ---
-    sentiment = []
-    rec_buy = []
-    stocks = market_json.get("stocks", {})
-    for sym, sd in stocks.items():
-        t = assess_trend.invoke({"symbol_data": sd})
-        if t == "uptrend" and vix_risk <= 6.0:   # high VIX → suppress buy
-            rec_buy.append(sym)
-        sentiment.append((sym, t))
+    # --- Trend assessment (whole universe at once) ---
+    stocks = market_json.get("stocks", {}) or {}
+    sentiment = list(zip(stocks.keys(), universe_trends(stocks).tolist()))
+    # high VIX → suppress buy
+    rec_buy = [s for s, t in sentiment if t == "uptrend"] if vix_risk <= 6.0 else []
 
     out = {
         "market_sentiment": ("bullish" if rec_buy else "neutral") if regime in ("low", "normal") else "cautious",
@@ -1,11 +1,14 @@
 # src/tools/market_tools.py
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import math
 import pandas as pd
 from langchain.tools import tool
-from ..data.market_data import get_multi_prices, get_vix_close
+from ..data.market_data import get_multi_prices, get_vix_close, get_vix3m_close
 from .ta_indicators import rsi, macd, bbands
+from .ta_engine import INDICATOR_KEYS, latest_indicators, indicator_history
+from .compact import CompactIndicatorTable, compact_history
+from .vix_features import vix_feature_history
 
 def _to_float(x) -> float:
     """Safely convert scalar/Series/ndarray to float (use last value if Series)."""
@@ -25,13 +28,8 @@ def _safe_dict(**kwargs) -> Dict[str, Any]:
     Always return a full indicator dict schema.
     Any missing numeric becomes NaN; missing text stays None.
     """
-    keys = [
-        "price","change_pct","volume",
-        "ma20","ma50","rsi14","macd","macd_signal","macd_hist",
-        "bb_pos","signal_score"
-    ]
     out = {}
-    for k in keys:
+    for k in INDICATOR_KEYS:
         v = kwargs.get(k, None)
         if v is None:
             out[k] = float("nan") if k != "signal_score" else 0
@@ -127,6 +125,67 @@ def _calc_vix_features(vix_close: pd.Series) -> dict:
     z = float((level - mean) / (std if std and std == std else 1e-9))
     return {"level": level, "chg_1d": chg_1d, "zscore": z}
 
+def _market_batch(symbols: List[str], start: str, end: str, *, panel_dir: Optional[str] = None,
+                  history: bool = False, compact: bool = False) -> Dict[str, Any]:
+    failures: Dict[str, str] = {}
+    data = get_multi_prices(symbols, start, end, failures=failures, panel_dir=panel_dir,
+                            compact=compact)
+    out: Dict[str, Any] = {"stocks": {}}
+    # 整個 universe 一次向量化計算（與逐檔 _calc_indicators 結果一致）
+    uniq = list(dict.fromkeys(symbols))
+    hist = None
+    if history:
+        hist, latest = indicator_history(data, uniq)
+    else:
+        latest = latest_indicators(data, uniq)
+    for s in symbols:
+        # still ensure schema to avoid "missing keys" in downstream tests
+        out["stocks"][s] = latest.get(s) or _safe_dict()
+    if compact:
+        out["stocks"] = CompactIndicatorTable.from_dicts(out["stocks"])
+    if failures:
+        out["errors"] = failures
+    # Attach VIX features
+    try:
+        vix_series = get_vix_close(start, end)
+        out["VIX"] = _calc_vix_features(vix_series)
+    except Exception:
+        vix_series = None
+        out["VIX"] = {"level": float("nan"), "chg_1d": float("nan"), "zscore": float("nan")}
+    if hist is not None:
+        if vix_series is not None:
+            # 多視窗 z-score / 百分位 / term ratio / regime，整段一次算完
+            try:
+                vix3m = get_vix3m_close(start, end)
+            except Exception:
+                vix3m = None
+            vh = vix_feature_history(vix_series, vix3m)
+            vh = vh.reindex(pd.DatetimeIndex(hist.dates))
+            hist.vix = {k: vh[k].to_numpy() for k in vh.columns}
+        out["history"] = compact_history(hist) if compact else hist
+    return out
+
+def load_market_batch(symbols: List[str], start: str, end: str, *, panel_dir: Optional[str] = None,
+                      compact: bool = False) -> Dict[str, Any]:
+    """
+    fetch_market_batch for Python callers, with the options that stay out of the LLM tool schema.
+    panel_dir: optional memory-mapped price panel directory to read from / build into.
+    compact=True: 'stocks' is a CompactIndicatorTable (float32 values, int volume, read-only
+    per-symbol records with the same keys); indicators are still computed in float64
+    (tolerances in tools/compact.py).
+    """
+    return _market_batch(symbols, start, end, panel_dir=panel_dir, compact=compact)
+
+def load_market_history(symbols: List[str], start: str, end: str, *, panel_dir: Optional[str] = None,
+                        compact: bool = False) -> Dict[str, Any]:
+    """
+    load_market_batch plus every indicator / signal_score / VIX feature for every date in
+    the window under 'history' (ta_engine.IndicatorHistory, columnar arrays; history.vix
+    carries the multi-window features of tools/vix_features). compact=True also stores the
+    history arrays as float32. Used by the backtest.
+    """
+    return _market_batch(symbols, start, end, panel_dir=panel_dir, history=True, compact=compact)
+
 @tool("fetch_market_batch", return_direct=False)
 def fetch_market_batch(symbols: List[str], start: str, end: str) -> Dict[str, Any]:
     """
@@ -135,21 +194,8 @@ def fetch_market_batch(symbols: List[str], start: str, end: str) -> Dict[str, An
     Returns:
     {
       "stocks": { "AAPL": {...indicators...}, ... },
-      "VIX":   { "level": ..., "chg_1d": ..., "zscore": ... }
+      "VIX":   { "level": ..., "chg_1d": ..., "zscore": ... },
+      "errors": { "SYM": "reason", ... }   # only present when some symbols had no data
     }
     """
-    data = get_multi_prices(symbols, start, end)
-    out: Dict[str, Any] = {"stocks": {}}
-    for s, df in data.items():
-        try:
-            out["stocks"][s] = _calc_indicators(df)
-        except Exception:
-            # still ensure schema to avoid "missing keys" in downstream tests
-            out["stocks"][s] = _safe_dict()
-    # Attach VIX features
-    try:
-        vix_series = get_vix_close(start, end)
-        out["VIX"] = _calc_vix_features(vix_series)
-    except Exception:
-        out["VIX"] = {"level": float("nan"), "chg_1d": float("nan"), "zscore": float("nan")}
-    return out
+    return _market_batch(symbols, start, end)
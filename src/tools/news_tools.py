@@ -9,6 +9,8 @@ import requests
 import feedparser
 from bs4 import BeautifulSoup
 
+from src.utils.http import http_get
+
 # 可選：DuckDuckGo 搜尋（若沒裝 ddgs，就自動停用 web 搜尋）
 try:
     from ddgs import DDGS  # pip install ddgs
@@ -19,6 +21,7 @@ except Exception:
 # 可選：LLM（Ollama）
 try:
     from src.llm.ollama_client import get_llm
+    from src.llm.response_cache import cached_llm
     _HAS_LLM = True
 except Exception:
     _HAS_LLM = False
@@ -48,11 +51,16 @@ def _norm_item(entry: Any) -> Dict[str, Any]:
         src = m.group(1) if m else "rss"
     return {"title": title, "link": link, "source": src}
 
+def _parse_feed(url: str):
+    # 走共用連線池（同一 host 的多個 query 重用 keep-alive 連線），再交給 feedparser 解析
+    resp = http_get(url, timeout=10.0, headers={"User-Agent": "Mozilla/5.0"})
+    return feedparser.parse(resp.content)
+
 def business_rss(max_items: int = 40) -> List[Dict[str, Any]]:
     hits: List[Dict[str, Any]] = []
     for url in BUSINESS_FEEDS:
         try:
-            feed = feedparser.parse(url)
+            feed = _parse_feed(url)
             for e in feed.entries[:20]:
                 hits.append(_norm_item(e))
         except Exception:
@@ -71,7 +79,7 @@ def google_news_rss(query: str, lang: str = "en", region: str = "US", max_items:
     q = requests.utils.quote(query)
     url = f"https://news.google.com/rss/search?q={q}&hl={lang}-{region}&gl={region}&ceid={region}:{lang}"
     try:
-        feed = feedparser.parse(url)
+        feed = _parse_feed(url)
         hits = [_norm_item(e) for e in feed.entries[:max_items]]
         return hits
     except Exception:
@@ -131,12 +139,12 @@ def search_web(keywords: List[str], max_results: int = 10, domains: Optional[Lis
     return out[:max_results]
 
 # ---------------------------
-# 抓正文（簡易：requests + BeautifulSoup）
+# 抓正文（簡易：共用連線池 + BeautifulSoup）
 # ---------------------------
 
 def fetch_url(url: str, timeout: float = 10.0) -> Dict[str, Any]:
     try:
-        resp = requests.get(url, timeout=timeout, headers={"User-Agent": "Mozilla/5.0"})
+        resp = http_get(url, timeout=timeout, headers={"User-Agent": "Mozilla/5.0"})
         resp.raise_for_status()
         html = resp.text
         soup = BeautifulSoup(html, "html.parser")
@@ -207,7 +215,7 @@ def _choose_queries_llm(tickers: List[str], mview: Dict[str, Any]) -> List[str]:
     if not _HAS_LLM:
         # 無 LLM 時的保守預設
         return [f"{tickers[0]} stock", "earnings guidance", "Fed outlook", "regulatory risk"]
-    llm = get_llm()
+    llm = cached_llm(get_llm())
     vix = mview.get("vix") or {}
     ta_samples = {}
     for s, d in list((mview.get("stocks") or {}).items())[:3]:
@@ -0,0 +1,148 @@
+# src/tools/screening.py
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# 排序鍵：先 signal_score，同分比 RSI，再比成交量；全同時先加入的 symbol 在前
+RANK_KEYS = ("signal_score", "rsi14", "volume")
+
+
+def _num(x: Any) -> float:
+    try:
+        return float(x)
+    except Exception:
+        return float("nan")
+
+
+class SignalIndex:
+    """
+    Columnar screening index over indicator outputs ({symbol: indicator dict} or a
+    CompactIndicatorTable).
+
+    - top_k(): partition-based selection, O(n) per call instead of sorting the universe;
+      ranking is multi-key (RANK_KEYS, all descending, NaN last), symbols whose primary key
+      is NaN are left out.
+    - percentile_ranks(): cross-sectional percentile (0–1] of any tracked key.
+    - update(): upsert only the symbols that changed; rows are edited in place.
+    """
+
+    def __init__(self, keys: Sequence[str] = RANK_KEYS):
+        self.keys: Tuple[str, ...] = tuple(keys)
+        self.symbols: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._data = np.full((0, len(self.keys)), np.nan)
+        self._alive = np.zeros(0, dtype=bool)
+        self._top_cache: Dict[Tuple[int, str], List[Tuple[str, float]]] = {}
+
+    @classmethod
+    def from_stocks(cls, stocks: Mapping[str, Any], keys: Sequence[str] = RANK_KEYS) -> "SignalIndex":
+        idx = cls(keys)
+        idx.update(stocks)
+        return idx
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    def __contains__(self, symbol: str) -> bool:
+        j = self._row.get(symbol)
+        return j is not None and bool(self._alive[j])
+
+    # ---------- maintenance ----------
+
+    def _grow(self, need: int) -> None:
+        cap = len(self._data)
+        if need <= cap:
+            return
+        cap = max(need, 2 * cap, 64)
+        data = np.full((cap, len(self.keys)), np.nan)
+        data[: len(self._data)] = self._data
+        alive = np.zeros(cap, dtype=bool)
+        alive[: len(self._alive)] = self._alive
+        self._data, self._alive = data, alive
+
+    def update(self, stocks: Mapping[str, Any]) -> None:
+        """Insert / overwrite the given symbols (others untouched)."""
+        if not stocks:
+            return
+        syms = list(stocks.keys())
+        new = [s for s in syms if s not in self._row]
+        self._grow(len(self.symbols) + len(new))
+        for s in new:
+            self._row[s] = len(self.symbols)
+            self.symbols.append(s)
+        rows = np.fromiter((self._row[s] for s in syms), dtype=np.int64, count=len(syms))
+        if hasattr(stocks, "column"):
+            # CompactIndicatorTable：直接取整欄陣列
+            for c, key in enumerate(self.keys):
+                self._data[rows, c] = np.asarray(stocks.column(key), dtype=float)
+        else:
+            for c, key in enumerate(self.keys):
+                self._data[rows, c] = [_num(d.get(key)) if hasattr(d, "get") else np.nan
+                                       for d in stocks.values()]
+        self._alive[rows] = True
+        self._top_cache.clear()
+
+    def remove(self, symbols: Iterable[str]) -> None:
+        for s in symbols:
+            j = self._row.get(s)
+            if j is not None:
+                self._alive[j] = False
+                self._data[j] = np.nan
+        self._top_cache.clear()
+
+    # ---------- queries ----------
+
+    def _values(self, key: str) -> np.ndarray:
+        n = len(self.symbols)
+        v = self._data[:n, self.keys.index(key)]
+        return np.where(np.isfinite(v) & self._alive[:n], v, -np.inf)
+
+    def _select(self, rows: np.ndarray, cols: List[np.ndarray], level: int, need: int) -> np.ndarray:
+        """`need` best rows by cols[level:], then insertion order — partition only, no sort."""
+        if need <= 0:
+            return rows[:0]
+        if need >= len(rows):
+            return rows
+        if level == len(cols):
+            return np.sort(rows)[:need]
+        v = cols[level][rows]
+        t = -np.partition(-v, need - 1)[need - 1]
+        above = rows[v > t]
+        tied = rows[v == t]
+        return np.concatenate([above, self._select(tied, cols, level + 1, need - len(above))])
+
+    def top_k(self, k: int = 5, key: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        [(symbol, value)] best-first. key=None ranks by all RANK_KEYS (value = first key);
+        key='rsi14' etc. ranks by that key alone (ties → insertion order).
+        """
+        primary = key or self.keys[0]
+        ck = (int(k), primary if key else "")
+        if ck in self._top_cache:
+            return list(self._top_cache[ck])
+        order = [primary] if key else list(self.keys)
+        cols = [self._values(c) for c in order]
+        rows = np.flatnonzero(np.isfinite(cols[0]))
+        sel = self._select(rows, cols, 0, int(k))
+        # 只對選出的 k 列做多鍵排序（lexsort 最後一個鍵為主鍵）
+        sel = sel[np.lexsort([sel] + [-c[sel] for c in reversed(cols)])]
+        out = [(self.symbols[j], float(cols[0][j])) for j in sel]
+        self._top_cache[ck] = out
+        return list(out)
+
+    def bottom_k(self, k: int = 5, key: Optional[str] = None) -> List[Tuple[str, float]]:
+        """[(symbol, value)] worst-first by `key` (default the primary key); NaN left out, ties → insertion order."""
+        v = self._values(key or self.keys[0])
+        rows = np.flatnonzero(np.isfinite(v))
+        sel = self._select(rows, [np.where(np.isfinite(v), -v, -np.inf)], 0, int(k))
+        sel = sel[np.lexsort([sel, v[sel]])]
+        return [(self.symbols[j], float(v[j])) for j in sel]
+
+    def percentile_ranks(self, key: str = "signal_score") -> Dict[str, float]:
+        """Cross-sectional percentile rank in (0, 1] (ties averaged); NaN for missing values."""
+        n = len(self.symbols)
+        v = self._data[:n, self.keys.index(key)]
+        live = self._alive[:n]
+        r = pd.Series(np.where(live, v, np.nan)).rank(pct=True, method="average").to_numpy()
+        return {s: float(r[j]) for j, s in enumerate(self.symbols) if live[j]}
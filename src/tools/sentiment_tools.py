@@ -4,8 +4,8 @@ from typing import Dict, Any, Optional
 import time
 import json
 import re
-import requests
 from datetime import datetime, timezone
+from ..utils.http import http_get
 
 # ---------------- Fear & Greed (CNN) ----------------
 # 策略：依序嘗試 3 個來源（任何一個成功就回值；都失敗回 stub）
@@ -98,7 +98,7 @@ def _scrape_cnn_html(url: str) -> Optional[Dict[str, Any]]:
     從 CNN HTML 頁面抓 FGI 文字/數字。此為最後手段（DOM 可能改版）。
     """
     try:
-        resp = requests.get(url, timeout=10)
+        resp = http_get(url, timeout=10)
         if resp.status_code != 200 or not resp.text:
             return None
         html = resp.text
@@ -138,7 +138,7 @@ def fetch_fear_greed(timeout: float = 8.0) -> Dict[str, Any]:
     # A/B: JSON 端點
     for ep in _CNN_JSON_ENDPOINTS:
         try:
-            r = requests.get(ep, timeout=timeout, headers={"Accept": "application/json"})
+            r = http_get(ep, timeout=timeout, headers={"Accept": "application/json"})
             if r.status_code == 200:
                 data = r.json()
                 parsed = _parse_cnn_json(data)
@@ -167,16 +167,18 @@ def fetch_fear_greed(timeout: float = 8.0) -> Dict[str, Any]:
 
 
 # ---------------- VIX term structure（你既有的即可保留） ----------------
-import yfinance as yf
 import pandas as pd
+from ..data.market_data import get_provider, load_bars, recent_window
 
 def vix_term_structure() -> Dict[str, Any]:
     """
     回傳 VIX 與 VIX3M 的最新值與 term ratio（>1 通常視為 contango）。
+    走 market_data 的 coalescing 層：同一輪已抓過的 ^VIX 直接切片重用。
     """
     try:
-        vix = yf.download("^VIX", period="3mo", interval="1d", progress=False, auto_adjust=False)
-        vix3m = yf.download("^VIX3M", period="3mo", interval="1d", progress=False, auto_adjust=False)
+        start, end = recent_window(92)  # ≈ period="3mo"
+        vix = load_bars("^VIX", start, end)
+        vix3m = load_bars("^VIX3M", start, end)
 
         def _last_close(df):
             if df is None or df.empty or "Close" not in df:
@@ -193,7 +195,7 @@ def vix_term_structure() -> Dict[str, Any]:
 
         return {
             "vix": v, "vix3m": v3, "ratio": ratio,
-            "asof": _now_iso(), "source": "yfinance"
+            "asof": _now_iso(), "source": get_provider().name
         }
     except Exception:
         return {"vix": None, "vix3m": None, "ratio": None, "asof": _now_iso(), "source": "error"}
@@ -0,0 +1,245 @@
+# src/tools/ta_engine.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from .ta_indicators import rsi, macd, bbands
+
+# 與 market_tools._safe_dict 相同的欄位順序
+INDICATOR_KEYS = [
+    "price", "change_pct", "volume",
+    "ma20", "ma50", "rsi14", "macd", "macd_signal", "macd_hist",
+    "bb_pos", "signal_score",
+]
+
+
+def _close_of(df: pd.DataFrame) -> pd.Series:
+    try:
+        return df["Close"]
+    except KeyError:
+        # fallback if column capitalization failed upstream
+        return df[df.columns[df.columns.str.lower().eq("close")][0]]
+
+
+def stack_right_aligned(frames: Dict[str, pd.DataFrame], symbols: Sequence[str]
+                        ) -> Tuple[pd.DataFrame, pd.DataFrame, np.ndarray]:
+    """
+    Stack each symbol's Close / Volume into rows × symbols matrices, right-aligned by row
+    position (last bar of every symbol sits in the last row; shorter histories are NaN-padded
+    on top). Positional alignment keeps each column identical to the symbol's own series, so
+    rolling/ewm results match the per-symbol path exactly.
+
+    Returns (close, volume, first_row) where first_row[j] is the row of symbol j's first bar
+    (== rows for an empty frame) and -1 for symbols with no usable frame.
+    """
+    n = len(symbols)
+    cols_c: List[Optional[np.ndarray]] = [None] * n
+    cols_v: List[Optional[np.ndarray]] = [None] * n
+    for j, s in enumerate(symbols):
+        df = frames.get(s)
+        if df is None:
+            continue
+        try:
+            c = _close_of(df).to_numpy(dtype=float, na_value=np.nan)
+            v = (df["Volume"].to_numpy(dtype=float, na_value=np.nan)
+                 if "Volume" in df.columns else np.full(len(c), np.nan))
+        except Exception:
+            continue
+        cols_c[j], cols_v[j] = c, v
+    rows = max((len(c) for c in cols_c if c is not None), default=0)
+    close = np.full((rows, n), np.nan)
+    vol = np.full((rows, n), np.nan)
+    for j in range(n):
+        c = cols_c[j]
+        if c is not None and len(c):
+            close[rows - len(c):, j] = c
+            vol[rows - len(c):, j] = cols_v[j]
+    first_row = np.array([rows - len(c) if c is not None else -1 for c in cols_c], dtype=np.int64)
+    return pd.DataFrame(close, columns=list(symbols)), pd.DataFrame(vol, columns=list(symbols)), first_row
+
+
+def indicator_matrices(close: pd.DataFrame, volume: Optional[pd.DataFrame] = None,
+                       first_row: Optional[np.ndarray] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Full-history indicators for every column of `close` (rows × symbols) in one pass each.
+    Same formulas as market_tools._calc_indicators / ta_indicators (applied column-wise).
+
+    first_row: per-column row of the first real bar (padding above it). ta_indicators.rsi
+    turns NaN deltas into 0 gains, so padded rows would otherwise count toward its warm-up.
+    """
+    if volume is None:
+        volume = pd.DataFrame(np.nan, index=close.index, columns=close.columns)
+
+    ma20 = close.rolling(20, min_periods=1).mean()
+    ma50 = close.rolling(50, min_periods=1).mean()
+    rsi14 = rsi(close, period=14)
+    if first_row is not None:
+        rows = np.arange(len(close))[:, None]
+        rsi14 = rsi14.mask(rows < (np.maximum(first_row, 0) + 14 - 1)[None, :])
+    macd_line, macd_sig, macd_hist = macd(close, fast=12, slow=26, signal=9)
+    upper, _, lower = bbands(close, period=20, n_std=2.0)
+    change_pct = close.pct_change()
+
+    c, up, low = close.to_numpy(), upper.to_numpy(), lower.to_numpy()
+    width = up - low
+    valid = np.isfinite(c) & np.isfinite(up) & np.isfinite(low) & (width != 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bb = np.where(valid, np.clip((c - low) / np.where(valid, width, 1.0), 0.0, 1.0), np.nan)
+
+    m20, m50 = ma20.to_numpy(), ma50.to_numpy()
+    mv, ms, mh = macd_line.to_numpy(), macd_sig.to_numpy(), macd_hist.to_numpy()
+    r = rsi14.to_numpy()
+    with np.errstate(invalid="ignore"):
+        sig_up_ma = np.isfinite(m20) & np.isfinite(m50) & (m20 > m50)
+        sig_macd = (np.isfinite(mv) & np.isfinite(ms) & np.isfinite(mh) & (mv > ms) & (mh > 0))
+        sig_rsi = np.isfinite(r) & (r >= 55) & (r <= 70)
+    score = sig_up_ma.astype(np.int64) + sig_macd.astype(np.int64) + sig_rsi.astype(np.int64)
+
+    idx, cols = close.index, close.columns
+    return {
+        "price": close,
+        "change_pct": change_pct,
+        "volume": volume,
+        "ma20": ma20,
+        "ma50": ma50,
+        "rsi14": rsi14,
+        "macd": macd_line,
+        "macd_signal": macd_sig,
+        "macd_hist": macd_hist,
+        "bb_pos": pd.DataFrame(bb, index=idx, columns=cols),
+        "signal_score": pd.DataFrame(score, index=idx, columns=cols),
+    }
+
+
+def _latest_from(mats: Dict[str, pd.DataFrame], syms: List[str], first_row: np.ndarray
+                 ) -> Dict[str, Dict[str, float]]:
+    last = {k: mats[k].to_numpy()[-1] for k in INDICATOR_KEYS}
+    out: Dict[str, Dict[str, float]] = {}
+    for j, s in enumerate(syms):
+        if first_row[j] < 0:
+            out[s] = None
+            continue
+        d = {k: float(last[k][j]) for k in INDICATOR_KEYS}
+        d["signal_score"] = int(last["signal_score"][j])
+        out[s] = d
+    return out
+
+
+def latest_indicators(frames: Dict[str, pd.DataFrame], symbols: Optional[Sequence[str]] = None
+                      ) -> Dict[str, Dict[str, float]]:
+    """
+    Latest-bar indicator dict for every symbol, computed for the whole universe at once.
+    Output per symbol matches market_tools._calc_indicators(frames[symbol]); symbols without
+    a usable frame get None (callers fill the NaN schema).
+    """
+    syms = list(symbols) if symbols is not None else list(frames.keys())
+    close, vol, first_row = stack_right_aligned(frames, syms)
+    if close.empty:
+        return {s: None for s in syms}
+    return _latest_from(indicator_matrices(close, vol, first_row), syms, first_row)
+
+
+# ---------------- full-history mode ----------------
+
+@dataclass
+class IndicatorHistory:
+    """
+    Every indicator for every bar, columnar: columns[name] is a (dates × symbols) array.
+    signal_score is int8 (0 where a symbol has no bar); `has_bar` marks real bars.
+    `vix` holds 1-D arrays aligned to the same dates (level / chg_1d / zscore, plus the
+    vix_features columns in history mode; `regime` is a string array).
+    """
+    dates: np.ndarray                          # datetime64[ns], shape (T,)
+    symbols: List[str]
+    columns: Dict[str, np.ndarray]
+    has_bar: np.ndarray                        # bool (T, N)
+    vix: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def column(self, name: str) -> pd.DataFrame:
+        return pd.DataFrame(self.columns[name], index=pd.DatetimeIndex(self.dates, name="Date"),
+                            columns=self.symbols)
+
+    def symbol(self, sym: str) -> pd.DataFrame:
+        j = self.symbols.index(sym)
+        df = pd.DataFrame({k: v[:, j] for k, v in self.columns.items()},
+                          index=pd.DatetimeIndex(self.dates, name="Date"))
+        return df[self.has_bar[:, j]]
+
+    def row(self, date) -> int:
+        """Index of the last date <= `date` (point-in-time, no look-ahead); -1 if none."""
+        return int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(date)), side="right")) - 1
+
+    def at(self, date) -> Dict[str, Dict[str, float]]:
+        """
+        Point-in-time view {symbol: indicator dict} as of `date`, i.e. what fetch_market_batch
+        would have returned with end = date + 1 day. Each symbol uses its last bar <= date.
+        """
+        i = self.row(date)
+        out: Dict[str, Dict[str, float]] = {}
+        if i < 0:
+            return out
+        # 各檔最後一根 <= date 的 bar（停牌 / 缺值時往前找）
+        seen = self.has_bar[: i + 1]
+        last_idx = np.where(seen.any(axis=0), i - np.argmax(seen[::-1], axis=0), -1)
+        for j, s in enumerate(self.symbols):
+            r = last_idx[j]
+            if r < 0:
+                continue
+            d = {k: float(self.columns[k][r, j]) for k in INDICATOR_KEYS}
+            d["signal_score"] = int(self.columns["signal_score"][r, j])
+            out[s] = d
+        return out
+
+    def vix_at(self, date) -> Dict[str, float]:
+        i = self.row(date)
+        if i < 0 or not self.vix:
+            return {"level": float("nan"), "chg_1d": float("nan"), "zscore": float("nan")}
+        return {k: (v[i] if v.dtype.kind in "OU" else float(v[i])) for k, v in self.vix.items()}
+
+
+def indicator_history(frames: Dict[str, pd.DataFrame], symbols: Optional[Sequence[str]] = None
+                      ) -> Tuple[IndicatorHistory, Dict[str, Dict[str, float]]]:
+    """
+    One pass over the universe → (full-history IndicatorHistory on the union of dates,
+    latest-bar dicts identical to latest_indicators()).
+    """
+    syms = list(symbols) if symbols is not None else list(frames.keys())
+    close, vol, first_row = stack_right_aligned(frames, syms)
+
+    dates = pd.DatetimeIndex([])
+    for s in syms:
+        df = frames.get(s)
+        if df is not None and not df.empty:
+            dates = dates.union(_naive(df.index))
+    T, N = len(dates), len(syms)
+    cols: Dict[str, np.ndarray] = {k: np.full((T, N), np.nan) for k in INDICATOR_KEYS}
+    cols["signal_score"] = np.zeros((T, N), dtype=np.int8)
+    has_bar = np.zeros((T, N), dtype=bool)
+
+    if close.empty:
+        return IndicatorHistory(dates.to_numpy(), syms, cols, has_bar), {s: None for s in syms}
+
+    mats = indicator_matrices(close, vol, first_row)
+    # 右對齊的列位置 → 日期位置（每檔一次 get_indexer，之後整欄一次 fancy-index 搬移）
+    src_r, dst_r, col_j = [], [], []
+    rows = len(close)
+    for j, s in enumerate(syms):
+        if first_row[j] < 0 or first_row[j] >= rows:
+            continue
+        pos = dates.get_indexer(_naive(frames[s].index))
+        src_r.append(np.arange(first_row[j], rows))
+        dst_r.append(pos)
+        col_j.append(np.full(len(pos), j))
+    if src_r:
+        sr, dr, cj = np.concatenate(src_r), np.concatenate(dst_r), np.concatenate(col_j)
+        for k in INDICATOR_KEYS:
+            cols[k][dr, cj] = mats[k].to_numpy()[sr, cj]
+        has_bar[dr, cj] = True
+    hist = IndicatorHistory(dates.to_numpy(dtype="datetime64[ns]"), syms, cols, has_bar)
+    return hist, _latest_from(mats, syms, first_row)
+
+
+def _naive(idx) -> pd.DatetimeIndex:
+    idx = pd.DatetimeIndex(idx)
+    return idx.tz_localize(None) if idx.tz is not None else idx
@@ -0,0 +1,253 @@
+# src/tools/ta_stream.py
+from __future__ import annotations
+import json
+import math
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Optional
+import pandas as pd
+
+from .ta_engine import INDICATOR_KEYS
+
+# 增量版指標：每根新 bar O(1) 更新，結果與 ta_indicators / _calc_indicators 相同公式
+# （浮點誤差內）。NaN close 直接略過（批次版會把 NaN 列算進 rolling 視窗）。
+
+_NAN = float("nan")
+_RESYNC_EVERY = 1000  # 每 N 次更新從視窗重算 sum/sumsq，避免累積浮點漂移
+
+
+class RollingWindow:
+    """Fixed-size window with running sum / sum of squares."""
+
+    def __init__(self, size: int):
+        self.size = int(size)
+        self.values: deque = deque(maxlen=self.size)
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self._updates = 0
+
+    def push(self, x: float) -> None:
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.sum -= old
+            self.sumsq -= old * old
+        self.values.append(x)
+        self.sum += x
+        self.sumsq += x * x
+        self._updates += 1
+        if self._updates % _RESYNC_EVERY == 0:
+            self.sum = math.fsum(self.values)
+            self.sumsq = math.fsum(v * v for v in self.values)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self, min_periods: Optional[int] = None) -> float:
+        n = len(self.values)
+        if n == 0 or n < (self.size if min_periods is None else min_periods):
+            return _NAN
+        return self.sum / n
+
+    def std(self) -> float:
+        """Population std (ddof=0) over a full window, NaN until full."""
+        if not self.full:
+            return _NAN
+        m = self.sum / self.size
+        return math.sqrt(max(self.sumsq / self.size - m * m, 0.0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"size": self.size, "values": list(self.values)}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "RollingWindow":
+        w = cls(d["size"])
+        for v in d.get("values", []):
+            w.push(float(v))
+        return w
+
+
+class EMAState:
+    """ewm(span, adjust=False).mean(): first value seeds, then alpha*x + (1-alpha)*prev."""
+
+    def __init__(self, span: int, value: Optional[float] = None):
+        self.span = int(span)
+        self.alpha = 2.0 / (self.span + 1.0)
+        self.value = value
+
+    def update(self, x: float) -> float:
+        self.value = x if self.value is None else self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"span": self.span, "value": self.value}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "EMAState":
+        return cls(d["span"], d.get("value"))
+
+
+class RSIState:
+    """Simple-mean RSI as in ta_indicators.rsi (the first bar contributes a zero gain/loss)."""
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self.prev: Optional[float] = None
+        self.gains = RollingWindow(self.period)
+        self.losses = RollingWindow(self.period)
+
+    def update(self, close: float) -> float:
+        delta = 0.0 if self.prev is None else close - self.prev
+        self.prev = close
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if not self.gains.full:
+            return _NAN
+        gain = self.gains.sum / self.period
+        loss = self.losses.sum / self.period
+        rs = gain / (loss if loss != 0 else 1e-9)
+        return 100 - (100 / (1 + rs))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"period": self.period, "prev": self.prev,
+                "gains": self.gains.to_dict(), "losses": self.losses.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "RSIState":
+        st = cls(d["period"])
+        st.prev = d.get("prev")
+        st.gains = RollingWindow.from_dict(d["gains"])
+        st.losses = RollingWindow.from_dict(d["losses"])
+        return st
+
+
+class MACDState:
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast, self.slow, self.signal = EMAState(fast), EMAState(slow), EMAState(signal)
+
+    def update(self, close: float):
+        line = self.fast.update(close) - self.slow.update(close)
+        sig = self.signal.update(line)
+        return line, sig, line - sig
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"fast": self.fast.to_dict(), "slow": self.slow.to_dict(), "signal": self.signal.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "MACDState":
+        st = cls()
+        st.fast, st.slow, st.signal = (EMAState.from_dict(d["fast"]), EMAState.from_dict(d["slow"]),
+                                       EMAState.from_dict(d["signal"]))
+        return st
+
+
+def _signal_score(ma20: float, ma50: float, macd_val: float, macd_sig: float,
+                  macd_hist: float, rsi14: float) -> int:
+    fin = math.isfinite
+    sig_up_ma = fin(ma20) and fin(ma50) and ma20 > ma50
+    sig_macd = fin(macd_val) and fin(macd_sig) and fin(macd_hist) and macd_val > macd_sig and macd_hist > 0
+    sig_rsi = fin(rsi14) and 55 <= rsi14 <= 70
+    return int(sig_up_ma) + int(sig_macd) + int(sig_rsi)
+
+
+class IndicatorState:
+    """
+    Per-symbol incremental state producing the same dict as market_tools._calc_indicators.
+    update() is O(1) per bar; to_dict()/from_dict() make it JSON-serializable across restarts.
+    """
+
+    def __init__(self):
+        self.win20 = RollingWindow(20)   # ma20 (min_periods=1) + Bollinger(20)
+        self.win50 = RollingWindow(50)   # ma50 (min_periods=1)
+        self.rsi = RSIState(14)
+        self.macd = MACDState(12, 26, 9)
+        self.prev_close: Optional[float] = None
+        self.last: Dict[str, Any] = {k: (_NAN if k != "signal_score" else 0) for k in INDICATOR_KEYS}
+
+    def update(self, close: float, volume: float = _NAN) -> Dict[str, Any]:
+        close = float(close)
+        if not math.isfinite(close):
+            return self.last
+        prev = self.prev_close
+        if prev is None:
+            change_pct = _NAN
+        elif prev == 0.0:
+            # 與 pandas pct_change 同：x/0 → ±inf，0/0 → NaN
+            change_pct = math.copysign(math.inf, close) if close != 0.0 else _NAN
+        else:
+            change_pct = close / prev - 1.0
+        self.prev_close = close
+        self.win20.push(close)
+        self.win50.push(close)
+        rsi14 = self.rsi.update(close)
+        macd_val, macd_sig, macd_hist = self.macd.update(close)
+
+        ma20 = self.win20.mean(min_periods=1)
+        ma50 = self.win50.mean(min_periods=1)
+        bb_pos = _NAN
+        if self.win20.full:
+            sd = self.win20.std()
+            up, low = ma20 + 2.0 * sd, ma20 - 2.0 * sd
+            if (up - low) != 0:
+                bb_pos = max(0.0, min(1.0, (close - low) / (up - low)))
+
+        self.last = {
+            "price": close,
+            "change_pct": change_pct,
+            "volume": float(volume),
+            "ma20": ma20,
+            "ma50": ma50,
+            "rsi14": rsi14,
+            "macd": macd_val,
+            "macd_signal": macd_sig,
+            "macd_hist": macd_hist,
+            "bb_pos": bb_pos,
+            "signal_score": _signal_score(ma20, ma50, macd_val, macd_sig, macd_hist, rsi14),
+        }
+        return self.last
+
+    @classmethod
+    def warm(cls, df: pd.DataFrame) -> "IndicatorState":
+        """Bootstrap from an OHLCV history (one-off O(n)), then keep calling update()."""
+        st = cls()
+        vol = df["Volume"] if "Volume" in df.columns else None
+        for i, c in enumerate(df["Close"].to_numpy(dtype=float)):
+            st.update(c, float(vol.iat[i]) if vol is not None else _NAN)
+        return st
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"win20": self.win20.to_dict(), "win50": self.win50.to_dict(),
+                "rsi": self.rsi.to_dict(), "macd": self.macd.to_dict(),
+                "prev_close": self.prev_close, "last": self.last}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "IndicatorState":
+        st = cls()
+        st.win20 = RollingWindow.from_dict(d["win20"])
+        st.win50 = RollingWindow.from_dict(d["win50"])
+        st.rsi = RSIState.from_dict(d["rsi"])
+        st.macd = MACDState.from_dict(d["macd"])
+        st.prev_close = d.get("prev_close")
+        st.last = dict(d.get("last") or st.last)
+        return st
+
+
+def save_states(path: str | Path, states: Dict[str, IndicatorState]) -> None:
+    """Persist {symbol: IndicatorState} as JSON (NaN kept as JSON NaN)."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(json.dumps({s: st.to_dict() for s, st in states.items()}), encoding="utf-8")
+    tmp.replace(p)
+
+
+def load_states(path: str | Path) -> Dict[str, IndicatorState]:
+    p = Path(path)
+    if not p.exists():
+        return {}
+    raw = json.loads(p.read_text(encoding="utf-8"))
+    return {s: IndicatorState.from_dict(d) for s, d in raw.items()}
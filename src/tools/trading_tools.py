@@ -3,13 +3,14 @@ from dataclasses import dataclass
 from typing import Dict
 from langchain.tools import tool
 from ..data.portfolio import Portfolio
+from ..data.ledger import Ledger
 
 @dataclass
 class TradingContext:
-    portfolio: Portfolio
+    portfolio: Portfolio | Ledger
     last_prices: Dict[str, float]
 
-CTX = TradingContext(portfolio=Portfolio(), last_prices={})
+CTX = TradingContext(portfolio=Ledger(), last_prices={})
 
 @tool("buy_stock")
 def buy_stock(symbol: str, amount: int, price: float) -> str:
@@ -28,9 +29,10 @@ def sell_stock(symbol: str, amount: int, price: float) -> str:
 @tool("portfolio_status")
 def portfolio_status() -> dict:
     """Return current cash, positions, equity value, and total account value."""
+    total = CTX.portfolio.value(CTX.last_prices)
     return {
         "cash": CTX.portfolio.cash,
         "positions": CTX.portfolio.positions,
-        "equity_value": sum(CTX.last_prices.get(s, 0.0) * q for s, q in CTX.portfolio.positions.items()),
-        "total_value": CTX.portfolio.value(CTX.last_prices),
+        "equity_value": total - CTX.portfolio.cash,
+        "total_value": total,
     }
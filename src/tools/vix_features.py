@@ -0,0 +1,188 @@
+# src/tools/vix_features.py
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from .analysis_tools import classify_vix_regimes
+
+# Parquet 需要 pyarrow；沒裝就退回 pickle（同 data/ohlcv_cache）
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PARQUET = True
+except Exception:
+    _HAS_PARQUET = False
+
+WINDOWS = (5, 21, 63, 252)
+RETURN_HORIZONS = (1, 5, 21)
+
+
+def _series(x) -> pd.Series:
+    if x is None:
+        return pd.Series(dtype=float)
+    if isinstance(x, pd.DataFrame):
+        x = x["Close"] if "Close" in x.columns else x.iloc[:, 0]
+    s = x.dropna().astype(float)
+    if isinstance(s.index, pd.DatetimeIndex) and s.index.tz is not None:
+        s.index = s.index.tz_localize(None)
+    return s
+
+
+def vix_feature_history(vix_close, vix3m_close=None, windows: Sequence[int] = WINDOWS) -> pd.DataFrame:
+    """
+    Every VIX feature for every date, one vectorized pass:
+      level, chg_1d, ret_{h}d (pct change over h bars),
+      z_{w}   (level vs. rolling mean / population std over w bars; std 0/NaN → 1e-9),
+      pct_{w} (percentile rank of today's level within the trailing w bars, (0, 1]),
+      term_ratio (VIX3M / VIX, >1 ≈ contango; NaN without VIX3M),
+      zscore (= z_21, the 21-bar z-score of market_tools._calc_vix_features), regime.
+    Rolling features are NaN until the window is full.
+    """
+    v = _series(vix_close)
+    out = pd.DataFrame({"level": v})
+    out["chg_1d"] = v.pct_change()
+    for h in RETURN_HORIZONS:
+        out[f"ret_{h}d"] = v.pct_change(h)
+    for w in windows:
+        roll = v.rolling(w)
+        std = roll.std(ddof=0)
+        std_adj = std.where((std != 0) & std.notna(), 1e-9)
+        out[f"z_{w}"] = (v - roll.mean()) / std_adj
+        out[f"pct_{w}"] = roll.rank(pct=True)
+    v3 = _series(vix3m_close)
+    out["term_ratio"] = (v3.reindex(v.index) / v) if not v3.empty else np.nan
+    out["zscore"] = out["z_21"] if "z_21" in out.columns else np.nan
+    out["regime"] = classify_vix_regimes(out["level"].to_numpy(), out["zscore"].to_numpy())
+    out.index.name = "Date"
+    return out
+
+
+class VIXFeatureCache:
+    """
+    Incremental VIX feature store. Only the last max(window) levels (and VIX3M) are kept in
+    memory; extend() computes the new bars against that tail, so a daily run costs O(252)
+    whatever the length of the history.
+
+    With `root`, each extend() appends one chunk of new rows (Parquet, or pickle without
+    pyarrow — as data/ohlcv_cache) and commits it by rewriting meta.json; every
+    `compact_at` chunks are merged into one. `history` reads the chunks back.
+    """
+
+    def __init__(self, root: Optional[str | Path] = None, windows: Sequence[int] = WINDOWS,
+                 *, compact_at: int = 64):
+        self.root = Path(root) if root else None
+        self.windows = tuple(windows)
+        self.compact_at = max(2, int(compact_at))
+        self.rows = 0
+        self._levels = pd.Series(dtype=float)       # 最後 _tail 根
+        self._vix3m = pd.Series(dtype=float)
+        self._last: Optional[pd.Series] = None
+        self._chunks: List[pd.DataFrame] = []       # root=None 時的記憶體 chunk
+        self._files: List[str] = []
+        self._seq = 0
+        if self.root is not None and (self.root / "meta.json").exists():
+            self._load_meta()
+
+    @property
+    def _tail(self) -> int:
+        return max(max(self.windows), max(RETURN_HORIZONS)) + 1
+
+    # ---------- storage ----------
+
+    def _read_chunk(self, name: str) -> pd.DataFrame:
+        fp = self.root / name
+        return pd.read_parquet(fp) if fp.suffix == ".parquet" else pd.read_pickle(fp)
+
+    def _write_chunk(self, df: pd.DataFrame) -> str:
+        self._seq += 1
+        name = f"chunk-{self._seq:06d}" + (".parquet" if _HAS_PARQUET else ".pkl")
+        tmp = self.root / (name + ".tmp")
+        if _HAS_PARQUET:
+            df.to_parquet(tmp)
+        else:
+            df.to_pickle(tmp)
+        tmp.replace(self.root / name)
+        return name
+
+    def _commit(self) -> None:
+        meta = {"windows": list(self.windows), "rows": self.rows, "seq": self._seq,
+                "chunks": self._files}
+        tmp = self.root / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        tmp.replace(self.root / "meta.json")
+
+    def _load_meta(self) -> None:
+        meta = json.loads((self.root / "meta.json").read_text(encoding="utf-8"))
+        if tuple(meta.get("windows") or ()) != self.windows:
+            raise ValueError(f"VIX feature store {self.root} was built with windows {meta.get('windows')}")
+        self._files, self.rows, self._seq = list(meta["chunks"]), int(meta["rows"]), int(meta["seq"])
+        # 從最後的 chunk 往回讀到足夠的 tail 即可
+        parts: List[pd.DataFrame] = []
+        have = 0
+        for name in reversed(self._files):
+            parts.insert(0, self._read_chunk(name))
+            have += len(parts[0])
+            if have >= self._tail:
+                break
+        if parts:
+            tail = pd.concat(parts).iloc[-self._tail:]
+            self._levels = tail["level"]
+            self._vix3m = tail["vix3m"].dropna()
+            self._last = tail.drop(columns="vix3m").iloc[-1]
+
+    def _append(self, chunk: pd.DataFrame) -> None:
+        if self.root is None:
+            self._chunks.append(chunk)
+            if len(self._chunks) > self.compact_at:
+                self._chunks = [pd.concat(self._chunks)]
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._files.append(self._write_chunk(chunk))
+        old: List[str] = []
+        if len(self._files) > self.compact_at:
+            old = self._files
+            self._files = [self._write_chunk(pd.concat([self._read_chunk(n) for n in old]))]
+        self._commit()
+        for name in old:
+            (self.root / name).unlink(missing_ok=True)
+
+    # ---------- public ----------
+
+    def extend(self, vix_close, vix3m_close=None) -> pd.DataFrame:
+        """
+        Add bars newer than the cached ones (older / overlapping bars are ignored) and
+        return the feature rows that were added.
+        """
+        v, v3 = _series(vix_close), _series(vix3m_close)
+        if not self._levels.empty:
+            v = v[v.index > self._levels.index[-1]]
+        if v.empty:
+            return pd.DataFrame()
+        if not v3.empty:
+            self._vix3m = pd.concat([self._vix3m, v3[~v3.index.isin(self._vix3m.index)]]).sort_index()
+        tail = self._levels
+        levels = pd.concat([tail, v]) if not tail.empty else v
+        rows = vix_feature_history(levels, self._vix3m if not self._vix3m.empty else None,
+                                   self.windows).iloc[len(tail):]
+        self.rows += len(rows)
+        self._append(rows.assign(vix3m=self._vix3m.reindex(rows.index)))
+        self._levels = levels.iloc[-self._tail:]
+        self._vix3m = self._vix3m[self._vix3m.index >= self._levels.index[0]]
+        self._last = rows.iloc[-1]
+        return rows
+
+    @property
+    def history(self) -> pd.DataFrame:
+        """Every stored feature row (reads all chunks — for analysis, not the daily path)."""
+        parts = self._chunks if self.root is None else [self._read_chunk(n) for n in self._files]
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts).drop(columns="vix3m")
+
+    def latest(self) -> Dict[str, object]:
+        if self._last is None:
+            return {}
+        row = self._last
+        return {k: (row[k] if k == "regime" else float(row[k])) for k in row.index}
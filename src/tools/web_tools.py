@@ -2,7 +2,9 @@
 from __future__ import annotations
 from dataclasses import dataclass, asdict
 from typing import List, Dict, Any, Optional
-import time, re, requests
+import time, re
+
+from ..utils.http import http_get
 
 # 先嘗試新版 ddgs；沒有就退回舊版 duckduckgo_search
 DDGS = None
@@ -99,7 +101,7 @@ def fetch_url(url: str) -> WebDoc:
     html = None
     try:
         time.sleep(RATE_LIMIT_SEC)
-        resp = requests.get(url, headers=headers, timeout=DEFAULT_TIMEOUT)
+        resp = http_get(url, headers=headers, timeout=DEFAULT_TIMEOUT)
         resp.raise_for_status()
         html = resp.text
     except Exception:
@@ -0,0 +1,176 @@
+# src/utils/http.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+@dataclass(frozen=True)
+class HTTPConfig:
+    pool_connections: int = 4         # urllib3 pools kept per host session (http / https / ports)
+    pool_maxsize: int = 16            # keep-alive connections per host (≈ concurrent threads)
+    timeout: float = 10.0             # default per-request timeout (s)
+    retries: int = 2                  # urllib3 retries on connect errors / retryable status
+    backoff: float = 0.3              # sleep = backoff * 2**(attempt-1)
+    status_forcelist: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    user_agent: Optional[str] = None
+
+
+class HTTPClient:
+    """
+    Thread-safe pooled HTTP client: one keep-alive requests.Session per (scheme, host[:port]).
+
+    Each session mounts an HTTPAdapter with `pool_maxsize` connections and a urllib3 Retry
+    (GET/HEAD only, exponential backoff, `status_forcelist`; the final response is returned
+    rather than raised, so callers keep their own status handling). stats() reports per host
+    how many requests went out and how many TCP/TLS connections were opened for them.
+    """
+
+    def __init__(self, config: Optional[HTTPConfig] = None, **overrides: Any):
+        cfg = config or HTTPConfig()
+        if overrides:
+            cfg = HTTPConfig(**{**cfg.__dict__, **overrides})
+        self.config = cfg
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._requests: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+
+    # ---------- sessions ----------
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        u = urlsplit(url)
+        return f"{u.scheme}://{u.netloc}".lower()
+
+    def _new_session(self) -> requests.Session:
+        cfg = self.config
+        retry = Retry(total=cfg.retries, connect=cfg.retries, read=cfg.retries,
+                      status=cfg.retries, backoff_factor=cfg.backoff,
+                      status_forcelist=cfg.status_forcelist,
+                      allowed_methods=frozenset({"GET", "HEAD"}), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=cfg.pool_connections,
+                              pool_maxsize=cfg.pool_maxsize, max_retries=retry)
+        s = requests.Session()
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+        if cfg.user_agent:
+            s.headers["User-Agent"] = cfg.user_agent
+        return s
+
+    def session(self, url: str) -> requests.Session:
+        key = self.host_key(url)
+        with self._lock:
+            s = self._sessions.get(key)
+            if s is None:
+                s = self._sessions[key] = self._new_session()
+            return s
+
+    # ---------- requests ----------
+
+    def request(self, method: str, url: str, *, timeout: Optional[float] = None,
+                **kwargs: Any) -> requests.Response:
+        key = self.host_key(url)
+        s = self.session(url)
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+        try:
+            return s.request(method, url, timeout=self.config.timeout if timeout is None else timeout,
+                             **kwargs)
+        except Exception:
+            with self._lock:
+                self._errors[key] = self._errors.get(key, 0) + 1
+            raise
+
+    def get(self, url: str, *, timeout: Optional[float] = None, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, timeout=timeout, **kwargs)
+
+    # ---------- stats / lifecycle ----------
+
+    @staticmethod
+    def _pools(s: requests.Session) -> Iterable[Any]:
+        seen = set()
+        for adapter in s.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            pm = getattr(adapter, "poolmanager", None)
+            if pm is not None:
+                yield from (pm.pools[k] for k in list(pm.pools.keys()))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """{host: {requests, connections, reused, errors}} (reused = requests served on a kept-alive connection)."""
+        out: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            items = list(self._sessions.items())
+            reqs, errs = dict(self._requests), dict(self._errors)
+        for key, s in items:
+            conns = sum(int(getattr(p, "num_connections", 0)) for p in self._pools(s))
+            n = reqs.get(key, 0)
+            out[key] = {"requests": n, "connections": conns, "reused": max(0, n - conns),
+                        "errors": errs.get(key, 0)}
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for s in sessions:
+            s.close()
+
+
+# ---------------- process-wide clients ----------------
+
+_CLIENTS: Dict[str, HTTPClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def get_client(name: str = "default", **config: Any) -> HTTPClient:
+    """
+    Shared client by name (config applies when it is first created). Separate names let a
+    caller with its own retry loop (e.g. the Ollama health check) use retries=0.
+    """
+    with _CLIENTS_LOCK:
+        c = _CLIENTS.get(name)
+        if c is None:
+            c = _CLIENTS[name] = HTTPClient(**config)
+        return c
+
+def configure_http(name: str = "default", **config: Any) -> HTTPClient:
+    """Replace the named client with a new configuration (open connections are closed)."""
+    with _CLIENTS_LOCK:
+        old = _CLIENTS.pop(name, None)
+        c = _CLIENTS[name] = HTTPClient(**config)
+    if old is not None:
+        old.close()
+    return c
+
+def http_get(url: str, *, timeout: Optional[float] = None, **kwargs: Any) -> requests.Response:
+    """Drop-in for requests.get through the shared default client."""
+    return get_client().get(url, timeout=timeout, **kwargs)
+
+def http_stats() -> Dict[str, Dict[str, Dict[str, int]]]:
+    with _CLIENTS_LOCK:
+        clients = dict(_CLIENTS)
+    return {name: c.stats() for name, c in clients.items()}
+
+def close_http() -> None:
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for c in clients:
+        c.close()
+
+def _reset_after_fork() -> None:
+    # 子 process 不可共用父 process 的 socket：直接丟掉（不 close，避免關到父的連線）
+    global _CLIENTS_LOCK
+    _CLIENTS_LOCK = threading.Lock()
+    _CLIENTS.clear()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
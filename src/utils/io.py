@@ -1,7 +1,21 @@
 # src/utils/io.py
 from __future__ import annotations
+from datetime import date, datetime
 from pathlib import Path
+from typing import Dict, List, Optional
+import atexit
 import json
+import os
+import threading
+import time
+import weakref
+
+# 跨 process 互斥用 flock；沒有 fcntl（Windows）就只做 process 內的 thread lock
+try:
+    import fcntl
+    _HAS_FCNTL = True
+except ImportError:  # pragma: no cover - platform dependent
+    _HAS_FCNTL = False
 
 def append_jsonl(path: str | Path, obj) -> None:
     """
@@ -12,3 +26,224 @@ def append_jsonl(path: str | Path, obj) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
     with p.open("a", encoding="utf-8") as f:
         f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+
+
+class BufferedJSONLWriter:
+    """
+    Append-only JSONL writer that keeps the file open and writes records in batches.
+
+    - write() only serializes into an in-memory buffer; the buffer is flushed when it
+      reaches `max_buffer_bytes`, when `flush_interval_s` has passed (checked on write and
+      by a background thread), on close() and at interpreter exit.
+    - rotate_bytes / rotate_daily move the current file aside as
+      `<stem>.<YYYY-MM-DD>.<n><suffix>` before a batch that would cross the limit / day.
+    - Thread-safe (lock); process-safe via an exclusive flock around each batch. If another
+      process rotated the file, the handle is reopened (inode check) before writing.
+    """
+
+    def __init__(self, path: str | Path, *, max_buffer_bytes: int = 64 * 1024,
+                 flush_interval_s: float = 1.0, rotate_bytes: Optional[int] = None,
+                 rotate_daily: bool = False):
+        self.path = Path(path)
+        self.max_buffer_bytes = int(max_buffer_bytes)
+        self.flush_interval_s = float(flush_interval_s)
+        self.rotate_bytes = rotate_bytes
+        self.rotate_daily = rotate_daily
+        self._lock = threading.RLock()
+        self._buf: List[str] = []
+        self._buf_bytes = 0
+        self._fh = None
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushes = 0
+        _LIVE.add(self)
+
+    # ---------- public ----------
+
+    def write(self, obj) -> None:
+        line = json.dumps(obj, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"writer for {self.path} is closed")
+            self._buf.append(line)
+            self._buf_bytes += len(line.encode("utf-8"))   # 以位元組計：中文一字 3 bytes
+            due = (self._buf_bytes >= self.max_buffer_bytes
+                   or time.monotonic() - self._last_flush >= self.flush_interval_s)
+            if due:
+                self._flush_locked()
+            elif self._thread is None and self.flush_interval_s > 0:
+                self._start_timer()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+            self._stop.set()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def __enter__(self) -> "BufferedJSONLWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        # 沒有 close() 就被回收：把緩衝寫出，避免遺失
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    # ---------- internals ----------
+
+    def _start_timer(self) -> None:
+        # closure 只持有 weakref：writer 被回收後 thread 隨之結束，不會讓 writer 永遠存活
+        ref = weakref.ref(self)
+        stop = self._stop
+        interval = self.flush_interval_s
+
+        def _loop() -> None:
+            while not stop.wait(interval):
+                w = ref()
+                if w is None:
+                    return
+                w.flush()
+                del w
+
+        self._thread = threading.Thread(target=_loop, name=f"jsonl-flush:{self.path.name}", daemon=True)
+        self._thread.start()
+        weakref.finalize(self, stop.set)
+
+    def _open(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("a", encoding="utf-8")
+
+    def _stale(self) -> bool:
+        """True if the path no longer points at our open file (rotated / removed elsewhere)."""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._fh.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _lock_file(self) -> None:
+        # 拿到鎖後再確認一次 inode：等鎖期間可能被別的 process 輪替
+        while True:
+            if self._fh is None or self._stale():
+                self._open()
+            if not _HAS_FCNTL:
+                return
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+            if not self._stale():
+                return
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+
+    def _unlock_file(self) -> None:
+        if _HAS_FCNTL and self._fh is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+
+    def _rotate_target(self, day: date) -> Path:
+        n = 1
+        while True:
+            p = self.path.with_name(f"{self.path.stem}.{day.isoformat()}.{n}{self.path.suffix}")
+            if not p.exists():
+                return p
+            n += 1
+
+    def _maybe_rotate(self, incoming: int) -> None:
+        st = os.fstat(self._fh.fileno())
+        if st.st_size == 0:
+            return
+        file_day = datetime.fromtimestamp(st.st_mtime).date()
+        by_day = self.rotate_daily and file_day != date.today()
+        by_size = self.rotate_bytes is not None and st.st_size + incoming > self.rotate_bytes
+        if not (by_day or by_size):
+            return
+        os.replace(self.path, self._rotate_target(file_day))
+        old = self._fh
+        self._fh = self.path.open("a", encoding="utf-8")
+        if _HAS_FCNTL:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+            fcntl.flock(old.fileno(), fcntl.LOCK_UN)
+        old.close()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buf:
+            return
+        data = "".join(self._buf)
+        self._lock_file()
+        try:
+            if self.rotate_bytes is not None or self.rotate_daily:
+                self._maybe_rotate(len(data.encode("utf-8")))
+            self._fh.write(data)
+            self._fh.flush()
+        finally:
+            self._unlock_file()
+        self._buf.clear()
+        self._buf_bytes = 0
+        self.flushes += 1
+
+    def _after_fork(self) -> None:
+        # 子 process：父 process 會自己 flush 緩衝，子 process 從空緩衝重新開始
+        self._lock = threading.RLock()
+        self._buf, self._buf_bytes = [], 0
+        self._fh = None
+        self._stop = threading.Event()
+        self._thread = None
+
+
+_LIVE: "weakref.WeakSet[BufferedJSONLWriter]" = weakref.WeakSet()
+_WRITERS: Dict[str, BufferedJSONLWriter] = {}
+_WRITERS_LOCK = threading.Lock()
+
+def get_writer(path: str | Path, **kwargs) -> BufferedJSONLWriter:
+    """Process-wide shared writer per file path (kwargs apply when it is first created)."""
+    key = str(Path(path).resolve())
+    with _WRITERS_LOCK:
+        w = _WRITERS.get(key)
+        if w is None or w._closed:
+            w = _WRITERS[key] = BufferedJSONLWriter(path, **kwargs)
+        return w
+
+def flush_writers() -> None:
+    """
+    Flush every live writer. Pool workers exit without running atexit hooks, so call
+    this at the end of each unit of work that runs in a worker process.
+    """
+    for w in list(_LIVE):
+        try:
+            w.flush()
+        except Exception:
+            pass
+
+def close_writers() -> None:
+    """Flush and close every live writer (also runs at interpreter exit)."""
+    for w in list(_LIVE):
+        try:
+            w.close()
+        except Exception:
+            pass
+    with _WRITERS_LOCK:
+        _WRITERS.clear()
+
+def _reset_after_fork() -> None:
+    global _WRITERS_LOCK
+    _WRITERS_LOCK = threading.Lock()
+    for w in list(_LIVE):
+        w._after_fork()
+
+atexit.register(close_writers)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
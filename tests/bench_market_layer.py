@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Market-layer micro-benchmarks on synthetic universes (offline, no yfinance).
+
+    python tests/bench_market_layer.py                    # default grid, compare with baseline
+    python tests/bench_market_layer.py --quick            # 10 / 100 symbols × 1y (smoke run)
+    python tests/bench_market_layer.py --full             # adds 5,000 symbols × 10y
+    python tests/bench_market_layer.py --update-baseline  # rewrite tests/bench_baseline.json
+
+Times _calc_indicators, fetch_market_batch (latest / history; data source = in-memory
+PricePanel via PanelProvider), _calc_vix_features / vix_feature_history and the ranking
+helpers (SignalIndex top-k, batched trend / risk). Reports best-of-N wall time, throughput
+and tracemalloc peak; exits 1 when a case is slower than baseline × --tolerance (or its
+peak memory grew past --mem-tolerance). Baselines are machine specific: refresh them with
+--update-baseline on the machine that runs the comparison.
+"""
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import argparse
+import gc
+import json
+import platform
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+from src.data import market_data
+from src.data.panel import PricePanel
+from src.data.providers import PanelProvider
+from src.tools.analysis_tools import universe_risk_scores, universe_trends
+from src.tools.market_tools import _calc_indicators, _calc_vix_features, load_market_batch, load_market_history
+from src.tools.screening import SignalIndex
+from src.tools.vix_features import vix_feature_history
+
+BASELINE_PATH = ROOT / "tests" / "bench_baseline.json"
+END = "2024-12-31"
+QUICK = [(10, 1), (100, 1)]
+DEFAULT = [(10, 1), (10, 10), (100, 1), (100, 10), (1000, 1), (1000, 10), (5000, 1)]
+FULL = DEFAULT + [(5000, 10)]
+CALC_SAMPLE = 200          # _calc_indicators 是逐檔函式：取前 N 檔量測單檔吞吐量
+
+
+# ---------------- synthetic data ----------------
+
+def _mean_reverting(rng: np.random.Generator, n: int, mean: float, kappa: float, vol: float) -> np.ndarray:
+    out = np.empty(n)
+    lvl = mean
+    for i, e in enumerate(rng.standard_normal(n)):
+        lvl = max(9.0, lvl + kappa * (mean - lvl) + vol * e)
+        out[i] = lvl
+    return out
+
+def synthetic_panel(n_symbols: int, years: int, seed: int = 0) -> PricePanel:
+    """Random-walk OHLCV for S0000..S{n-1} plus ^VIX / ^VIX3M on `years`×252 business days."""
+    rng = np.random.default_rng([seed, n_symbols, years])
+    dates = pd.bdate_range(end=END, periods=252 * years)
+    t = len(dates)
+    close = (20.0 + 480.0 * rng.random(n_symbols)) * np.exp(
+        np.cumsum(rng.normal(0.0003, 0.02, (t, n_symbols)), axis=0))
+    close[: t // 4, ::10] = np.nan                 # 每 10 檔有一檔較晚上市
+    spread = np.abs(rng.normal(0.0, 0.01, (t, n_symbols)))
+    fields = {
+        "Open": close * (1 + rng.normal(0.0, 0.005, (t, n_symbols))),
+        "High": close * (1 + spread),
+        "Low": close * (1 - spread),
+        "Close": close,
+        "Volume": np.where(np.isnan(close), np.nan, rng.integers(1e5, 1e8, (t, n_symbols)).astype(float)),
+    }
+    vix = _mean_reverting(rng, t, 18.0, 0.05, 1.2)
+    vix3m = _mean_reverting(rng, t, 20.0, 0.03, 0.8)
+    for k, a in fields.items():
+        extra = np.column_stack([vix, vix3m]) if k != "Volume" else np.zeros((t, 2))
+        fields[k] = np.ascontiguousarray(np.hstack([a, extra]))
+    syms = [f"S{i:04d}" for i in range(n_symbols)] + ["^VIX", "^VIX3M"]
+    return PricePanel(dates=dates.to_numpy(), symbols=syms, fields=fields,
+                      start=str(dates[0].date()), end=END)
+
+
+# ---------------- measurement ----------------
+
+def _best_time(fn: Callable[[], Any], repeat: int) -> float:
+    fn()                                            # warm-up (imports, caches)
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def _peak_mb(fn: Callable[[], Any]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+def _measure(name: str, fn: Callable[[], Any], work: float, unit: str, repeat: int) -> Dict[str, Any]:
+    sec = _best_time(fn, repeat)
+    return {"name": name, "seconds": sec, "peak_mb": _peak_mb(fn),
+            "throughput": work / sec if sec > 0 else float("inf"), "unit": unit}
+
+
+def bench_case(n: int, years: int, repeat: int) -> List[Dict[str, Any]]:
+    panel = synthetic_panel(n, years)
+    syms = panel.symbols[:n]
+    start = str(pd.Timestamp(panel.dates[0]).date())
+    end = str((pd.Timestamp(END) + pd.Timedelta(days=1)).date())   # end 為開區間
+    bars = n * len(panel.dates)
+    coalescer = market_data.get_coalescer()
+    prev = market_data.get_provider()
+    market_data.set_provider(PanelProvider(panel))
+    try:
+        frames = {s: panel.frame(s) for s in syms[:CALC_SAMPLE]}
+
+        def calc():
+            for df in frames.values():
+                _calc_indicators(df)
+
+        def fetch(mode: str) -> Callable[[], Dict[str, Any]]:
+            def run():
+                coalescer.clear()                   # 每次都從資料源重取（含 ^VIX）
+                load = load_market_history if mode == "history" else load_market_batch
+                return load(syms, start, end)
+            return run
+
+        stocks = fetch("latest")()["stocks"]
+
+        def rank():
+            SignalIndex.from_stocks(stocks).top_k(10)
+
+        def trend_risk():
+            universe_trends(stocks)
+            universe_risk_scores(stocks)
+
+        tag = f"{n}x{years}y"
+        sample = len(frames) * len(panel.dates)
+        return [
+            _measure(f"{tag}/calc_indicators", calc, sample, "bars/s", repeat),
+            _measure(f"{tag}/fetch_latest", fetch("latest"), bars, "bars/s", repeat),
+            _measure(f"{tag}/fetch_history", fetch("history"), bars, "bars/s", max(1, repeat // 2)),
+            _measure(f"{tag}/rank_topk", rank, n, "symbols/s", repeat),
+            _measure(f"{tag}/trend_risk", trend_risk, n, "symbols/s", repeat),
+        ]
+    finally:
+        market_data.set_provider(prev)
+        coalescer.clear()
+
+
+def bench_vix(years: int, repeat: int) -> List[Dict[str, Any]]:
+    panel = synthetic_panel(1, years)
+    vix = pd.Series(panel.fields["Close"][:, -2], index=pd.DatetimeIndex(panel.dates))
+    vix3m = pd.Series(panel.fields["Close"][:, -1], index=pd.DatetimeIndex(panel.dates))
+    t = len(vix)
+    return [
+        _measure(f"vix{years}y/calc_vix_features", lambda: _calc_vix_features(vix), t, "bars/s", repeat),
+        _measure(f"vix{years}y/vix_feature_history", lambda: vix_feature_history(vix, vix3m), t,
+                 "bars/s", repeat),
+    ]
+
+
+# ---------------- baseline ----------------
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float,
+            mem_tolerance: float) -> List[Tuple[str, str]]:
+    """(case, reason) for every regression against `baseline['results']`."""
+    base = baseline.get("results", {})
+    out = []
+    for r in results:
+        b = base.get(r["name"])
+        if not b:
+            continue
+        # 絕對門檻避免微秒級量測雜訊誤報
+        if r["seconds"] > b["seconds"] * tolerance and r["seconds"] - b["seconds"] > 2e-3:
+            out.append((r["name"], f"time {r['seconds']*1e3:.2f} ms vs {b['seconds']*1e3:.2f} ms"))
+        if r["peak_mb"] > b["peak_mb"] * mem_tolerance and r["peak_mb"] - b["peak_mb"] > 1.0:
+            out.append((r["name"], f"peak {r['peak_mb']:.1f} MiB vs {b['peak_mb']:.1f} MiB"))
+    return out
+
+def _meta() -> Dict[str, str]:
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "created": time.strftime("%Y-%m-%d")}
+
+def _fmt(r: Dict[str, Any], base: Dict[str, Any]) -> str:
+    b = base.get(r["name"])
+    ratio = f"{r['seconds'] / b['seconds']:6.2f}x" if b and b["seconds"] > 0 else "     - "
+    return (f"{r['name']:<34} {r['seconds']*1e3:10.2f} ms  {r['throughput']:12.3g} {r['unit']:<10}"
+            f" {r['peak_mb']:9.1f} MiB  {ratio}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    grid = ap.add_mutually_exclusive_group()
+    grid.add_argument("--quick", action="store_true")
+    grid.add_argument("--full", action="store_true")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--baseline", default=str(BASELINE_PATH))
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=1.5, help="max time ratio vs baseline")
+    ap.add_argument("--mem-tolerance", type=float, default=1.25, help="max peak-memory ratio")
+    ap.add_argument("--json", help="also write the results here")
+    args = ap.parse_args(argv)
+
+    cases = QUICK if args.quick else FULL if args.full else DEFAULT
+    bpath = Path(args.baseline)
+    baseline = json.loads(bpath.read_text(encoding="utf-8")) if bpath.exists() else {}
+    base = baseline.get("results", {})
+
+    results: List[Dict[str, Any]] = []
+    for years in sorted({y for _, y in cases}):
+        results += bench_vix(years, args.repeat)
+    for n, years in cases:
+        results += bench_case(n, years, args.repeat)
+    for r in results:
+        print(_fmt(r, base))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"meta": _meta(), "results": results}, indent=2),
+                                   encoding="utf-8")
+    if args.update_baseline:
+        merged = dict(base)
+        merged.update({r["name"]: {"seconds": r["seconds"], "peak_mb": r["peak_mb"]} for r in results})
+        bpath.write_text(json.dumps({"meta": _meta(), "results": dict(sorted(merged.items()))},
+                                    indent=2) + "\n", encoding="utf-8")
+        print(f"[BENCH] baseline written: {bpath}")
+        return 0
+    if not base:
+        print("[BENCH] no baseline to compare against (run with --update-baseline)")
+        return 0
+    bad = compare(results, baseline, args.tolerance, args.mem_tolerance)
+    for name, why in bad:
+        print(f"[REGRESSION] {name}: {why}")
+    print(f"[BENCH] {len(results)} cases, {len(bad)} regressions")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,29 @@ SCRIPTS = [
     "tests/test_01_market_batch_vix.py",
     "tests/test_02_discussion_rounds.py",
     "tests/test_03_trading_cycle_e2e.py",
+    "tests/test_05_ohlcv_cache.py",
+    "tests/test_06_provider_offline.py",
+    "tests/test_07_ta_engine.py",
+    "tests/test_08_ta_stream.py",
+    "tests/test_09_compact.py",
+    "tests/test_10_backtest.py",
+    "tests/test_11_parallel_backtest.py",
+    "tests/test_12_screening.py",
+    "tests/test_13_vix_features.py",
+    "tests/test_14_ledger.py",
+    "tests/test_15_jsonl_writer.py",
+    "tests/test_16_trade_store.py",
+    "tests/test_17_risk_batch.py",
+    "tests/test_18_trend_batch.py",
+    "tests/test_20_llm_pool.py",
+    "tests/test_21_http_pool.py",
+    "tests/test_22_llm_cache.py",
+    "tests/test_23_prompt_builder.py",
+    "tests/test_24_stream_stance.py",
+    "tests/test_25_round_scheduler.py",
+    "tests/test_26_price_panel.py",
+    "tests/test_27_coalesce.py",
+    "tests/test_28_batched_download.py",
 ]
 
 def run(cmd):
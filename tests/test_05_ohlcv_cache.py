@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import tempfile
+import numpy as np
+import pandas as pd
+from src.data.ohlcv_cache import OHLCVCache
+
+CALLS = []
+
+def _fake_fetch(symbol, start, end, interval, auto_adjust):
+    """離線假資料：每個交易日一根 bar，Close = 日期序號。"""
+    CALLS.append((symbol, start, end))
+    idx = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1), name="Date")
+    close = np.array([d.toordinal() % 1000 for d in idx], dtype=float)
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                         "Adj Close": close, "Volume": 1000.0}, index=idx)
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = OHLCVCache(tmp)
+
+        # 1) cold: whole window
+        df = cache.get("AAPL", "2024-01-01", "2024-03-01", "1d", False, _fake_fetch)
+        assert CALLS == [("AAPL", "2024-01-01", "2024-03-01")]
+        assert len(df) == len(pd.bdate_range("2024-01-01", "2024-02-29"))
+
+        # 2) warm, same window: no download
+        df2 = cache.get("AAPL", "2024-01-01", "2024-03-01", "1d", False, _fake_fetch)
+        assert len(CALLS) == 1 and df2.equals(df)
+
+        # 3) window slid forward by one day: only the tail is fetched
+        df3 = cache.get("AAPL", "2024-01-02", "2024-03-02", "1d", False, _fake_fetch)
+        assert CALLS[-1] == ("AAPL", "2024-03-01", "2024-03-02"), CALLS[-1]
+        assert df3.index[-1] == pd.Timestamp("2024-03-01")
+        assert df3.index[0] == pd.Timestamp("2024-01-02")
+        # data / meta 都經暫存檔 replace，不留下 .tmp
+        assert not list(Path(tmp).glob("*.tmp")) and len(list(Path(tmp).glob("*.json"))) == 1
+
+        # 3b) 上市前的 head 沒有 bar：下載成功但為空 → 記為已覆蓋，不再重抓；失敗（None）則不記
+        def _listed(symbol, start, end, interval, auto_adjust):
+            df = _fake_fetch(symbol, start, end, interval, auto_adjust)
+            return df.loc["2024-02-01":]
+        cache.get("NEW", "2024-02-01", "2024-03-01", "1d", False, _listed)
+        n = len(CALLS)
+        cache.get("NEW", "2024-01-01", "2024-03-01", "1d", False, _listed)
+        assert CALLS[-1] == ("NEW", "2024-01-01", "2024-02-01") and len(CALLS) == n + 1
+        head = cache.get("NEW", "2024-01-01", "2024-03-01", "1d", False, _listed)
+        assert len(CALLS) == n + 1 and head.index[0] == pd.Timestamp("2024-02-01")
+        assert cache.missing("NEW", "2024-01-01", "2024-03-01") == []
+        cache.merge("NEW", None, "2023-01-01", "2024-01-01")
+        assert cache.missing("NEW", "2023-06-01", "2024-03-01") == [("2023-06-01", "2024-01-01")]
+
+        # 3c) 完全沒有資料的 symbol（下市）：只發一次請求，之後由覆蓋區間直接回空表
+        def _gone(symbol, start, end, interval, auto_adjust):
+            CALLS.append((symbol, start, end))
+            return pd.DataFrame()
+        n = len(CALLS)
+        assert cache.get("GONE", "2024-01-01", "2024-03-01", "1d", False, _gone).empty
+        assert cache.get("GONE", "2024-01-01", "2024-03-01", "1d", False, _gone).empty
+        assert len(CALLS) == n + 1
+
+        # 4) explicit invalidation forces a full refetch
+        assert cache.invalidate("AAPL") == 1
+        cache.get("AAPL", "2024-01-02", "2024-03-02", "1d", False, _fake_fetch)
+        assert CALLS[-1] == ("AAPL", "2024-01-02", "2024-03-02")
+
+    print(f"[CACHE] downloads = {len(CALLS)}")
+    print("[CACHE] OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import json
+import math
+import tempfile
+from src.data import market_data
+from src.data.providers import MarketDataProvider, SyntheticProvider, RecordingProvider, ReplayProvider
+from src.tools.market_tools import fetch_market_batch
+
+def _batch(symbols, start, end):
+    return fetch_market_batch.invoke({"symbols": symbols, "start": start, "end": end})
+
+def main():
+    symbols = [f"SYN{i:03d}" for i in range(100)]
+    start, end = "2023-01-01", "2023-07-01"
+
+    # 1) synthetic: reproducible, network-free
+    market_data.set_provider(SyntheticProvider(seed=7))
+    a = _batch(symbols, start, end)
+    market_data.set_provider(SyntheticProvider(seed=7))
+    b = _batch(symbols, start, end)
+    assert set(a["stocks"]) == set(symbols)
+    assert "errors" not in a, a.get("errors")
+    assert a["stocks"]["SYN042"]["price"] == b["stocks"]["SYN042"]["price"]
+    assert math.isfinite(a["VIX"]["level"]), a["VIX"]
+    # LLM 看到的 tool schema 只有 symbols/start/end，回傳可 JSON 序列化
+    assert set(fetch_market_batch.args) == {"symbols", "start", "end"}
+    json.dumps(a)
+    from src.tools.sentiment_tools import vix_term_structure
+    term = vix_term_structure()
+    assert term["source"] == "synthetic" and term["ratio"] is not None, term
+    print(f"[SYNTH] SYN042 = {a['stocks']['SYN042']}")
+
+    # 2) record → replay round trip
+    with tempfile.TemporaryDirectory() as tmp:
+        market_data.set_provider(RecordingProvider(SyntheticProvider(seed=7), tmp))
+        _batch(symbols[:5], start, end)
+        market_data.set_provider(ReplayProvider(tmp))
+        c = _batch(symbols[:5], start, end)
+    for s in symbols[:5]:
+        assert abs(c["stocks"][s]["price"] - a["stocks"][s]["price"]) < 1e-6
+    assert abs(c["VIX"]["level"] - a["VIX"]["level"]) < 1e-6
+    print("[REPLAY] fixtures match live synthetic run")
+    # 沒實作 history() 的 backend 在建構時就失敗，而不是跑到一半
+    class _Incomplete(MarketDataProvider):
+        name = "incomplete"
+    try:
+        _Incomplete()
+        raise AssertionError("expected TypeError")
+    except TypeError:
+        pass
+    print("[PROVIDER] OK")
+
+if __name__ == "__main__":
+    main()
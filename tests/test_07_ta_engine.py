@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import math
+import numpy as np
+from src.data import market_data
+from src.data.providers import SyntheticProvider
+from src.tools.market_tools import _calc_indicators, fetch_market_batch, load_market_history
+from src.tools.ta_engine import latest_indicators
+
+def _same(x, y) -> bool:
+    return x == y or (isinstance(x, float) and math.isnan(x) and math.isnan(y))
+
+def main():
+    # 各種長度（含 < 14 根、空 frame、中間缺值）都要與逐檔計算完全一致
+    provider = SyntheticProvider(seed=3)
+    frames = {}
+    for i in range(120):
+        df = provider.history(f"S{i:03d}", "2023-01-01", "2024-01-01").iloc[(i * 2) % 250:]
+        if i % 7 == 0 and len(df) > 2:
+            df = df.copy()
+            df.iloc[len(df) // 2, df.columns.get_loc("Close")] = np.nan
+        frames[f"S{i:03d}"] = df
+    frames["EMPTY"] = frames["S001"].iloc[:0]
+
+    vec = latest_indicators(frames)
+    for s, df in frames.items():
+        ref = _calc_indicators(df)
+        for k, v in ref.items():
+            assert _same(v, vec[s][k]), (s, k, v, vec[s][k])
+        assert isinstance(vec[s]["signal_score"], int)
+    print(f"[TA-ENGINE] {len(frames)} symbols match _calc_indicators")
+
+    # history mode: 任一天的切片 == 當天收盤後跑 latest 模式（無 look-ahead）
+    market_data.set_provider(SyntheticProvider(seed=5))
+    syms = [f"H{i:02d}" for i in range(20)]
+    full = load_market_history(syms, "2023-01-01", "2023-12-01")
+    hist = full["history"]
+    ref = fetch_market_batch.invoke({"symbols": syms, "start": "2023-01-01", "end": "2023-06-16"})
+    pit = hist.at("2023-06-15")
+    for s in syms:
+        for k, v in ref["stocks"][s].items():
+            assert _same(v, pit[s][k]), (s, k, v, pit[s][k])
+    assert _same(ref["VIX"]["zscore"], hist.vix_at("2023-06-15")["zscore"])
+    print(f"[TA-ENGINE] history {hist.columns['signal_score'].shape} point-in-time OK")
+    print("[TA-ENGINE] OK")
+
+if __name__ == "__main__":
+    main()
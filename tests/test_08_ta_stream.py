@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import math
+import tempfile
+from src.data.providers import SyntheticProvider
+from src.tools.market_tools import _calc_indicators
+from src.tools.ta_stream import IndicatorState, save_states, load_states
+
+def _close(x, y, tol=1e-9) -> bool:
+    if x == y:
+        return True                 # 含 ±inf
+    if isinstance(x, float) and math.isnan(x):
+        return isinstance(y, float) and math.isnan(y)
+    return abs(x - y) <= tol * max(1.0, abs(x))
+
+def main():
+    df = SyntheticProvider(seed=11).history("STREAM", "2022-01-01", "2024-01-01")
+    warm, tail = df.iloc[:300], df.iloc[300:]
+
+    st = IndicatorState.warm(warm)
+    with tempfile.TemporaryDirectory() as tmp:
+        # 重啟後從檔案還原再續算
+        save_states(Path(tmp) / "states.json", {"STREAM": st})
+        st = load_states(Path(tmp) / "states.json")["STREAM"]
+
+    for i in range(len(tail)):
+        got = st.update(tail["Close"].iat[i], tail["Volume"].iat[i])
+        if i % 25 == 0 or i == len(tail) - 1:
+            ref = _calc_indicators(df.iloc[: 300 + i + 1])
+            for k, v in ref.items():
+                assert _close(v, got[k]), (i, k, v, got[k])
+
+    # 前收盤為 0：與批次 pct_change 一致（x/0 → inf，0/0 → NaN），不當成「沒有前收盤」
+    z = df.iloc[:60].copy()
+    z.iloc[40, z.columns.get_loc("Close")] = 0.0
+    z.iloc[41, z.columns.get_loc("Close")] = 0.0
+    zs = IndicatorState()
+    for i in range(len(z)):
+        out = zs.update(z["Close"].iat[i], z["Volume"].iat[i])
+        if 40 <= i <= 43:
+            ref = _calc_indicators(z.iloc[: i + 1])["change_pct"]
+            assert _close(ref, out["change_pct"]), (i, ref, out["change_pct"])
+    assert math.isnan(IndicatorState().update(0.0)["change_pct"])
+    print(f"[TA-STREAM] last = {got}")
+    print("[TA-STREAM] OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import math
+import tempfile
+import numpy as np
+from src.data import market_data
+from src.data.panel import PricePanel
+from src.data.providers import SyntheticProvider
+from src.tools.market_tools import fetch_market_batch, load_market_batch, load_market_history
+from src.tools.compact import CompactIndicatorTable, IndicatorRecord
+
+REL = 2.0 ** -24  # float32 rounding (tools/compact.py)
+
+def _close(x, y, key) -> bool:
+    if isinstance(x, float) and math.isnan(x):
+        return math.isnan(y)
+    if key == "volume":
+        return x == y
+    return abs(x - y) <= max(abs(x) * REL, 1e-7)
+
+def _nbytes(panel) -> int:
+    return sum(a.nbytes for a in panel.fields.values())
+
+def main():
+    market_data.set_provider(SyntheticProvider(seed=9))
+    syms = [f"C{i:03d}" for i in range(200)]
+    args = {"symbols": syms, "start": "2022-01-01", "end": "2023-12-01"}
+    ref = fetch_market_batch.invoke(args)
+    cmp_ = load_market_batch(**args, compact=True)
+    table = cmp_["stocks"]
+    assert isinstance(table, CompactIndicatorTable) and len(table) == len(syms)
+    for s in syms:
+        rec = table[s]
+        assert isinstance(rec, IndicatorRecord) and list(rec.keys()) == list(ref["stocks"][s].keys())
+        for k, v in ref["stocks"][s].items():
+            assert _close(v, rec.get(k), k), (s, k, v, rec.get(k))
+        assert rec["signal_score"] == ref["stocks"][s]["signal_score"]
+    assert not hasattr(table[syms[0]], "__dict__")
+
+    # 記憶體：陣列版 vs. dict-of-floats
+    dict_bytes = sum(sys.getsizeof(d) + sum(sys.getsizeof(v) for v in d.values())
+                     for d in ref["stocks"].values())
+    print(f"[COMPACT] stocks {dict_bytes} B as dicts -> {table.nbytes} B as arrays")
+    assert table.nbytes * 4 < dict_bytes
+
+    hist = load_market_history(**args, compact=True)["history"]
+    assert hist.columns["rsi14"].dtype == np.float32 and hist.columns["volume"].dtype == np.int64
+    pit = hist.at("2023-11-30")
+    for s in syms[:20]:
+        for k, v in ref["stocks"][s].items():
+            assert _close(v, pit[s][k], k), (s, k, v, pit[s][k])
+
+    # compact panel：float32 價格、int64 成交量，大小約減半
+    frames = market_data.get_multi_prices(syms, "2022-01-01", "2023-12-01")
+    full = PricePanel.from_frames(frames, syms)
+    small = PricePanel.from_frames(frames, syms, compact=True)
+    assert small.fields["Close"].dtype == np.float32 and small.fields["Volume"].dtype == np.int64
+    with tempfile.TemporaryDirectory() as d:
+        back = PricePanel.load(small.save(d))
+        f0, f1 = full.frame(syms[0]), back.frame(syms[0])
+        assert np.allclose(f0["Close"], f1["Close"], rtol=REL, atol=0)
+        assert (f0["Volume"].to_numpy() == f1["Volume"].to_numpy()).all()
+    print(f"[COMPACT] panel {_nbytes(full)} B -> {_nbytes(small)} B")
+    print("[COMPACT] OK")
+
+if __name__ == "__main__":
+    main()
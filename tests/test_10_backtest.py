@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import json
+from src.data import market_data
+from src.data.providers import SyntheticProvider
+from src.orchestrator.backtest import backtest_from_config, static_discussion
+
+class CountingProvider(SyntheticProvider):
+    calls = 0
+
+    def history(self, *a, **kw):
+        CountingProvider.calls += 1
+        return super().history(*a, **kw)
+
+def main():
+    market_data.set_provider(CountingProvider(seed=11))
+    cfg = json.loads((ROOT / "config" / "config.json").read_text(encoding="utf-8"))
+    cfg["universe"] = cfg["universe"][:15]
+    cfg["date_range"] = {"start": "2023-03-01", "end": "2023-05-31"}
+
+    res = backtest_from_config(cfg, discuss=static_discussion("bullish"))
+    print("[BACKTEST]", res.summary())
+    # 每檔 + ^VIX / ^VIX3M 各只抓一次，之後逐日切片
+    assert CountingProvider.calls <= len(cfg["universe"]) + 2, CountingProvider.calls
+    assert len(res.equity) == len(res.decisions) > 55
+    assert str(res.equity.index[0].date()) >= "2023-03-01" and str(res.equity.index[-1].date()) <= "2023-05-31"
+    assert res.equity.iloc[0] <= cfg["initial_cash"] + 1e-6
+    assert res.portfolio.cash >= 0
+    # 部位上限：第一天成交時帳戶價值 == initial_cash
+    first = [t for t in res.trades if t["date"] == res.trades[0]["date"]]
+    cash0 = cfg["initial_cash"]
+    assert all(t["qty"] * t["price"] <= cfg["position_limit_per_stock"] * cash0 for t in first)
+    assert sum(t["qty"] * t["price"] for t in first) <= cfg["position_limit_total"] * cash0
+
+    again = backtest_from_config(cfg, discuss=static_discussion("bullish"))
+    assert again.equity.equals(res.equity) and again.trades == res.trades
+
+    flat = backtest_from_config(cfg, discuss=static_discussion("bearish"))
+    assert not flat.trades and (flat.equity == cfg["initial_cash"]).all()
+    print("[BACKTEST] OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import json
+import tempfile
+from src.data import market_data
+from src.data.providers import SyntheticProvider
+from src.llm.replay import RecordedLLM, normalize_prompt, prompt_key
+from src.orchestrator.parallel import make_jobs, run_parallel, shard_dates
+
+def main():
+    # 回放 key 忽略 TIME(UTC) 行
+    a = "TIME(UTC): 2024-01-01T00:00:00Z\nGOAL: x"
+    b = "TIME(UTC): 2025-06-30T12:00:00Z\nGOAL: x"
+    assert normalize_prompt(a) == "GOAL: x" and prompt_key(a) == prompt_key(b)
+    llm = RecordedLLM(responses={prompt_key(a): "Final Stance: bearish"}, strict=True)
+    assert llm.invoke(b).content == "Final Stance: bearish"
+    try:
+        llm.invoke("GOAL: other")
+        raise AssertionError("strict replay should raise on a miss")
+    except KeyError:
+        pass
+
+    shards = shard_dates("2023-01-01", "2023-03-31", 4)
+    assert shards[0][0] == "2023-01-01" and shards[-1][1] == "2023-03-31" and len(shards) == 4
+    assert all(x[1] < y[0] for x, y in zip(shards, shards[1:]))
+
+    market_data.set_provider(SyntheticProvider(seed=21))
+    cfg = json.loads((ROOT / "config" / "config.json").read_text(encoding="utf-8"))
+    jobs = make_jobs([cfg["universe"][:8], cfg["universe"][8:14]], [("2023-01-01", "2023-03-31")],
+                     [{"discussion_rounds": 1}, {"stance": "bullish", "position_limit_per_stock": 0.1}],
+                     shards=2)
+    assert len(jobs) == 8
+    with tempfile.TemporaryDirectory() as d:
+        rec = Path(d) / "llm.jsonl"
+        rec.write_text("", encoding="utf-8")
+        par = run_parallel(jobs, workers=4, panel_dir=str(Path(d) / "panel"), llm_recordings=str(rec))
+        ser = run_parallel(jobs, workers=1, llm_recordings=str(rec))
+    assert market_data.get_provider().name == "synthetic"
+    for p, s in zip(par, ser):
+        assert p.error is None and s.error is None, (p.error, s.error)
+        assert p.equity.equals(s.equity) and p.trades == s.trades, p.job.name
+        assert len(p.equity) > 20
+    print("[PARALLEL]", [(r.job.name, round(r.summary["total_return"], 4)) for r in par])
+    print("[PARALLEL] OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import math
+import time
+import numpy as np
+from src.tools.screening import SignalIndex
+from src.tools.compact import CompactIndicatorTable
+from src.orchestrator.trading_cycle import _top_by_signal
+
+def _reference(stocks, k):
+    """完整排序的多鍵參考答案（NaN 排最後、同分保持插入順序）。"""
+    def key(d, name):
+        v = d.get(name)
+        return -math.inf if v is None or v != v else float(v)
+    items = [(s, d) for s, d in stocks.items() if key(d, "signal_score") != -math.inf]
+    order = {s: i for i, s in enumerate(stocks)}
+    items.sort(key=lambda x: (-key(x[1], "signal_score"), -key(x[1], "rsi14"),
+                              -key(x[1], "volume"), order[x[0]]))
+    return [(s, float(d["signal_score"])) for s, d in items[:k]]
+
+def _universe(rng, n):
+    out = {}
+    for i in range(n):
+        out[f"S{i:04d}"] = {
+            "signal_score": int(rng.integers(0, 4)) if rng.random() > 0.05 else float("nan"),
+            "rsi14": float(rng.choice([50.0, 60.0, rng.uniform(0, 100)])) if rng.random() > 0.1 else float("nan"),
+            "volume": float(rng.choice([1e6, 2e6])),
+        }
+    return out
+
+def main():
+    rng = np.random.default_rng(0)
+    stocks = _universe(rng, 3000)
+    idx = SignalIndex.from_stocks(stocks)
+    for k in (1, 5, 50, 3000):
+        assert idx.top_k(k) == _reference(stocks, k), k
+    assert _top_by_signal(stocks, k=5) == _reference(stocks, 5)
+    assert _top_by_signal({"A": {"signal_score": float("nan")}}) == []
+
+    # 增量更新 == 重建
+    changed = {s: {**stocks[s], "signal_score": 3, "rsi14": 99.0} for s in list(stocks)[100:110]}
+    idx.update(changed)
+    stocks.update(changed)
+    assert idx.top_k(10) == _reference(stocks, 10) == SignalIndex.from_stocks(stocks).top_k(10)
+    idx.remove(["S0100"])
+    assert "S0100" not in idx and all(s != "S0100" for s, _ in idx.top_k(20))
+
+    # 百分位（與 pandas rank(pct=True) 一致）
+    pr = SignalIndex.from_stocks({"A": {"rsi14": 10}, "B": {"rsi14": 30}, "C": {"rsi14": 30},
+                                  "D": {"rsi14": float("nan")}}).percentile_ranks("rsi14")
+    assert pr["A"] == 1 / 3 and pr["B"] == pr["C"] == 2.5 / 3 and math.isnan(pr["D"])
+
+    # CompactIndicatorTable 走整欄路徑，結果相同
+    table = CompactIndicatorTable.from_dicts({s: {**d, "signal_score": d["signal_score"] if d["signal_score"] == d["signal_score"] else 0}
+                                              for s, d in list(stocks.items())[:500]})
+    ref = SignalIndex.from_stocks(table.to_dicts()).top_k(7)
+    assert SignalIndex.from_stocks(table).top_k(7) == ref
+
+    t0 = time.perf_counter()
+    for _ in range(20):
+        SignalIndex.from_stocks(stocks).top_k(5)
+    t1 = time.perf_counter()
+    for _ in range(20):
+        idx.update(changed)
+        idx.top_k(5)
+    t2 = time.perf_counter()
+    print(f"[SCREEN] 3000 symbols: build+top5 {(t1 - t0) / 20 * 1e3:.2f} ms, "
+          f"update(10)+top5 {(t2 - t1) / 20 * 1e3:.3f} ms")
+    print("[SCREEN] OK")
+
+if __name__ == "__main__":
+    main()
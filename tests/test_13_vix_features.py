@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import math
+import tempfile
+import numpy as np
+import pandas as pd
+from src.data import market_data
+from src.data.providers import SyntheticProvider
+from src.tools.analysis_tools import classify_vix_regimes, vix_regime, vix_risk_score, vix_risk_scores
+from src.tools.market_tools import _calc_vix_features, load_market_history
+from src.tools.vix_features import VIXFeatureCache, vix_feature_history
+
+def main():
+    prov = SyntheticProvider(seed=4)
+    vix = prov.history("^VIX", "2018-01-01", "2024-01-01")["Close"]
+    vix3m = prov.history("^VIX3M", "2018-01-01", "2024-01-01")["Close"]
+    feats = vix_feature_history(vix, vix3m)
+
+    # z_21 釘住固定數列：1..30 線性 → 最後一天 (30-20)/std(10..30, ddof=0)；前 20 天 NaN
+    lin = pd.Series(np.arange(1.0, 31.0), index=pd.bdate_range("2024-01-01", periods=30))
+    z = vix_feature_history(lin)["zscore"]
+    assert z.iloc[:20].isna().all() and math.isclose(z.iat[-1], 10 / math.sqrt(440 / 12), rel_tol=1e-12)
+    assert np.allclose(z.iloc[20:].to_numpy(), 10 / math.sqrt(440 / 12))
+    flat = vix_feature_history(pd.Series(15.0, index=lin.index))["zscore"]
+    assert (flat.iloc[20:] == 0.0).all()                          # std 0 → 以 1e-9 代替，不除以 0
+    # 與 fetch_market_batch 的最新值一致
+    assert math.isclose(feats["zscore"].iat[-1], _calc_vix_features(vix)["zscore"], rel_tol=1e-12)
+    # 抽查一天：z_63 / pct_252 / term_ratio 與直接計算相同
+    i = 1000
+    win = vix.to_numpy()[i - 62: i + 1]
+    assert math.isclose(feats["z_63"].iat[i], (win[-1] - win.mean()) / win.std(), rel_tol=1e-9)
+    win = vix.to_numpy()[i - 251: i + 1]
+    lower, equal = (win < win[-1]).sum(), (win == win[-1]).sum()
+    assert math.isclose(feats["pct_252"].iat[i], (lower + (equal + 1) / 2) / 252)
+    assert math.isclose(feats["term_ratio"].iat[i], vix3m.iat[i] / vix.iat[i])
+    assert feats["z_252"].iloc[:251].isna().all() and feats["z_252"].iloc[251:].notna().all()
+
+    # 批次 regime == 逐筆工具（含 NaN）
+    lv = np.array([10.0, 13.0, 20.0, 26.0, 40.0, np.nan, np.nan, 12.0])
+    zz = np.array([-1.0, 0.0, 1.6, 0.0, 0.0, 3.0, np.nan, np.nan])
+    reg = classify_vix_regimes(lv, zz)
+    risk = vix_risk_scores(lv, zz)
+    for k in range(len(lv)):
+        d = {"level": float(lv[k]), "zscore": float(zz[k])}
+        assert reg[k] == vix_regime.invoke({"vix": d}) and risk[k] == vix_risk_score.invoke({"vix": d})
+
+    # 快取：逐日 append 一列 == 整段重算；每次只寫一個新 chunk，超過 compact_at 合併
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d) / "vix"
+        cache = VIXFeatureCache(root, compact_at=4)
+        cache.extend(vix.iloc[:-6], vix3m)
+        first = sorted(root.glob("chunk-*"))
+        assert len(first) == 1
+        mtime = first[0].stat().st_mtime_ns
+        rows = cache.extend(vix.iloc[:-5], vix3m)
+        assert len(rows) == 1 and first[0].stat().st_mtime_ns == mtime     # 舊 chunk 不重寫
+        assert len(cache._levels) == cache._tail                            # 記憶體只留 tail
+        for n in range(5, 0, -1):
+            cache.extend(vix.iloc[: len(vix) - n + 1], vix3m)
+        assert len(list(root.glob("chunk-*"))) <= 4
+        assert len(cache.extend(vix, vix3m)) == 0
+        again = VIXFeatureCache(root, compact_at=4)
+        assert again.rows == len(vix) and len(again.history) == len(vix)
+        num = [c for c in feats.columns if c != "regime"]
+        assert np.allclose(again.history[num].to_numpy(), feats[num].to_numpy(), equal_nan=True, rtol=1e-9)
+        assert (again.history["regime"] == feats["regime"]).all()
+        assert again.latest()["regime"] == feats["regime"].iat[-1]
+        # 重新開啟後續接：tail 由最後的 chunk 還原
+        more = prov.history("^VIX", "2018-01-01", "2024-03-01")["Close"]
+        more3 = prov.history("^VIX3M", "2018-01-01", "2024-03-01")["Close"]
+        again.extend(more, more3)
+        ref = vix_feature_history(more, more3)
+        assert np.allclose(again.history[num].to_numpy(), ref[num].to_numpy(), equal_nan=True, rtol=1e-9)
+        mem = VIXFeatureCache(compact_at=4)
+        for n in range(10, -1, -1):
+            mem.extend(vix.iloc[: len(vix) - n], vix3m)
+        assert np.allclose(mem.history[num].to_numpy(), feats[num].to_numpy(), equal_nan=True, rtol=1e-9)
+
+    market_data.set_provider(SyntheticProvider(seed=4))
+    hist = load_market_history(["AAA", "BBB"], "2022-01-01", "2023-12-01")["history"]
+    snap = hist.vix_at("2023-11-15")
+    assert {"z_5", "z_252", "pct_63", "term_ratio", "regime"} <= set(snap)
+    assert snap["regime"] in ("low", "normal", "elevated", "spike") and snap["term_ratio"] > 0
+    print("[VIX-FEATURES] OK")
+
+if __name__ == "__main__":
+    main()
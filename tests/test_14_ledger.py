@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import math
+import time
+import numpy as np
+from src.data.ledger import Ledger, SymbolRegistry
+from src.data.portfolio import Portfolio
+from src.tools import trading_tools
+from src.tools.trading_tools import buy_stock, portfolio_status, sell_stock
+
+def _raises(fn, *a) -> bool:
+    try:
+        fn(*a)
+    except ValueError:
+        return True
+    return False
+
+def main():
+    # 與 Portfolio 同語意（隨機操作序列）
+    rng = np.random.default_rng(1)
+    syms = [f"S{i}" for i in range(20)]
+    pf, lg = Portfolio(cash=1e6), Ledger(cash=1e6)
+    for _ in range(2000):
+        s = syms[rng.integers(len(syms))]
+        amt, px = int(rng.integers(1, 50)), float(rng.uniform(5, 500))
+        op = pf.buy if rng.random() < 0.6 else pf.sell
+        op_l = lg.buy if op == pf.buy else lg.sell
+        e1, e2 = _raises(op, s, amt, px), _raises(op_l, s, amt, px)
+        assert e1 == e2
+    prices = {s: float(rng.uniform(5, 500)) for s in syms[:15]}   # 部分 symbol 沒價格 → 0
+    assert pf.positions == lg.positions
+    assert math.isclose(pf.cash, lg.cash, rel_tol=1e-12)
+    assert math.isclose(pf.value(prices), lg.value(prices), rel_tol=1e-12)
+
+    # 批次下單：全有或全無；重複 symbol 會累加
+    lg = Ledger(cash=1000.0)
+    lg.buy_many(["A", "B", "A"], [2, 3, 1], [100.0, 50.0, 110.0])
+    assert lg.positions == {"A": 3, "B": 3} and math.isclose(lg.cash, 1000 - 310 - 150)
+    assert _raises(lg.buy_many, ["C", "D"], [1, 10], [10.0, 100.0]) and "C" not in lg.positions
+    assert _raises(lg.sell_many, ["A", "A"], [2, 2], [120.0, 120.0]) and lg.positions["A"] == 3
+    # 賣出從未持有的 symbol：拒絕且不登記（registry / 陣列不變）
+    n_reg, n_cap = len(lg.registry), len(lg.qty)
+    assert _raises(lg.sell, "NEVER", 1, 10.0) and _raises(lg.sell_many, ["A", "Z"], [1, 1], [1.0, 1.0])
+    assert "NEVER" not in lg.registry and "Z" not in lg.registry
+    assert len(lg.registry) == n_reg and len(lg.qty) == n_cap and lg.positions["A"] == 3
+    lg.sell("NEVER", 0, 10.0)
+    assert "NEVER" not in lg.registry
+    # 被拒的買單（現金不足 / 長度不符 / 非整數股）同樣不登記新 symbol
+    cash = lg.cash
+    assert _raises(lg.buy_many, ["NEW1", "NEW2"], [1, 10 ** 6], [10.0, 100.0])
+    assert _raises(lg.buy_many, ["NEW1", "NEW2"], [1], [10.0, 10.0])
+    assert _raises(lg.buy, "NEW1", 1.7, 10.0) and _raises(lg.buy_many, ["NEW1"], [float("nan")], [1.0])
+    assert _raises(lg.sell, "A", 0.5, 10.0)
+    assert "NEW1" not in lg.registry and "NEW2" not in lg.registry and len(lg.registry) == n_reg
+    assert len(lg.qty) == n_cap and lg.cash == cash and lg.positions["A"] == 3
+    lg.buy_many(["A"], [np.int64(0)], [1.0])
+    lg.buy("A", 0.0, 1.0)
+    lg.sell_many(["A"], [1], [130.0])
+    assert math.isclose(lg.realized, 130 - 310 / 3)
+    px = lg.registry.vector({"A": 120.0, "B": 40.0})
+    assert math.isclose(lg.value(px), lg.cash + 2 * 120 + 3 * 40)
+    assert np.allclose(lg.unrealized_pnl(px)[:2], [2 * 120 - 2 * 310 / 3, 3 * 40 - 150])
+
+    # what-if：snapshot → 試算 → restore
+    snap = lg.snapshot()
+    before = lg.value(px)
+    lg.buy_many(["B", "E"], [1, 1], [40.0, 10.0])
+    lg.sell("A", 2, 1.0)
+    lg.restore(snap)
+    assert lg.value(px) == before and lg.positions == {"A": 2, "B": 3}
+
+    # portfolio_status 只算一次總值
+    trading_tools.CTX.portfolio = Ledger(cash=1000.0)
+    trading_tools.CTX.last_prices = {}
+    buy_stock.invoke({"symbol": "X", "amount": 3, "price": 10.0})
+    sell_stock.invoke({"symbol": "X", "amount": 1, "price": 12.0})
+    st = portfolio_status.invoke({})
+    assert st["positions"] == {"X": 2} and st["equity_value"] == 24.0 and st["total_value"] == 1000 - 30 + 12 + 24
+
+    # 大量部位 × 多步：向量化估值
+    reg = SymbolRegistry(f"U{i}" for i in range(5000))
+    big = Ledger(cash=1e9, registry=reg)
+    big.buy_many(reg.symbols, np.full(5000, 10), np.full(5000, 20.0))
+    path = np.random.default_rng(2).uniform(10, 30, size=(1000, 5000))
+    t0 = time.perf_counter()
+    curve = [big.value(path[t]) for t in range(len(path))]
+    dt = time.perf_counter() - t0
+    assert math.isclose(curve[0], big.cash + 10 * path[0].sum(), rel_tol=1e-12)
+    print(f"[LEDGER] 5000 positions x 1000 steps marked in {dt * 1e3:.1f} ms")
+    print("[LEDGER] OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import gc
+import json
+import multiprocessing as mp
+import weakref
+import os
+import tempfile
+import threading
+import time
+from src.utils.io import BufferedJSONLWriter, close_writers, flush_writers, get_writer
+
+def _lines(root: Path, stem: str):
+    out = []
+    for fp in sorted(root.glob(f"{stem}*.jsonl")):
+        out += [json.loads(line) for line in fp.read_text(encoding="utf-8").splitlines()]
+    return out
+
+def _proc(path: str, pid: int, n: int) -> None:
+    w = get_writer(path, rotate_bytes=20_000, flush_interval_s=60)
+    for i in range(n):
+        w.write({"p": pid, "i": i, "pad": "x" * 40})
+    flush_writers()
+
+def main():
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d)
+
+        # 緩衝：未達門檻前不落地，flush 後一次寫入
+        w = BufferedJSONLWriter(root / "a.jsonl", flush_interval_s=60)
+        for i in range(100):
+            w.write({"i": i})
+        assert not (root / "a.jsonl").exists() or (root / "a.jsonl").stat().st_size == 0
+        w.flush()
+        assert [r["i"] for r in _lines(root, "a")] == list(range(100)) and w.flushes == 1
+        w.close()
+
+        # 背景 thread 不持有 writer：沒 close 也能被回收，回收時寫出緩衝、thread 結束
+        w = BufferedJSONLWriter(root / "g.jsonl", flush_interval_s=0.05)
+        w.write({"i": 0})
+        w.write({"i": 1})
+        ref, th = weakref.ref(w), w._thread
+        assert th is not None and th.is_alive()
+        del w
+        gc.collect()
+        assert ref() is None
+        th.join(1.0)
+        assert not th.is_alive() and len(_lines(root, "g")) == 2
+
+        # 大小門檻 / 時間門檻（背景 thread）
+        w = BufferedJSONLWriter(root / "b.jsonl", max_buffer_bytes=200, flush_interval_s=0.2)
+        for i in range(200):
+            w.write({"i": i})
+        assert 5 < w.flushes < 200
+        time.sleep(0.6)
+        assert len(_lines(root, "b")) == 200
+        w.close()
+
+        # 門檻以 UTF-8 位元組計：中文內容不會超出 max_buffer_bytes 數倍
+        w = BufferedJSONLWriter(root / "u.jsonl", max_buffer_bytes=300, flush_interval_s=60)
+        rec = {"note": "市場情緒偏空，降低曝險"}
+        size = len((json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8"))
+        for i in range(300 // size):
+            w.write(rec)
+        assert w.flushes == 0
+        w.write(rec)
+        assert w.flushes == 1 and len(_lines(root, "u")) == 300 // size + 1
+        w.close()
+
+        # 依大小輪替：內容不遺失
+        w = BufferedJSONLWriter(root / "c.jsonl", max_buffer_bytes=500, rotate_bytes=3000)
+        for i in range(1000):
+            w.write({"i": i})
+        w.close()
+        files = sorted(root.glob("c*.jsonl"))
+        assert len(files) > 3 and all(f.stat().st_size <= 3000 for f in files)
+        assert sorted(r["i"] for r in _lines(root, "c")) == list(range(1000))
+
+        # 依日期輪替：昨天的檔案被移到 <stem>.<昨天>.1.jsonl
+        w = BufferedJSONLWriter(root / "e.jsonl", rotate_daily=True)
+        w.write({"day": 1})
+        w.flush()
+        yesterday = time.time() - 86400
+        os.utime(root / "e.jsonl", (yesterday, yesterday))
+        w.write({"day": 2})
+        w.close()
+        day = time.strftime("%Y-%m-%d", time.localtime(yesterday))
+        assert json.loads((root / f"e.{day}.1.jsonl").read_text())["day"] == 1
+        assert json.loads((root / "e.jsonl").read_text())["day"] == 2
+
+        # 多 thread
+        w = get_writer(root / "t.jsonl", flush_interval_s=60, max_buffer_bytes=4096)
+        ths = [threading.Thread(target=lambda k=k: [w.write({"t": k, "i": i}) for i in range(500)])
+               for k in range(8)]
+        [t.start() for t in ths]
+        [t.join() for t in ths]
+        assert get_writer(root / "t.jsonl") is w
+        close_writers()
+        assert len(_lines(root, "t")) == 4000
+
+        # 多 process 同一檔案 + 輪替：每筆都完整、不重複
+        ctx = mp.get_context("fork")
+        ps = [ctx.Process(target=_proc, args=(str(root / "m.jsonl"), k, 600)) for k in range(4)]
+        [p.start() for p in ps]
+        [p.join() for p in ps]
+        recs = _lines(root, "m")
+        assert len(recs) == 2400 and len({(r["p"], r["i"]) for r in recs}) == 2400
+        assert len(list(root.glob("m*.jsonl"))) > 1
+
+        t0 = time.perf_counter()
+        w = BufferedJSONLWriter(root / "speed.jsonl")
+        for i in range(50_000):
+            w.write({"i": i, "side": "BUY", "qty": 10, "price": 123.45})
+        w.close()
+        print(f"[JSONL] 50k records buffered in {time.perf_counter() - t0:.3f}s")
+    print("[JSONL] OK")
+
+if __name__ == "__main__":
+    main()
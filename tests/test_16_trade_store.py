@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import json
+import tempfile
+from src.data.trade_store import TradeStore
+
+def _plan(store: TradeStore, sql: str, args=()):
+    return " | ".join(r[-1] for r in store.conn.execute("EXPLAIN QUERY PLAN " + sql, args))
+
+def main():
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d)
+        store = TradeStore(root / "store.sqlite")
+
+        syms = ["NVDA", "AAPL", "MSFT"]
+        trades = [{"date": f"2024-{m:02d}-{day:02d}", "symbol": syms[(m + day) % 3],
+                   "side": "BUY" if day % 2 else "SELL", "qty": day, "price": 100.0 + m}
+                  for m in range(1, 13) for day in range(1, 29)]
+        assert store.add_trades(trades, run_id="r1") == len(trades)
+
+        got = store.trades(symbol="NVDA", side="BUY", start="2024-03-01", end="2024-03-31")
+        want = [t for t in trades if t["symbol"] == "NVDA" and t["side"] == "BUY"
+                and t["date"].startswith("2024-03")]
+        assert [(g["date"], g["qty"]) for g in got] == [(w["date"], w["qty"]) for w in want]
+        assert got and got[0]["extra"]["price"] == 103.0 and got[0]["run_id"] == "r1"
+
+        plan = _plan(store, "SELECT * FROM trades WHERE symbol=? AND date>=? AND date<=?",
+                     ("NVDA", "2024-03-01", "2024-03-31"))
+        assert "idx_trades_symbol_date" in plan, plan
+        assert "idx_trades_date" in _plan(store, "SELECT * FROM trades WHERE date>=? AND date<=?",
+                                          ("2024-03-01", "2024-03-31"))
+
+        # decisions / discussions：stance 索引
+        store.add_decisions([{"date": "2024-01-02", "action": "BUY", "stance": "bullish",
+                              "targets": [{"symbol": "NVDA", "weight": 0.1}]},
+                             {"date": "2024-01-03", "action": "HOLD", "stance": "neutral"}])
+        dec = store.decisions(stance="bullish")
+        assert len(dec) == 1 and dec[0]["targets"] == ["NVDA"]
+        assert "idx_decisions_stance_date" in _plan(
+            store, "SELECT * FROM decisions WHERE stance=? AND date>=?", ("bullish", "2024-01-01"))
+
+        # 既有 JSONL 日誌匯入（trade_log 用 ts、discussion 用 ISO ts）
+        (root / "trades.jsonl").write_text("\n".join(json.dumps(r) for r in [
+            {"symbol": "NVDA", "action": "BUY", "amount": 5, "price": 1.5, "ts": "2024-05-06 10:00:00"},
+            {"symbol": "AAPL", "action": "SELL", "amount": 2, "price": 2.5, "ts": "2024-05-07 10:00:00"},
+        ]) + "\n", encoding="utf-8")
+        assert store.import_jsonl(root / "trades.jsonl", "trades", run_id="live", batch=1) == 2
+        live = store.trades(run_id="live", symbol="NVDA")
+        assert len(live) == 1 and live[0]["date"] == "2024-05-06" and live[0]["qty"] == 5
+
+        (root / "disc.jsonl").write_text("\n".join(json.dumps(r) for r in [
+            {"ts": "2024-05-06T12:00:00Z", "final_stance": "bearish", "actions": [], "symbols": ["NVDA"]},
+            {"ts": "2024-05-07T12:00:00Z", "final_stance": "bullish", "actions": [{"tool": "x"}], "symbols": []},
+            {"ts": "2024-06-01T12:00:00Z", "final_stance": "bullish", "actions": [], "symbols": []},
+        ]) + "\n", encoding="utf-8")
+        assert store.import_jsonl(root / "disc.jsonl", "discussions") == 3
+        may = store.discussions(stance="bullish", start="2024-05-01", end="2024-05-31")
+        assert len(may) == 1 and may[0]["actions"] == [{"tool": "x"}]
+        assert store.stance_counts("2024-05-01", "2024-05-31") == {"bearish": 1, "bullish": 1}
+        store.close()
+
+        # 重新開啟：資料持久化
+        with TradeStore(root / "store.sqlite") as again:
+            assert len(again.trades(symbol="NVDA", side="BUY", start="2024-03-01", end="2024-03-31")) == len(want)
+
+    print("[OK] trade store: indexed range queries, bulk insert, JSONL import")
+
+if __name__ == "__main__":
+    main()
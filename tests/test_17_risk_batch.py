@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import math
+import time
+import numpy as np
+from src.tools.analysis_tools import risk_score, risk_scores, universe_risk_scores
+from src.tools.compact import CompactIndicatorTable
+from src.agents.risk_analyst import run_risk_analyst
+
+def _stocks(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    out = {}
+    for i in range(n):
+        sd = {"price": 100.0, "volume": int(rng.integers(0, 120_000_000)),
+              "change_pct": float(rng.normal(0, 6))}
+        if i % 11 == 0:
+            sd["change_pct"] = float("nan")
+        if i % 13 == 0:
+            sd["change_pct"] = None
+        if i % 17 == 0:
+            sd["volume"] = float("nan")
+        if i % 19 == 0:
+            del sd["volume"]
+        if i % 23 == 0:
+            sd["change_pct"] = float("inf")
+        out[f"S{i:04d}"] = sd
+    return out
+
+def main():
+    stocks = _stocks(600)
+    batched = universe_risk_scores(stocks)
+    for sym, sd in stocks.items():
+        ref = float(risk_score.invoke({"symbol_data": sd}))
+        assert batched[sym] == ref, (sym, sd, batched[sym], ref)
+    assert batched["S0011"] == 10.0                      # NaN change：與 scalar 工具相同
+    assert list(batched) == list(stocks)
+
+    # 邊界：±1 clip、大量成交量 -1
+    assert risk_scores([60_000_000, 0], [0.0, -40.0]).tolist() == [2.0, 8.0]
+
+    # CompactIndicatorTable 直接取欄位
+    clean = {s: {k: (0 if v is None else v) for k, v in sd.items()} for s, sd in _stocks(50, 1).items()
+             if sd.get("change_pct") is not None and "volume" in sd and not math.isnan(sd["volume"])}
+    table = CompactIndicatorTable.from_dicts(clean)
+    for sym, v in universe_risk_scores(table).items():
+        assert v == float(risk_score.invoke({"symbol_data": dict(table[sym])})), sym
+
+    # risk analyst 輸出與逐檔 invoke 版本一致
+    scores = {s: float(risk_score.invoke({"symbol_data": sd})) for s, sd in stocks.items()}
+    out = run_risk_analyst({"stocks": stocks})
+    assert out["risk_score"] == sum(scores.values()) / len(scores)
+    assert out["high_risk_stocks"] == [s for s, v in scores.items() if v > 7]
+    assert out["safe_stocks"] == [s for s, v in scores.items() if v <= 5]
+    assert run_risk_analyst({"stocks": {}})["risk_score"] == 0
+
+    t0 = time.perf_counter()
+    for sd in stocks.values():
+        risk_score.invoke({"symbol_data": sd})
+    t1 = time.perf_counter()
+    universe_risk_scores(stocks)
+    t2 = time.perf_counter()
+    print(f"[INFO] 600 symbols: per-symbol invoke {1e3*(t1-t0):.1f} ms, batched {1e3*(t2-t1):.2f} ms")
+    print("[OK] batched risk scores match the scalar tool")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import time
+import numpy as np
+from src.tools.analysis_tools import assess_trend, classify_trends, universe_trends, vix_regime, vix_risk_score
+from src.tools.compact import CompactIndicatorTable
+from src.tools.market_analyst import run_market_analyst
+
+def _stocks(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    out = {}
+    for i in range(n):
+        ma50 = float(rng.uniform(50, 150))
+        sd = {"price": ma50, "ma20": ma50 * float(rng.choice([0.95, 1.0, 1.05])),
+              "ma50": ma50, "change_pct": float(rng.choice([-1.5, 0.0, 2.0])), "volume": 1_000_000}
+        if i % 7 == 0:
+            sd["ma50"] = float("nan")
+        if i % 11 == 0:
+            sd["change_pct"] = None
+        if i % 13 == 0:
+            sd["change_pct"] = float("nan")
+        if i % 5 == 0:
+            sd["ma_20"] = sd.pop("ma20")
+        out[f"S{i:04d}"] = sd
+    return out
+
+def _reference(market_json):
+    """The per-symbol invoke implementation this replaces."""
+    vix = market_json.get("VIX", {}) or {}
+    regime = vix_regime.invoke({"vix": vix})
+    risk = vix_risk_score.invoke({"vix": vix})
+    labels = [(s, assess_trend.invoke({"symbol_data": sd})) for s, sd in market_json["stocks"].items()]
+    return regime, risk, labels, [s for s, t in labels if t == "uptrend" and risk <= 6.0]
+
+def main():
+    stocks = _stocks(400)
+    got = dict(zip(stocks, universe_trends(stocks)))
+    for sym, sd in stocks.items():
+        assert got[sym] == assess_trend.invoke({"symbol_data": sd}), (sym, sd, got[sym])
+    assert set(got.values()) == {"uptrend", "downtrend", "sideways", "insufficient_data"}
+
+    # None MA（scalar 工具會 TypeError）→ insufficient_data
+    assert classify_trends([None, 2.0], [1.0, 1.0], [1.0, None]).tolist() == ["insufficient_data", "sideways"]
+    assert universe_trends({"X": {"ma50": 1.0, "change_pct": 1.0}}).tolist() == ["insufficient_data"]
+    assert universe_trends({}).tolist() == []
+
+    for vix in ({}, {"level": 12.0, "zscore": -1.0}, {"level": 30.0, "zscore": 0.2},
+                {"level": 18.0, "zscore": float("nan")}, {"level": None, "zscore": 3.0}):
+        mj = {"stocks": stocks, "VIX": vix}
+        regime, risk, labels, buys = _reference(mj)
+        out = run_market_analyst(mj)
+        assert out["vix"]["regime"] == regime and out["vix"]["risk_score"] == risk, vix
+        assert out["key_observations"] == [f"{s}: {t}" for s, t in labels]
+        assert out["recommended_stocks"] == buys
+
+    # 數千檔：CompactIndicatorTable 直接取欄位
+    big = {s: {**sd, "ma20": sd.get("ma20", sd.get("ma_20")), "change_pct": sd["change_pct"] or 0.0}
+           for s, sd in _stocks(5000, 1).items()}
+    table = CompactIndicatorTable.from_dicts(big)
+    assert universe_trends(table).tolist() == universe_trends(big).tolist()
+    universe_trends(table)
+    t0 = time.perf_counter()
+    for _ in range(20):
+        universe_trends(table)
+    t1 = time.perf_counter()
+    universe_trends(big)
+    t2 = time.perf_counter()
+    print(f"[INFO] 5000 symbols: compact {1e3*(t1-t0)/20:.3f} ms, dicts {1e3*(t2-t1):.2f} ms")
+    print("[TREND] OK")
+
+if __name__ == "__main__":
+    main()
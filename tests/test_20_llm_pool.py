@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import os
+import threading
+import time
+from src.llm import ollama_client as oc
+
+URL = "http://ollama.invalid:11434"
+
+class _Resp:
+    def __init__(self, data):
+        self.ok, self.status_code, self.text, self._data = True, 200, "", data
+
+    def json(self):
+        return self._data
+
+class _FakeServer:
+    def __init__(self):
+        self.calls = []
+        self.down = False
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout):
+        with self.lock:
+            self.calls.append(url.rsplit("/", 1)[-1])
+        if self.down:
+            raise ConnectionError("refused")
+        if url.endswith("/api/version"):
+            return _Resp({"version": "0.0-test"})
+        return _Resp({"models": [{"name": "llama3.1:latest"}]})
+
+def main():
+    server = _FakeServer()
+    orig_get, orig_override = oc._http_get, oc.get_llm_override()
+    os.environ.pop(oc.ENV_LLM_REPLAY, None)
+    oc.set_llm_override(None)
+    oc._http_get = server.get
+    try:
+        oc.reset_llm_pool()
+        first = oc.get_llm("llama3.1", base_url=URL)
+        assert server.calls == ["version", "tags"], server.calls
+        for _ in range(50):
+            assert oc.get_llm("llama3.1", base_url=URL) is first
+        assert len(server.calls) == 2                      # 之後完全不打健康檢查
+        st = oc.llm_pool_stats()
+        assert st["ready_checks"] == 1 and st["clients_created"] == 1 and st["client_hits"] == 50, st
+
+        # 不同 options → 另一個 client，但 readiness 共用
+        other = oc.get_llm("llama3.1", base_url=URL, temperature=0.7, num_ctx=4096)
+        assert other is not first and len(server.calls) == 2
+        assert oc.llm_pool_stats()["clients"] == 2
+
+        # TTL 過期：立即回傳 warm client，背景重新檢查
+        os.environ[oc.ENV_READY_TTL] = "0"
+        t0 = time.perf_counter()
+        assert oc.get_llm("llama3.1", base_url=URL) is first
+        assert time.perf_counter() - t0 < 0.05
+        for th in [t for t in threading.enumerate() if t.name.startswith("ollama-ready:")]:
+            th.join(5)
+        assert server.calls[2:] == ["version", "tags"], server.calls
+        assert oc.llm_pool_stats()["background_checks"] >= 1
+
+        # 背景檢查失敗 → 丟掉快取，下一次同步檢查並拋出 OllamaInitError
+        server.down = True
+        oc.get_llm("llama3.1", base_url=URL)
+        for th in [t for t in threading.enumerate() if t.name.startswith("ollama-ready:")]:
+            th.join(10)
+        assert oc.llm_pool_stats()["ready"] == 0
+        try:
+            oc.get_llm("llama3.1", base_url=URL, auto_pull=False)
+            raise AssertionError("expected OllamaInitError")
+        except oc.OllamaInitError:
+            pass
+        os.environ.pop(oc.ENV_READY_TTL, None)
+
+        # 併發首次呼叫只檢查一次
+        server.down = False
+        server.calls.clear()
+        oc.reset_llm_pool()
+        got = []
+        threads = [threading.Thread(target=lambda: got.append(oc.get_llm("llama3.1", base_url=URL)))
+                   for _ in range(8)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        assert server.calls == ["version", "tags"], server.calls
+        assert len({id(x) for x in got}) == 1
+
+        # override 仍然優先
+        sentinel = object()
+        oc.set_llm_override(sentinel)
+        assert oc.get_llm() is sentinel
+    finally:
+        oc._http_get = orig_get
+        oc.set_llm_override(orig_override)
+        os.environ.pop(oc.ENV_READY_TTL, None)
+        oc.reset_llm_pool()
+    print("[LLM-POOL] OK")
+
+if __name__ == "__main__":
+    main()
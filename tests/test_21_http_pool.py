@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.utils.http import HTTPClient, close_http, get_client, http_get, http_stats
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive
+    hits = {}
+    flaky_left = 0
+
+    def log_message(self, *a):
+        pass
+
+    def _send(self, code: int, body: bytes, ctype: str) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        cls = type(self)
+        cls.hits[self.path] = cls.hits.get(self.path, 0) + 1
+        if self.path == "/flaky" and cls.flaky_left > 0:
+            cls.flaky_left -= 1
+            return self._send(503, b"busy", "text/plain")
+        if self.path == "/api/version":
+            return self._send(200, json.dumps({"version": "0.0-test"}).encode(), "application/json")
+        if self.path == "/page":
+            html = b"<html><head><title>Hello</title></head><body><p>pooled body</p></body></html>"
+            return self._send(200, html, "text/html")
+        self._send(200, b"ok", "text/plain")
+
+def main():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    try:
+        # keep-alive：20 次請求只開 1 條連線
+        c = HTTPClient(retries=0)
+        for _ in range(20):
+            assert c.get(f"{base}/x").text == "ok"
+        st = c.stats()[base]
+        assert st == {"requests": 20, "connections": 1, "reused": 19, "errors": 0}, st
+
+        # 多執行緒：連線數受 pool_maxsize 限制
+        c4 = HTTPClient(pool_maxsize=4, retries=0)
+        def worker():
+            for _ in range(10):
+                assert c4.get(f"{base}/x").status_code == 200
+        ths = [threading.Thread(target=worker) for _ in range(8)]
+        for t in ths:
+            t.start()
+        for t in ths:
+            t.join()
+        st = c4.stats()[base]
+        assert st["requests"] == 80 and 1 <= st["connections"] <= 8 and st["reused"] >= 72, st
+        c4.close()
+
+        # 重試 + backoff：503 兩次後成功；retries=0 則直接拿到 503（不拋例外）
+        _Handler.flaky_left = 2
+        r = HTTPClient(retries=2, backoff=0.0).get(f"{base}/flaky")
+        assert r.status_code == 200 and _Handler.hits["/flaky"] == 3
+        _Handler.flaky_left = 1
+        assert c.get(f"{base}/flaky").status_code == 503
+
+        # 連不上：計入 errors
+        dead = "http://127.0.0.1:9"
+        try:
+            c.get(f"{dead}/x", timeout=0.5)
+            raise AssertionError("expected a connection error")
+        except AssertionError:
+            raise
+        except Exception:
+            pass
+        assert c.stats()[dead]["errors"] == 1
+        c.close()
+
+        # 共用 client：ollama 健康檢查與抓網頁都走連線池
+        close_http()
+        from src.llm import ollama_client as oc
+        from src.tools.news_tools import fetch_url
+        for _ in range(3):
+            assert oc._server_version(base, timeout=2.0, retries=0) == "0.0-test"
+        got = fetch_url(f"{base}/page")
+        assert got["ok"] and got["result"]["title"] == "Hello" and "pooled body" in got["result"]["text"]
+        assert http_get(f"{base}/x").text == "ok"
+        stats = http_stats()
+        assert stats["ollama"][base] == {"requests": 3, "connections": 1, "reused": 2, "errors": 0}, stats
+        assert stats["default"][base]["requests"] == 2 and stats["default"][base]["connections"] == 1
+        assert get_client("ollama").config.retries == 0
+    finally:
+        close_http()
+        srv.shutdown()
+    print("[HTTP-POOL] OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import os
+import tempfile
+import time
+from langchain_core.messages import AIMessage
+from src.llm import response_cache as rc
+from src.llm.ollama_client import get_llm_override, set_llm_override
+from src.llm.response_cache import CacheMissError, CachedLLM, ResponseCache, cache_key, cached_llm
+
+class _CountingLLM:
+    model = "fake-model"
+    temperature = 0.2
+    num_ctx = None
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt, *a, **kw):
+        self.calls += 1
+        return AIMessage(content=f"answer #{self.calls}\nFinal Stance: neutral")
+
+def _prompt(ts: str, body: str = "GOAL: stance\nCONTEXT: vix=18") -> str:
+    return f"TIME(UTC): {ts}\n{body}"
+
+def main():
+    # key：TIME 行不影響；model / options / 內容會影響
+    k = cache_key(_prompt("2024-01-02T00:00:00Z"), "m", {"temperature": 0.2})
+    assert k == cache_key(_prompt("2025-06-30T12:34:56Z"), "m", {"temperature": 0.2})
+    assert k != cache_key(_prompt("2024-01-02T00:00:00Z"), "m", {"temperature": 0.7})
+    assert k != cache_key(_prompt("2024-01-02T00:00:00Z"), "other", {"temperature": 0.2})
+    assert k != cache_key(_prompt("2024-01-02T00:00:00Z", "GOAL: other"), "m", {"temperature": 0.2})
+
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d) / "llm"
+        inner = _CountingLLM()
+        llm = CachedLLM(inner, ResponseCache(root))
+        a = llm.invoke(_prompt("t1")).content
+        b = llm.invoke(_prompt("t2")).content            # 只差 TIME 行 → 命中
+        assert a == b and inner.calls == 1 and llm.model == "fake-model"
+        assert llm.options == {"temperature": 0.2}
+        assert llm.cache.stats["memory_hits"] == 1
+
+        # 新 process 等價：新的 cache 物件從磁碟命中
+        cold = CachedLLM(inner, ResponseCache(root))
+        assert cold.invoke(_prompt("t3")).content == a and inner.calls == 1
+        assert cold.cache.stats["disk_hits"] == 1
+
+        # strict：命中照常、未命中拋出且不呼叫底層模型
+        strict = CachedLLM(inner, ResponseCache(root), strict=True)
+        assert strict.invoke(_prompt("t4")).content == a
+        try:
+            strict.invoke(_prompt("t4", "GOAL: never seen"))
+            raise AssertionError("expected CacheMissError")
+        except CacheMissError:
+            pass
+        assert inner.calls == 1
+
+        # TTL：過期視為未命中並重新生成
+        short = ResponseCache(Path(d) / "ttl", ttl_s=0.05)
+        ttl_llm = CachedLLM(inner, short)
+        ttl_llm.invoke(_prompt("x"))
+        time.sleep(0.1)
+        ttl_llm.invoke(_prompt("x"))
+        assert inner.calls == 3 and short.stats["expired"] >= 1
+        assert CachedLLM(inner, ResponseCache(Path(d) / "ttl", ttl_s=0.05)).cache.get(
+            cache_key(_prompt("x"), "fake-model", {"temperature": 0.2})) is not None  # 剛重寫的仍有效
+
+        # 記憶體 LRU 上限 + 磁碟容量淘汰（最久未用的先刪）
+        small = ResponseCache(Path(d) / "small", max_memory=4, max_disk_bytes=4000)
+        for i in range(40):
+            small.put(f"{i:064x}", "x" * 200)
+            os.utime(small._path(f"{i:064x}"), (1_000_000 + i, 1_000_000 + i))
+        assert len(small._mem) == 4
+        on_disk = sorted(p.stem for p in (Path(d) / "small").glob("*/*.json"))
+        assert small.stats["evicted"] > 0
+        assert sum(p.stat().st_size for p in (Path(d) / "small").glob("*/*.json")) <= 4000
+        assert f"{39:064x}" in on_disk and f"{0:064x}" not in on_disk
+
+        # 覆寫同一 key：磁碟大小計數扣掉舊檔，不會提早淘汰
+        same = ResponseCache(Path(d) / "same", max_disk_bytes=4000)
+        for i in range(100):
+            same.put("ab" * 32, "y" * (200 + i % 3))
+        assert same.stats["evicted"] == 0 and same._disk_bytes == same._scan()
+
+        # cached_llm：共用 cache；override（回放）不包裝；off 時原樣回傳
+        prev = get_llm_override()
+        rc.set_response_cache(ResponseCache(None))
+        try:
+            w = cached_llm(inner)
+            assert isinstance(w, CachedLLM) and cached_llm(w) is w
+            set_llm_override(inner)
+            assert cached_llm(inner) is inner
+            set_llm_override(prev)
+            os.environ[rc.ENV_LLM_CACHE_STRICT] = "1"
+            assert cached_llm(inner).strict is True
+            os.environ.pop(rc.ENV_LLM_CACHE_STRICT)
+            rc.set_response_cache(None)
+            assert cached_llm(inner) is inner
+            # 預設關閉（live run 不重播舊回答）；回測入口開啟磁碟層，顯式設定優先
+            saved = os.environ.pop(rc.ENV_LLM_CACHE, None)
+            assert rc._cache_from_env() is None
+            on = rc.enable_response_cache(Path(d) / "bt")
+            assert on is not None and on.root == Path(d) / "bt"
+            os.environ[rc.ENV_LLM_CACHE] = "memory"
+            assert rc._cache_from_env().root is None
+            # TTL：未設定 → 7 天；"" / "0" → 不過期
+            saved_ttl = os.environ.pop(rc.ENV_LLM_CACHE_TTL, None)
+            try:
+                assert rc._cache_from_env().ttl_s == rc.DEFAULT_TTL_S
+                for v, want in (("", None), ("0", None), (" 0.0 ", None), ("60", 60.0)):
+                    os.environ[rc.ENV_LLM_CACHE_TTL] = v
+                    assert rc._ttl_from_env() == want and rc._cache_from_env().ttl_s == want, v
+            finally:
+                os.environ.pop(rc.ENV_LLM_CACHE_TTL, None)
+                if saved_ttl is not None:
+                    os.environ[rc.ENV_LLM_CACHE_TTL] = saved_ttl
+            os.environ[rc.ENV_LLM_CACHE] = "off"
+            assert rc.enable_response_cache(Path(d) / "bt") is on     # env 優先，不覆蓋
+            if saved is None:
+                os.environ.pop(rc.ENV_LLM_CACHE)
+            else:
+                os.environ[rc.ENV_LLM_CACHE] = saved
+        finally:
+            set_llm_override(prev)
+            os.environ.pop(rc.ENV_LLM_CACHE_STRICT, None)
+            rc.set_response_cache(None)
+
+        # run_analyst_discussion：重跑同一輸入不再呼叫 LLM
+        from src.agents import analyst_discussion as ad
+        rc.set_response_cache(ResponseCache(Path(d) / "disc"))
+        counting = _CountingLLM()
+        orig = ad.get_llm
+        ad.get_llm = lambda: counting
+        try:
+            mv = {"symbols": ["AAPL"], "vix_term": {"ratio": 1.1}, "fear_greed": {"value": 50},
+                  "news": [], "signal_score_top": [("AAPL", 2.0)]}
+            first = ad.run_analyst_discussion(mv, None, rounds=2, auto_tools=False, log_actions_path=None)
+            n = counting.calls
+            again = ad.run_analyst_discussion(mv, None, rounds=2, auto_tools=False, log_actions_path=None)
+            assert n >= 1 and counting.calls == n, (n, counting.calls)
+            assert again["final_stance"] == first["final_stance"]
+        finally:
+            ad.get_llm = orig
+            rc.set_response_cache(None)
+
+    print("[LLM-CACHE] OK")
+
+if __name__ == "__main__":
+    main()
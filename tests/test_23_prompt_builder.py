@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import numpy as np
+from src.agents.prompt_builder import build_discussion_prompt, estimate_tokens
+from src.data import market_data
+from src.data.providers import SyntheticProvider
+from src.llm.replay import normalize_prompt
+from src.tools.compact import CompactIndicatorTable
+from src.tools.market_tools import fetch_market_batch
+from src.tools.screening import SignalIndex
+
+def _stocks(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    out = {}
+    for i in range(n):
+        p = float(rng.uniform(20, 500))
+        out[f"S{i:03d}"] = {"price": p, "change_pct": float(rng.normal(0, 2)), "volume": int(rng.integers(1e5, 1e8)),
+                            "ma20": p * float(rng.uniform(0.9, 1.1)), "ma50": p * float(rng.uniform(0.9, 1.1)),
+                            "rsi14": float(rng.uniform(10, 90)), "macd": 0.0, "macd_signal": 0.0,
+                            "macd_hist": 0.0, "bb_pos": 0.5, "signal_score": int(rng.integers(-3, 4))}
+    return out
+
+def _views(n: int):
+    stocks = _stocks(n)
+    mv = {"symbols": list(stocks), "stocks": stocks,
+          "vix": {"level": 21.3, "chg_1d": 0.04, "zscore": 1.7, "regime": "elevated", "risk_score": 7.0},
+          "vix_term": {"vix": 21.3, "vix3m": 20.1, "ratio": 0.944},
+          "market_sentiment": "cautious", "recommended_stocks": [], "concerns": ["VIX elevated (level=21.30, z=1.70)"]}
+    rv = {"overall_risk_level": "medium", "risk_score": 4.2, "high_risk_stocks": ["S001", "S002"],
+          "safe_stocks": list(stocks)[:50], "max_position_size": {"per_stock": 0.15, "total_equity": 0.6}}
+    obs = {"fear_greed": {"value": 38, "label": "Fear"},
+           "news": {"hits": [{"title": "Fed holds rates steady - Reuters", "source": "reuters.com"},
+                             {"title": "Fed Holds Rates Steady", "source": "wsj.com"},
+                             {"title": "Chipmakers rally on AI demand", "source": "ft.com"},
+                             {"title": "", "source": "x"}]}}
+    return mv, rv, obs
+
+def main():
+    # bottom_k：最差在前、NaN 排除、同分依加入順序
+    idx = SignalIndex.from_stocks({"A": {"signal_score": 1}, "B": {"signal_score": -2}, "C": {"signal_score": float("nan")},
+                                   "D": {"signal_score": -2}, "E": {"signal_score": 0}})
+    assert idx.bottom_k(3) == [("B", -2.0), ("D", -2.0), ("E", 0.0)]
+
+    mv, rv, obs = _views(300)
+    old_style = estimate_tokens(f"- market_view: {mv}\n- risk_view: {rv}\n- latest_observation: {obs}")
+    prompt, rep = build_discussion_prompt("Form a stance.", mv, rv, "Prior: cautious. " * 20, obs,
+                                          now="2024-01-02T00:00:00Z", budget=900)
+    assert rep.used <= 900 and rep.used == estimate_tokens(prompt), rep
+    assert old_style > 20 * rep.used, (old_style, rep.used)
+    for name in ("header", "instructions", "vix_sentiment", "risk", "breadth", "top", "bottom", "headlines", "previous"):
+        assert name in rep.sections and rep.sections[name] > 0, (name, rep.sections)
+    assert prompt.startswith("TIME(UTC): 2024-01-02T00:00:00Z\nGOAL: Form a stance.")
+    assert "Final Stance: one of {bullish, bearish, neutral, cautious}" in prompt
+    assert "BREADTH: n=300" in prompt and "FEAR_GREED: 38 (Fear)" in prompt and "ratio=0.944" in prompt
+
+    # top / bottom 與完整排序一致
+    ranked = sorted(mv["stocks"].items(), key=lambda kv: (-kv[1]["signal_score"], -kv[1]["rsi14"], -kv[1]["volume"]))
+    top_block = prompt.split("TOP 5")[1].split("BOTTOM")[0]
+    assert [row.split("|")[0].strip() for row in top_block.strip().splitlines()[1:]] == [s for s, _ in ranked[:5]]
+    assert "BOTTOM 5" in prompt
+
+    # 新聞去重（忽略大小寫與 " - 來源" 尾巴）
+    assert prompt.count("Fed holds rates steady") + prompt.count("Fed Holds Rates Steady") == 1
+    assert "Chipmakers rally" in prompt
+
+    # TIME 行不同 → normalize 後相同（回應快取 key 穩定）
+    p2, _ = build_discussion_prompt("Form a stance.", mv, rv, "Prior: cautious. " * 20, obs,
+                                    now="2030-12-31T23:59:59Z", budget=900)
+    assert normalize_prompt(p2) == normalize_prompt(prompt)
+
+    # 預算很緊：表格截斷 / 低優先段落捨棄，但不超過預算
+    tight, trep = build_discussion_prompt("Form a stance.", mv, rv, "x " * 500, obs,
+                                          now="2024-01-02T00:00:00Z", budget=260)
+    assert trep.used <= 260, trep
+    assert trep.dropped or trep.truncated
+    assert "vix_sentiment" in trep.sections and "Final Stance" in tight
+
+    # CompactIndicatorTable 與 dict 輸入得到同樣的摘要
+    mv_c = {**mv, "stocks": CompactIndicatorTable.from_dicts(mv["stocks"])}
+    pc, _ = build_discussion_prompt("Form a stance.", mv_c, rv, "", obs, now="t", budget=900)
+    pd_, _ = build_discussion_prompt("Form a stance.", mv, rv, "", obs, now="t", budget=900)
+    assert pc.split("BREADTH")[1][:40] == pd_.split("BREADTH")[1][:40]
+
+    # 真實 fetch_market_batch 輸出（key 為 "VIX"）：VIX level / chg / z 要進 prompt
+    prev = market_data.get_provider()
+    market_data.set_provider(SyntheticProvider(seed=23))
+    try:
+        real = fetch_market_batch.invoke({"symbols": ["AAA", "BBB"], "start": "2023-01-01", "end": "2023-06-30"})
+    finally:
+        market_data.set_provider(prev)
+    assert "VIX" in real and "vix" not in real
+    pr, _ = build_discussion_prompt("g", real, None, "", {}, now="t", budget=900)
+    vline = next(x for x in pr.splitlines() if x.startswith("VIX:"))
+    assert f"level={real['VIX']['level']:.2f}" in vline and f"z={real['VIX']['zscore']:.2f}" in vline, vline
+
+    # 空 universe 也能組出 prompt
+    pe, rep_e = build_discussion_prompt("g", {"symbols": ["VIX"]}, None, "", {}, now="t", budget=300)
+    assert "UNIVERSE: VIX" in pe and rep_e.used <= 300
+
+    # run_analyst_discussion 記錄每輪的 token 報告
+    from src.agents import analyst_discussion as ad
+    class _Echo:
+        def invoke(self, prompt):
+            return "Summary.\nFinal Stance: cautious"
+    from src.llm import response_cache as rc
+    orig = ad.get_llm
+    ad.get_llm = lambda: _Echo()
+    rc.set_response_cache(None)
+    try:
+        res = ad.run_analyst_discussion(mv, rv, rounds=2, auto_tools=False, log_actions_path=None,
+                                        prompt_budget=700)
+    finally:
+        ad.get_llm = orig
+        rc.set_response_cache(None)
+    assert len(res["prompt_reports"]) == 2 and all(r["used"] <= 700 for r in res["prompt_reports"])
+    assert "previous" in res["prompt_reports"][1]["sections"]
+    print(f"[PROMPT] 300 symbols: {old_style} → {rep.used} tokens; sections={rep.sections}")
+    print("[PROMPT] OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import threading
+import time
+from langchain_core.messages import AIMessage, AIMessageChunk
+from src.llm import response_cache as rc
+from src.llm.response_cache import CachedLLM, ResponseCache, cache_key
+from src.llm.streaming import find_final_stance, stream_stance
+
+_REPLY = ("Final Stance: cautious\n- breadth is narrowing\n- VIX term structure flat\n"
+          + "- filler rationale line\n" * 60)
+
+class _StreamingLLM:
+    """逐段吐出 reply（每段 `delay` 秒），記錄實際送出多少段、串流是否被關閉。"""
+    model = "fake-stream"
+
+    def __init__(self, reply: str = _REPLY, piece: int = 8, delay: float = 0.002):
+        self.reply, self.piece, self.delay = reply, piece, delay
+        self.sent = 0
+        self.closed = False
+        self.invokes = 0
+
+    def invoke(self, prompt, *a, **kw):
+        self.invokes += 1
+        return AIMessage(content=self.reply)
+
+    def stream(self, prompt, *a, **kw):
+        try:
+            for i in range(0, len(self.reply), self.piece):
+                time.sleep(self.delay)
+                self.sent += 1
+                yield AIMessageChunk(content=self.reply[i:i + self.piece])
+        finally:
+            self.closed = True
+
+class _InvokeOnly:
+    def invoke(self, prompt, *a, **kw):
+        return "Some analysis.\n**Final Stance:** Bearish"
+
+def main():
+    # regex：常見格式皆可解析；串流中（final=False）字尾未完整時不下結論
+    for s, want in [("Final Stance: bullish\n", "bullish"), ("**Final Stance:** Cautious.", "cautious"),
+                    ("3) final stance - {neutral}\n", "neutral"), ("Final Stance：bearish ", "bearish")]:
+        m = find_final_stance(s, final=False)
+        assert m is not None and m.group(1).lower() == want, s
+    assert find_final_stance("Final Stance: bull", final=False) is None
+    assert find_final_stance("Final Stance: bullish", final=False) is None       # 可能還沒結束（bullishness?）
+    assert find_final_stance("Final Stance: bullish").group(1) == "bullish"
+    assert find_final_stance("stance is bullish") is None
+
+    # 提早停止：立場 + 40 字理由後關閉串流，不讀完整個回覆
+    llm = _StreamingLLM()
+    seen = []
+    out = stream_stance(llm, "p", rationale_chars=40, on_stance=seen.append)
+    total = -(-len(_REPLY) // llm.piece)
+    assert out.stance == "cautious" and seen == ["cautious"] and out.cancelled
+    assert llm.closed and llm.sent < total // 4, (llm.sent, total)
+    assert out.text.startswith("Final Stance: cautious") and out.time_to_stance_s <= out.elapsed_s
+
+    # 立場跨 chunk 邊界（1 字元一段）也能找到
+    out = stream_stance(_StreamingLLM(piece=1, delay=0), "p", rationale_chars=5)
+    assert out.stance == "cautious" and len(out.text) <= len("Final Stance: cautious") + 6
+
+    # 長前言後才出現立場：只重掃尾端，理由長度仍從立場之後起算
+    pre = "analysis " * 2000
+    out = stream_stance(_StreamingLLM(reply=pre + _REPLY, piece=3, delay=0), "p", rationale_chars=30)
+    assert out.stance == "cautious" and len(out.text) - len(pre) - len("Final Stance: cautious") in range(30, 34)
+
+    # rationale_chars=None：讀到結尾
+    llm = _StreamingLLM(delay=0)
+    out = stream_stance(llm, "p", rationale_chars=None)
+    assert out.text == _REPLY and not out.cancelled and out.chunks == llm.sent
+
+    # cancel：外部事件在生成途中停止
+    llm = _StreamingLLM(reply="thinking... " * 200)
+    ev = threading.Event()
+    threading.Timer(0.02, ev.set).start()
+    out = stream_stance(llm, "p", cancel=ev)
+    assert out.cancelled and out.stance is None and llm.closed and llm.sent < 200 * 12 // llm.piece
+
+    # 沒有 stream() 的 LLM（回放 / 測試替身）退回一次 invoke
+    out = stream_stance(_InvokeOnly(), "p")
+    assert out.stance == "bearish" and out.chunks == 1 and not out.cancelled
+
+    # CachedLLM.stream：被中斷的串流不寫入 cache；完整讀完才寫入，之後命中為單一 chunk
+    inner = _StreamingLLM(delay=0)
+    cached = CachedLLM(inner, ResponseCache(None))
+    stream_stance(cached, "TIME(UTC): t1\nGOAL: x", rationale_chars=20)
+    key = cache_key("GOAL: x", "fake-stream", {})
+    assert cached.cache.get(key) is None and cached.cache.stats["puts"] == 0
+    full = stream_stance(cached, "TIME(UTC): t2\nGOAL: x", rationale_chars=None)
+    assert cached.cache.get(key) == _REPLY == full.text
+    sent = inner.sent
+    hit = stream_stance(cached, "TIME(UTC): t3\nGOAL: x", rationale_chars=20)
+    assert hit.stance == "cautious" and hit.chunks == 1 and inner.sent == sent
+
+    # run_analyst_discussion(stream=True)：stance-first prompt、每輪 stream_stats
+    from src.agents import analyst_discussion as ad
+    rc.set_response_cache(None)
+    llm = _StreamingLLM(delay=0)
+    orig = ad.get_llm
+    ad.get_llm = lambda: llm
+    try:
+        mv = {"symbols": ["AAPL"], "vix_term": {"ratio": 1.1}, "fear_greed": {"value": 50}, "news": []}
+        res = ad.run_analyst_discussion(mv, None, rounds=2, auto_tools=False, log_actions_path=None,
+                                        stream=True, rationale_chars=60)
+        assert res["final_stance"] == "cautious" and len(res["stream_stats"]) == 2
+        assert all(s["cancelled"] and s["chars"] < len(_REPLY) for s in res["stream_stats"])
+        # cancel 已設定：只跑一輪就結束
+        ev = threading.Event()
+        ev.set()
+        res = ad.run_analyst_discussion(mv, None, rounds=3, auto_tools=False, log_actions_path=None,
+                                        stream=True, cancel=ev)
+        assert res["rounds"] == 1 and len(res["transcript"]) == 1
+    finally:
+        ad.get_llm = orig
+
+    print("[STREAM] OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from langchain_core.messages import AIMessage
+from src.llm import response_cache as rc
+from src.agents.round_scheduler import RoundScheduler, parse_confidence
+
+class _ScriptedLLM:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+        self.prompts = []
+
+    def invoke(self, prompt, *a, **kw):
+        self.prompts.append(prompt)
+        text = self.replies[min(self.calls, len(self.replies) - 1)]
+        self.calls += 1
+        return AIMessage(content=text)
+
+class _FakeToolBox:
+    """news_scan 第一次回傳空結果（仍缺資訊），第二次才有新聞。"""
+    def __init__(self):
+        self.calls = []
+
+    def invoke(self, name, **kw):
+        self.calls.append(name)
+        if name == "vix_term":
+            return {"ok": True, "result": {"vix": 18.0, "vix3m": 20.0, "ratio": 0.9}}
+        if name == "fear_greed":
+            return {"ok": False, "result": None}
+        n = self.calls.count("news_scan")
+        return {"ok": True, "result": {"hits": [] if n == 1 else [{"title": "Fed holds rates", "source": "Reuters"}]}}
+
+def _scheduled(stances, confs=None, pending=False, fresh=False, **kw):
+    """fresh=True：每輪觀測都有變化（工具帶回新資料）。"""
+    s = RoundScheduler(**kw)
+    s.start({})
+    for i, st in enumerate(stances, 1):
+        c = (confs or [None] * len(stances))[i - 1]
+        obs = {"news": {"hits": list(range(i))}} if fresh else {}
+        s.record(i, st, f"Final Stance: {st}" + (f"\nConfidence: {c}" if c is not None else ""), obs)
+        if not s.should_continue(pending_info=pending):
+            return len(s.history), s.stop_reason
+    return len(s.history), None
+
+def main():
+    # confidence 解析
+    assert parse_confidence("Final Stance: bullish\nConfidence: 0.8") == 0.8
+    assert parse_confidence("**Confidence:** 65%") == 0.65
+    assert parse_confidence("confidence - 90") == 0.9
+    assert parse_confidence("Confidence: High") == 0.85
+    assert parse_confidence("no self-assessment here") is None
+
+    # 無新資訊：第一輪後即停止
+    assert _scheduled(["neutral"] * 5, max_rounds=5) == (1, "no_new_info")
+    assert _scheduled(["neutral"], confs=[0.9], max_rounds=5) == (1, "confident")
+    # 工具仍可補資料 → 繼續；立場連續一致即收斂
+    assert _scheduled(["bullish", "bullish", "bullish"], pending=True, max_rounds=5) == (2, "converged")
+    # 一致但信心不足：工具仍持續帶來新觀測才繼續；工具跑了卻沒變化 → 停
+    assert _scheduled(["bullish"] * 3, confs=[0.3, 0.4, 0.5], pending=True, fresh=True,
+                      max_rounds=3) == (3, "max_rounds")
+    assert _scheduled(["bullish"] * 3, confs=[0.3, 0.4, 0.5], pending=True, max_rounds=3) == (2, "no_new_info")
+    assert _scheduled(["bullish"], confs=[0.3], fresh=True, max_rounds=3) == (1, "tools_exhausted")
+    # 立場翻轉 → 即使沒有新資訊也再確認一輪
+    assert _scheduled(["bullish", "bearish", "bearish"], max_rounds=5, min_rounds=2) == (3, "converged")
+    assert _scheduled(["bullish", "bearish", "bullish", "bearish"], max_rounds=4, min_rounds=2) == (4, "max_rounds")
+    # 觀測差異
+    s = RoundScheduler()
+    s.start({"news": None, "vix_term": {"ratio": 0.9}})
+    rec = s.record(1, "neutral", "", {"news": {"hits": [1]}, "vix_term": {"ratio": 0.9}})
+    assert rec.new_info == ["news"]
+
+    from src.agents import analyst_discussion as ad
+    rc.set_response_cache(None)
+    orig_llm, orig_tb = ad.get_llm, ad.ToolBox
+    mv = {"symbols": ["AAPL"], "vix_term": {"ratio": 1.1}, "fear_greed": {"fgi": 50},
+          "news": {"hits": [{"title": "Quiet day"}]}}
+    try:
+        # 沒有缺訊、沒有新資訊：5 輪 → 1 次 LLM 呼叫
+        llm = _ScriptedLLM(["Final Stance: neutral\nConfidence: 0.6"])
+        ad.get_llm = lambda: llm
+        res = ad.run_analyst_discussion(mv, None, rounds=5, log_actions_path=None, adaptive=True)
+        assert llm.calls == 1 and res["rounds"] == 1 and res["stop_reason"] == "no_new_info"
+        assert "Confidence: <0.0-1.0>" in llm.prompts[0]
+        assert res["schedule"][0]["confidence"] == 0.6
+
+        # 預設（非 adaptive）行為不變
+        llm = _ScriptedLLM(["Final Stance: neutral"])
+        ad.get_llm = lambda: llm
+        res = ad.run_analyst_discussion(mv, None, rounds=5, log_actions_path=None)
+        assert llm.calls == 5 and res["stop_reason"] == "rounds" and res["schedule"] == []
+        assert "Confidence:" not in llm.prompts[0]
+
+        # 工具第二輪才帶來新聞 → 多跑一輪；立場翻轉後穩定即收斂
+        tb = _FakeToolBox()
+        ad.ToolBox = lambda: tb
+        llm = _ScriptedLLM(["Final Stance: neutral\nConfidence: 0.4",
+                            "Final Stance: bearish\nConfidence: 0.7",
+                            "Final Stance: bearish\nConfidence: 0.9"])
+        ad.get_llm = lambda: llm
+        res = ad.run_analyst_discussion({"symbols": ["AAPL"]}, None, rounds=5, tool_budget=4,
+                                        log_actions_path=None, adaptive=True)
+        assert llm.calls == 3 and res["stop_reason"] == "converged", res["stop_reason"]
+        assert res["final_stance"] == "bearish"
+        assert "vix_term" in res["schedule"][0]["new_info"] and res["schedule"][1]["new_info"] == ["news"]
+        assert tb.calls.count("fear_greed") == 1 and tb.calls.count("news_scan") == 2
+    finally:
+        ad.get_llm, ad.ToolBox = orig_llm, orig_tb
+
+    print("[ROUNDS] OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import json
+import tempfile
+import numpy as np
+from src.data.panel import PricePanel
+from src.data.providers import SyntheticProvider
+
+def _frames(syms, start="2023-01-01", end="2023-12-31", seed=3):
+    prov = SyntheticProvider(seed=seed)
+    return {s: prov.history(s, start, end) for s in syms}
+
+def main():
+    syms = [f"SYN{i:03d}" for i in range(40)]
+    frames = _frames(syms)
+    frames["SYN005"] = frames["SYN005"].iloc[50:]            # 晚上市 → 前段 NaN
+    panel = PricePanel.from_frames(frames, syms, start="2023-01-01", end="2023-12-31")
+
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d) / "panel"
+        back = PricePanel.load(panel.save(root))
+        # save → load(mmap)：逐位元相同、確實是 memmap
+        assert back.symbols == panel.symbols and back.start == panel.start and back.end == panel.end
+        assert back.dates.tobytes() == panel.dates.astype("datetime64[ns]").tobytes()
+        for f, arr in panel.fields.items():
+            assert isinstance(back.fields[f], np.memmap), f
+            assert back.fields[f].tobytes() == np.ascontiguousarray(arr).tobytes(), f
+        assert not isinstance(PricePanel.load(root, mmap=False).fields["Close"], np.memmap)
+
+        # window / to_frames 與原始 DataFrame 一致
+        w = back.window("2023-03-01", "2023-06-01")
+        assert w.dates.min() >= np.datetime64("2023-03-01") and w.dates.max() < np.datetime64("2023-06-01")
+        assert np.shares_memory(w.fields["Close"], back.fields["Close"])
+        out = back.to_frames(start="2023-03-01", end="2023-06-01")
+        ref = frames["SYN007"].loc["2023-03-01":"2023-05-31"]
+        assert np.array_equal(out["SYN007"]["Close"].to_numpy(), ref["Close"].to_numpy())
+        assert out["SYN005"].index.min() >= frames["SYN005"].index.min().tz_localize(None)
+        assert back.col("SYN039") == 39
+        try:
+            back.col("NOPE")
+            raise AssertionError("expected ValueError")
+        except ValueError:
+            pass
+
+        # 重存：meta.json 指向新世代，只保留前一世代；舊 reader 的映射不受影響
+        gen1 = json.loads((root / "meta.json").read_text())["generation"]
+        small = PricePanel.from_frames(frames, syms[:10], start="2023-01-01", end="2023-12-31")
+        small.save(root)
+        small.save(root)
+        gens = {p.name.split(".")[1] for p in root.glob("*.npy")}
+        assert len(gens) == 2 and gen1 not in gens, gens
+        again = PricePanel.load(root)
+        assert again.symbols == syms[:10] and again.fields["Close"].shape[1] == 10
+        assert back.fields["Close"].shape[1] == 40 and np.isfinite(back.fields["Close"][-1, 39])
+
+        # meta 與陣列不一致時拒絕載入（而非靜默錯位）
+        meta = json.loads((root / "meta.json").read_text())
+        meta["symbols"] = syms[:9]
+        (root / "meta.json").write_text(json.dumps(meta))
+        try:
+            PricePanel.load(root)
+            raise AssertionError("expected ValueError")
+        except ValueError:
+            pass
+
+    print("[PANEL] OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import threading
+import time
+import pandas as pd
+from src.data.coalesce import RequestCoalescer
+from src.data.providers import SyntheticProvider
+
+class _CountingFetch:
+    """SyntheticProvider 下載 + 呼叫紀錄；delay 讓並發請求確實重疊。"""
+    def __init__(self, delay: float = 0.0, empty=()):
+        self.prov = SyntheticProvider(seed=1)
+        self.delay = delay
+        self.empty = set(empty)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol, start, end, interval, auto_adjust):
+        with self._lock:
+            self.calls.append((symbol, start, end))
+        time.sleep(self.delay)
+        if symbol in self.empty:
+            return pd.DataFrame()
+        return self.prov.history(symbol, start, end, interval, auto_adjust)
+
+def _run(n, target):
+    bar = threading.Barrier(n)
+    out = [None] * n
+
+    def work(i):
+        bar.wait()
+        out[i] = target(i)
+    ths = [threading.Thread(target=work, args=(i,)) for i in range(n)]
+    [t.start() for t in ths]
+    [t.join() for t in ths]
+    return out
+
+def main():
+    # single-flight：16 個 thread 同時要同一 key → 只下載一次，其餘切片命中
+    fetch = _CountingFetch(delay=0.05)
+    co = RequestCoalescer(ttl_s=60)
+    res = _run(16, lambda i: co.get("AAA", "2023-01-01", "2023-06-01", "1d", False, fetch))
+    assert len(fetch.calls) == 1, fetch.calls
+    assert co.stats() == {"hits": 15, "misses": 1, "entries": 1}
+    assert all(r.equals(res[0]) for r in res) and len(res[0]) > 100
+
+    # 不同 key 並發：計數不遺失
+    fetch = _CountingFetch()
+    co = RequestCoalescer(ttl_s=60)
+    _run(32, lambda i: [co.get(f"K{i % 8}", "2023-01-01", "2023-03-01", "1d", False, fetch)
+                        for _ in range(50)])
+    st = co.stats()
+    assert st["hits"] + st["misses"] == 32 * 50 and st["misses"] == len(fetch.calls) == 8, st
+
+    # TTL 內切片：子區間命中、重疊區間只補缺的尾 / 頭、之後兩者皆命中
+    fetch = _CountingFetch()
+    co = RequestCoalescer(ttl_s=60)
+    full = co.get("VIX", "2023-01-01", "2023-06-01", "1d", False, fetch)
+    sub = co.get("VIX", "2023-02-01", "2023-03-01", "1d", False, fetch)
+    assert len(fetch.calls) == 1 and sub.index.min() >= pd.Timestamp("2023-02-01", tz=sub.index.tz)
+    assert sub.index.max() < pd.Timestamp("2023-03-01", tz=sub.index.tz)
+    assert sub.equals(full.loc[sub.index])
+    tail = co.get("VIX", "2023-05-01", "2023-08-01", "1d", False, fetch)
+    assert fetch.calls[-1] == ("VIX", "2023-06-01", "2023-08-01")
+    ref = fetch.prov.history("VIX", "2023-05-01", "2023-08-01", "1d", False)
+    assert tail.equals(ref) and tail.index.is_monotonic_increasing
+    co.get("VIX", "2023-01-15", "2023-07-15", "1d", False, fetch)
+    assert len(fetch.calls) == 2
+    co.get("VIX", "2022-12-01", "2023-09-01", "1d", False, fetch)
+    assert fetch.calls[-2:] == [("VIX", "2022-12-01", "2023-01-01"), ("VIX", "2023-08-01", "2023-09-01")]
+    assert co.stats()["entries"] == 1 and co.get("VIX", "2022-12-05", "2023-08-20", "1d", False, fetch) is not None
+    assert len(fetch.calls) == 4
+    # 不相交的區間：只抓請求的部分
+    co.get("VIX", "2024-01-01", "2024-02-01", "1d", False, fetch)
+    assert fetch.calls[-1] == ("VIX", "2024-01-01", "2024-02-01")
+
+    # ^VIX：批次抓 [d-180, d)，term check 抓 [d-92, d+1) → 只補 [d, d+1)
+    fetch = _CountingFetch()
+    co = RequestCoalescer(ttl_s=60)
+    co.get("^VIX", "2023-01-02", "2023-07-01", "1d", False, fetch)
+    co.get("^VIX", "2023-03-31", "2023-07-02", "1d", False, fetch)
+    assert fetch.calls == [("^VIX", "2023-01-02", "2023-07-01"), ("^VIX", "2023-07-01", "2023-07-02")]
+
+    # TTL 從下載完成起算：慢下載不吃掉自己的 TTL
+    fetch = _CountingFetch(delay=0.15)
+    co = RequestCoalescer(ttl_s=0.1)
+    co.get("SLOW", "2023-01-01", "2023-02-01", "1d", False, fetch)
+    co.get("SLOW", "2023-01-01", "2023-02-01", "1d", False, fetch)
+    assert len(fetch.calls) == 1 and co.stats()["hits"] == 1
+
+    # TTL 過期 → 重新下載；空結果不快取
+    fetch = _CountingFetch(empty={"GONE"})
+    co = RequestCoalescer(ttl_s=0.05)
+    co.get("AAA", "2023-01-01", "2023-02-01", "1d", False, fetch)
+    time.sleep(0.1)
+    co.get("AAA", "2023-01-01", "2023-02-01", "1d", False, fetch)
+    assert len(fetch.calls) == 2
+    co.get("GONE", "2023-01-01", "2023-02-01", "1d", False, fetch)
+    co.get("GONE", "2023-01-01", "2023-02-01", "1d", False, fetch)
+    assert len(fetch.calls) == 4 and co.stats()["entries"] == 1
+
+    print("[COALESCE] OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import sys
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+for p in (ROOT, SRC):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+import tempfile
+import pandas as pd
+from src.data import market_data
+from src.data.ohlcv_cache import OHLCVCache
+from src.data.providers import SyntheticProvider
+
+class _BatchProvider(SyntheticProvider):
+    """記錄每次 download 的 chunk；含 BAD 的整批拋錯，MISS* 沒有資料。"""
+    def __init__(self, cacheable: bool = False):
+        super().__init__(seed=2)
+        self.cacheable = cacheable
+        self.batches = []
+
+    def download(self, symbols, start, end, interval="1d", auto_adjust=False):
+        self.batches.append(list(symbols))
+        if "BAD" in symbols:
+            raise RuntimeError("HTTP 500")
+        return super().download([s for s in symbols if not s.startswith("MISS")], start, end,
+                                interval, auto_adjust)
+
+    def history(self, symbol, start, end, interval="1d", auto_adjust=False):
+        if symbol.startswith("MISS"):
+            return pd.DataFrame()
+        return super().history(symbol, start, end, interval, auto_adjust)
+
+def main():
+    syms = [f"B{i:02d}" for i in range(20)]
+    universe = syms[:7] + ["BAD"] + syms[7:15] + ["MISS1"] + syms[15:] + ["B03"]   # 含重複
+    start, end = "2023-01-01", "2023-04-01"
+    prev_cache = market_data.get_ohlcv_cache()
+    try:
+        # 23 個不重複 symbol、每批 5 → 5 批；失敗的批次 / 沒資料的 symbol 記進 failures
+        prov = _BatchProvider()
+        market_data.set_provider(prov)
+        failures = {}
+        out = market_data.get_multi_prices(universe, start, end, batch_size=5, failures=failures)
+        assert [len(b) for b in prov.batches] == [5, 5, 5, 5, 2], prov.batches
+        assert sum(prov.batches, []) == list(dict.fromkeys(universe))
+        bad_batch = prov.batches[1]
+        assert "BAD" in bad_batch
+        assert set(failures) == set(bad_batch) | {"MISS1"}, failures
+        assert all("batch download failed" in failures[s] for s in bad_batch)
+        assert failures["MISS1"].startswith("No data for MISS1")
+        assert set(out) == set(universe) - set(failures) and all(not df.empty for df in out.values())
+
+        # batch_size=1：逐檔路徑，第一個失敗直接拋出
+        market_data.set_provider(_BatchProvider())
+        try:
+            market_data.get_multi_prices(["B00", "MISS2"], start, end, batch_size=1)
+            raise AssertionError("expected ValueError")
+        except ValueError:
+            pass
+
+        # 有 OHLCV 快取時：只下載缺的 symbol，再跑一次不再發請求
+        with tempfile.TemporaryDirectory() as d:
+            market_data.set_ohlcv_cache(OHLCVCache(d))
+            prov = _BatchProvider(cacheable=True)
+            market_data.set_provider(prov)
+            failures = {}
+            out = market_data.get_multi_prices(syms + ["MISS1"], start, end, batch_size=8,
+                                               failures=failures)
+            assert [len(b) for b in prov.batches] == [8, 8, 5] and set(failures) == {"MISS1"}
+            n = len(prov.batches)
+            again = market_data.get_multi_prices(syms, start, end, batch_size=8)
+            assert len(prov.batches) == n and set(again) == set(syms)
+            assert again["B07"].equals(out["B07"])
+            # MISS1：請求成功但沒有資料 → 已覆蓋，不再重抓；整批失敗的 BAD 下次仍重試
+            failures = {}
+            market_data.get_multi_prices(syms + ["MISS1"], start, end, batch_size=8, failures=failures)
+            assert len(prov.batches) == n and set(failures) == {"MISS1"}
+            market_data.get_multi_prices(["BAD"], start, end, batch_size=8, failures={})
+            market_data.get_multi_prices(["BAD"], start, end, batch_size=8, failures={})
+            assert prov.batches[n:] == [["BAD"], ["BAD"]]
+    finally:
+        market_data.set_ohlcv_cache(prev_cache)
+        market_data.set_provider(SyntheticProvider(seed=0))
+
+    print("[BATCH] OK")
+
+if __name__ == "__main__":
+    main()
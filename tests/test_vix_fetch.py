@@ -16,9 +16,9 @@ import json, subprocess, sys
 from pathlib import Path
 import json
 import pandas as pd
-import yfinance as yf
 
-from src.data.market_data import get_vix, get_vix_close
+# 資料來源跟隨 AI_TRADER_DATA_PROVIDER（yfinance / replay / synthetic），離線也能跑
+from src.data.market_data import get_vix, get_vix_close, get_provider, recent_window
 
 def _pp_series_info(name: str, s: pd.Series) -> None:
     print(f"\n[{name}]")
@@ -53,13 +53,14 @@ def main():
     except Exception as e:
         print("\n[get_vix_close] ERROR:", repr(e))
 
-    # 2) 如果上述為空，再用 yfinance 原生 fallback 測看看最近 3 個月
+    # 2) 如果上述為空，再直接向 provider 要最近 3 個月
     try:
-        df_recent = yf.download("^VIX", period="3mo", interval="1d", progress=False, auto_adjust=False)
+        provider = get_provider()
+        df_recent = provider.history("^VIX", *recent_window(92))
         s_recent = df_recent["Close"].dropna() if df_recent is not None and not df_recent.empty else pd.Series(dtype=float)
-        _pp_series_info("^VIX Close (period=3mo fallback)", s_recent)
+        _pp_series_info(f"^VIX Close (3mo fallback via {provider.name})", s_recent)
     except Exception as e:
-        print("\n[yfinance ^VIX period=3mo] ERROR:", repr(e))
+        print("\n[provider ^VIX 3mo] ERROR:", repr(e))
 
 if __name__ == "__main__":
     main()